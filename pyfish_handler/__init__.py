@@ -9,5 +9,17 @@
 # pylint: disable=unused-wildcard-import
 
 from .board import Board
+from .instrumentation import Instrumentation
 from .move import Move
-from .pieces import Pieces
\ No newline at end of file
+from .pieces import Pieces
+from .move_generator import MoveGenerator
+from .move_maker import MoveMaker
+from .board import IntBoard
+from .transposition_table import TranspositionTable, Bound
+from .perft_cache import PerftCache
+from .evaluation import Evaluation
+from .search import Search
+from .static_exchange import StaticExchange
+from .batch_evaluation import BatchEvaluation
+from .fen_stream import FenStream, PositionBatch
+from .position_records import PositionRecords
\ No newline at end of file
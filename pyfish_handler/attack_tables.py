@@ -0,0 +1,259 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+
+# third-party
+import numpy as np
+
+# project
+from .table_cache import TableCache
+
+MASK64 = 0xffffffffffffffff
+# bump when the tables or their layout change, the cached tables of other versions are ignored
+TABLES_VERSION = 1
+
+ROOK_DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1))
+BISHOP_DIRECTIONS = ((1, 1), (1, -1), (-1, 1), (-1, -1))
+KNIGHT_OFFSETS = ((1, 2), (2, 1), (2, -1), (1, -2), (-1, -2), (-2, -1), (-2, 1), (-1, 2))
+KING_OFFSETS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+POPCOUNT_8 = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.uint8)
+
+class TableBuilder:
+    """ Builds the precomputed attack tables used by the move generator
+    - Knight, king and pawn attacks are simple 64 entry tables
+    - Rook and bishop attacks use fancy magic bitboards
+        - reference: https://www.chessprogramming.org/Magic_Bitboards
+    """
+    @staticmethod
+    def leaper_attacks(offsets: tuple) -> np.ndarray:
+        """ Builds the attack table of a piece that jumps by fixed offsets
+
+        Args:
+            offsets (tuple): The (file, rank) offsets the piece can jump by
+
+        Returns:
+            np.ndarray: 64 attack bitboards indexed by square
+        """
+        table = np.zeros(64, dtype=np.uint64)
+        for square in range(64):
+            file, rank = square & 7, square >> 3
+            attacks = 0
+            for file_offset, rank_offset in offsets:
+                if 0 <= file + file_offset < 8 and 0 <= rank + rank_offset < 8:
+                    attacks |= 1 << (file + file_offset + 8 * (rank + rank_offset))
+            table[square] = attacks
+        return table
+
+    @staticmethod
+    def pawn_attacks() -> np.ndarray:
+        """ Builds the pawn attack tables
+
+        Returns:
+            np.ndarray: A (2, 64) table, indexed by color (0 white, 1 black) and square
+        """
+        return np.stack([
+            TableBuilder.leaper_attacks(((1, 1), (-1, 1))),
+            TableBuilder.leaper_attacks(((1, -1), (-1, -1)))
+        ])
+
+    @staticmethod
+    def ray_attacks(square: int, occupied: int, directions: tuple) -> int:
+        """ Slowly walks the rays of a sliding piece, used to fill the magic tables
+
+        Args:
+            square (int): The square of the sliding piece
+            occupied (int): The occupancy bitboard
+            directions (tuple): The (file, rank) directions the piece slides in
+
+        Returns:
+            int: The attack bitboard
+        """
+        attacks = 0
+        for file_step, rank_step in directions:
+            file, rank = (square & 7) + file_step, (square >> 3) + rank_step
+            while 0 <= file < 8 and 0 <= rank < 8:
+                bit = 1 << (file + 8 * rank)
+                attacks |= bit
+                if occupied & bit:
+                    break
+                file, rank = file + file_step, rank + rank_step
+        return attacks
+
+    @staticmethod
+    def relevant_mask(square: int, directions: tuple) -> int:
+        """ Returns the squares whose occupancy affects a sliding piece (the board edges are excluded)
+
+        Args:
+            square (int): The square of the sliding piece
+            directions (tuple): The (file, rank) directions the piece slides in
+
+        Returns:
+            int: The relevant occupancy mask
+        """
+        mask = 0
+        for file_step, rank_step in directions:
+            file, rank = (square & 7) + file_step, (square >> 3) + rank_step
+            while 0 <= file + file_step < 8 and 0 <= rank + rank_step < 8:
+                mask |= 1 << (file + 8 * rank)
+                file, rank = file + file_step, rank + rank_step
+        return mask
+
+    @staticmethod
+    def find_magic(square: int, directions: tuple, rng: "np.random.Generator") -> tuple:
+        """ Searches for a magic number which maps every relevant occupancy of a square without
+        destructive collisions
+
+        Args:
+            square (int): The square of the sliding piece
+            directions (tuple): The (file, rank) directions the piece slides in
+            rng (np.random.Generator): The random number generator used for the candidates
+
+        Returns:
+            tuple: The mask, the magic number, the shift and the attack table of the square
+        """
+        mask = TableBuilder.relevant_mask(square, directions)
+        bits = mask.bit_count()
+        shift = 64 - bits
+
+        # enumerate every subset of the mask (carry-rippler trick)
+        subsets, subset = [], 0
+        while True:
+            subsets.append(subset)
+            subset = (subset - mask) & mask
+            if subset == 0:
+                break
+        occupancies = np.array(subsets, dtype=np.uint64)
+        attacks = np.array([TableBuilder.ray_attacks(square, occ, directions) for occ in subsets], dtype=np.uint64)
+
+        batch = 1024
+        while True:
+            # sparse random numbers make much better magic candidates
+            magics = rng.integers(0, MASK64, size=(3, batch), dtype=np.uint64, endpoint=True)
+            magics = magics[0] & magics[1] & magics[2]
+            magics = magics[POPCOUNT_8[(np.uint64(mask) * magics) >> np.uint64(56)] >= 6]
+
+            # reject most candidates on a small sample of occupancies before checking all of them
+            for sample in (occupancies.size >> 4, occupancies.size):
+                magics = magics[TableBuilder.collision_free(occupancies[:sample], attacks[:sample], magics, bits)]
+                if magics.size == 0:
+                    break
+            else:
+                magic = magics[:1]
+                table = np.zeros(1 << bits, dtype=np.uint64)
+                table[(occupancies * magic) >> np.uint64(shift)] = attacks
+                return mask, int(magic[0]), shift, table
+
+    @staticmethod
+    def collision_free(occupancies: np.ndarray, attacks: np.ndarray, magics: np.ndarray, bits: int) -> np.ndarray:
+        """ Tests a batch of magic candidates against a set of occupancies
+
+        Args:
+            occupancies (np.ndarray): The occupancies to index
+            attacks (np.ndarray): The attacks matching each occupancy
+            magics (np.ndarray): The magic candidates
+            bits (int): The number of index bits
+
+        Returns:
+            np.ndarray: A boolean mask of the candidates without destructive collisions
+        """
+        # the numpy multiplication wraps around at 64 bits just like the runtime lookup,
+        # a candidate fails if any of its slots got overwritten by a different attack set
+        indices = (occupancies[None, :] * magics[:, None]) >> np.uint64(64 - bits)
+        slots = (indices + (np.arange(magics.size, dtype=np.uint64)[:, None] << np.uint64(bits))).ravel()
+        table = np.zeros(magics.size << bits, dtype=np.uint64)
+        table[slots] = np.broadcast_to(attacks, indices.shape).ravel()
+        return np.all(table[slots].reshape(indices.shape) == attacks, axis=1)
+
+    @staticmethod
+    def build(seed: int = 0x5eed) -> dict[str, np.ndarray]:
+        """ Builds every attack table from scratch
+
+        Args:
+            seed (int, optional): The seed used to search for the magic numbers
+
+        Returns:
+            dict[str, np.ndarray]: The tables, ready to be cached by TableCache
+        """
+        rng = np.random.default_rng(seed)
+        tables = {
+            "knight": TableBuilder.leaper_attacks(KNIGHT_OFFSETS),
+            "king": TableBuilder.leaper_attacks(KING_OFFSETS),
+            "pawn": TableBuilder.pawn_attacks(),
+        }
+
+        for name, directions in (("rook", ROOK_DIRECTIONS), ("bishop", BISHOP_DIRECTIONS)):
+            masks, magics, shifts, offsets, attack_tables = [], [], [], [], []
+            offset = 0
+            for square in range(64):
+                mask, magic, shift, table = TableBuilder.find_magic(square, directions, rng)
+                masks.append(mask)
+                magics.append(magic)
+                shifts.append(shift)
+                offsets.append(offset)
+                attack_tables.append(table)
+                offset += len(table)
+            tables[f"{name}_masks"] = np.array(masks, dtype=np.uint64)
+            tables[f"{name}_magics"] = np.array(magics, dtype=np.uint64)
+            tables[f"{name}_shifts"] = np.array(shifts, dtype=np.uint8)
+            tables[f"{name}_offsets"] = np.array(offsets + [offset], dtype=np.uint32)
+            tables[f"{name}_attacks"] = np.concatenate(attack_tables)
+        return tables
+
+def _split(flat: np.ndarray, offsets: np.ndarray) -> list[list[int]]:
+    """ Splits a flat magic attack table into one plain int list per square """
+    return [flat[offsets[square]:offsets[square + 1]].tolist() for square in range(64)]
+
+# the tables are converted to plain ints once, numpy scalars are much slower to operate on
+_tables = TableCache.load("attack_tables", TABLES_VERSION, TableBuilder.build)
+KNIGHT_ATTACKS: list[int] = _tables["knight"].tolist()
+KING_ATTACKS: list[int] = _tables["king"].tolist()
+PAWN_ATTACKS: list[list[int]] = _tables["pawn"].tolist()
+ROOK_MASKS: list[int] = _tables["rook_masks"].tolist()
+ROOK_MAGICS: list[int] = _tables["rook_magics"].tolist()
+ROOK_SHIFTS: list[int] = _tables["rook_shifts"].tolist()
+ROOK_TABLE: list[list[int]] = _split(_tables["rook_attacks"], _tables["rook_offsets"])
+BISHOP_MASKS: list[int] = _tables["bishop_masks"].tolist()
+BISHOP_MAGICS: list[int] = _tables["bishop_magics"].tolist()
+BISHOP_SHIFTS: list[int] = _tables["bishop_shifts"].tolist()
+BISHOP_TABLE: list[list[int]] = _split(_tables["bishop_attacks"], _tables["bishop_offsets"])
+del _tables
+
+def rook_attacks(square: int, occupied: int) -> int:
+    """ Returns the rook attacks from a square for a given occupancy """
+    return ROOK_TABLE[square][(((occupied & ROOK_MASKS[square]) * ROOK_MAGICS[square]) & MASK64) >> ROOK_SHIFTS[square]]
+
+def bishop_attacks(square: int, occupied: int) -> int:
+    """ Returns the bishop attacks from a square for a given occupancy """
+    return BISHOP_TABLE[square][(((occupied & BISHOP_MASKS[square]) * BISHOP_MAGICS[square]) & MASK64) >> BISHOP_SHIFTS[square]]
+
+def queen_attacks(square: int, occupied: int) -> int:
+    """ Returns the queen attacks from a square for a given occupancy """
+    return rook_attacks(square, occupied) | bishop_attacks(square, occupied)
+
+
+def _lines() -> dict[str, np.ndarray]:
+    """ Computes the squares between and the full line through every pair of aligned squares,
+    both are 0 for squares that share no rank, file or diagonal """
+    between = np.zeros((64, 64), dtype=np.uint64)
+    line = np.zeros((64, 64), dtype=np.uint64)
+    for first in range(64):
+        for attacks in (rook_attacks, bishop_attacks):
+            rays = attacks(first, 0)
+            for second in range(64):
+                if rays >> second & 1:
+                    between[first, second] = attacks(first, 1 << second) & attacks(second, 1 << first)
+                    line[first, second] = (rays & attacks(second, 0)) | (1 << first) | (1 << second)
+    return {"between": between, "line": line}
+
+# used for legal move generation: check evasion targets and pin rays, cached next to the attack tables
+_tables = TableCache.load("lines", TABLES_VERSION, _lines)
+BETWEEN: list[list[int]] = _tables["between"].tolist()
+LINE: list[list[int]] = _tables["line"].tolist()
+del _tables
@@ -0,0 +1,199 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+from typing import Iterable
+
+# third-party
+import numpy as np
+
+# project
+from .pieces import Pieces
+from .board import Board
+from .evaluation import PIECE_VALUES, PIECE_SQUARE_TABLES
+
+PIECES = tuple(Pieces.DECODE) # the 12 piece bitboard indices, white first
+WHITE_PIECES = PIECES[:6]
+BLACK_PIECES = PIECES[6:]
+
+NOT_FILE_A = np.uint64(0xfefefefefefefefe)
+NOT_FILE_H = np.uint64(0x7f7f7f7f7f7f7f7f)
+NOT_FILE_AB = np.uint64(0xfcfcfcfcfcfcfcfc)
+NOT_FILE_GH = np.uint64(0x3f3f3f3f3f3f3f3f)
+ALL_FILES = np.uint64(0xffffffffffffffff)
+
+# (shift, mask of the squares that can be reached without wrapping around the board)
+# a positive shift moves towards h8, a negative one towards a1
+KNIGHT_JUMPS = ((17, NOT_FILE_A), (15, NOT_FILE_H), (10, NOT_FILE_AB), (6, NOT_FILE_GH),
+                (-17, NOT_FILE_H), (-15, NOT_FILE_A), (-10, NOT_FILE_GH), (-6, NOT_FILE_AB))
+KING_STEPS = ((8, ALL_FILES), (-8, ALL_FILES), (1, NOT_FILE_A), (-1, NOT_FILE_H),
+              (9, NOT_FILE_A), (7, NOT_FILE_H), (-7, NOT_FILE_A), (-9, NOT_FILE_H))
+ROOK_RAYS = KING_STEPS[:4]
+BISHOP_RAYS = KING_STEPS[4:]
+
+# material value of each of the 12 piece bitboards, white positive and black negative
+MATERIAL = np.array([PIECE_VALUES[piece & 7] * (-1 if piece & Pieces.BLACK else 1) for piece in PIECES], dtype=np.int64)
+
+# (12, 64) piece-square scores indexed by LSB = A1 square, white positive and black negative
+PIECE_SQUARE = np.array([
+    [-PIECE_SQUARE_TABLES[piece & 7][square] if piece & Pieces.BLACK else PIECE_SQUARE_TABLES[piece & 7][square ^ 56]
+     for square in range(64)]
+    for piece in PIECES
+], dtype=np.int32)
+
+class BatchEvaluation:
+    """ Evaluates many positions at once on an (N, 16) uint64 array of bitboards (the Board layout)
+
+    - Every term is computed with whole-array numpy operations, there is no Python loop per position
+    - Material: a vectorised popcount of every piece bitboard
+    - Piece-square tables: the bits are extracted with np.unpackbits and multiplied with the tables
+    - Mobility: set-wise attack generation (shifts for leapers, Kogge-Stone occluded fills for sliders)
+        - reference: https://www.chessprogramming.org/Kogge-Stone_Algorithm
+        - per direction, the rays of two pieces of the same kind never overlap, so the popcount of
+          the attack sets equals the sum of the per-piece mobility
+    - Scores are from white's point of view unless the side to move is given, and match
+      Evaluation.evaluate when the mobility weight is 0
+    """
+    @staticmethod
+    def stack(boards: Iterable[Board]) -> np.ndarray:
+        """ Stacks boards of any backend into one array
+
+        Args:
+            boards (Iterable[Board]): The boards to stack
+
+        Returns:
+            np.ndarray: An (N, 16) uint64 array
+        """
+        return np.array([board.tolist() for board in boards], dtype=np.uint64).reshape(-1, 16)
+
+    @staticmethod
+    def popcount(bitboards: np.ndarray) -> np.ndarray:
+        """ Counts the set bits of every element of a uint64 array
+
+        Args:
+            bitboards (np.ndarray): A uint64 array of any shape
+
+        Returns:
+            np.ndarray: The bit counts, same shape
+        """
+        if hasattr(np, "bitwise_count"): # numpy >= 2.0
+            return np.bitwise_count(bitboards)
+        # SWAR popcount, reference: https://www.chessprogramming.org/Population_Count
+        x = bitboards - ((bitboards >> np.uint64(1)) & np.uint64(0x5555555555555555))
+        x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+        x = (x + (x >> np.uint64(4))) & np.uint64(0x0f0f0f0f0f0f0f0f)
+        return (x * np.uint64(0x0101010101010101)) >> np.uint64(56)
+
+    @staticmethod
+    def shift(bitboards: np.ndarray, amount: int) -> np.ndarray:
+        """ Shifts towards h8 for positive amounts and towards a1 for negative ones """
+        if amount > 0:
+            return bitboards << np.uint64(amount)
+        return bitboards >> np.uint64(-amount)
+
+    @staticmethod
+    def material(bitboards: np.ndarray) -> np.ndarray:
+        """ Computes the material balance of every position
+
+        Args:
+            bitboards (np.ndarray): An (N, 16) uint64 array
+
+        Returns:
+            np.ndarray: (N,) material scores in centipawns
+        """
+        return BatchEvaluation.popcount(bitboards[:, PIECES]).astype(np.int64) @ MATERIAL
+
+    @staticmethod
+    def piece_square(bitboards: np.ndarray, chunk_size: int = 1 << 16) -> np.ndarray:
+        """ Computes the piece-square table score of every position
+
+        Args:
+            bitboards (np.ndarray): An (N, 16) uint64 array
+            chunk_size (int, optional): Positions unpacked at once, bounds the temporary memory (768 bytes each)
+
+        Returns:
+            np.ndarray: (N,) piece-square scores in centipawns
+        """
+        scores = np.empty(len(bitboards), dtype=np.int64)
+        for start in range(0, len(bitboards), chunk_size):
+            chunk = np.ascontiguousarray(bitboards[start:start + chunk_size, PIECES], dtype="<u8")
+            bits = np.unpackbits(chunk.view(np.uint8), axis=-1, bitorder="little").reshape(len(chunk), -1)
+            scores[start:start + chunk_size] = bits @ PIECE_SQUARE.reshape(-1)
+        return scores
+
+    @staticmethod
+    def slider_attacks(sliders: np.ndarray, empty: np.ndarray, shift: int, mask: np.uint64) -> np.ndarray:
+        """ Computes the attacks of sliding pieces in one direction with a Kogge-Stone occluded fill
+
+        Args:
+            sliders (np.ndarray): The sliding pieces
+            empty (np.ndarray): The empty squares
+            shift (int): The single step shift of the direction
+            mask (np.uint64): The squares reachable without wrapping around the board
+
+        Returns:
+            np.ndarray: The attacked squares (including the first blocker)
+        """
+        empty = empty & mask
+        sliders = sliders | (empty & BatchEvaluation.shift(sliders, shift))
+        empty = empty & BatchEvaluation.shift(empty, shift)
+        sliders = sliders | (empty & BatchEvaluation.shift(sliders, 2 * shift))
+        empty = empty & BatchEvaluation.shift(empty, 2 * shift)
+        sliders = sliders | (empty & BatchEvaluation.shift(sliders, 4 * shift))
+        return BatchEvaluation.shift(sliders, shift) & mask
+
+    @staticmethod
+    def mobility(bitboards: np.ndarray) -> np.ndarray:
+        """ Counts the pseudo-legal moves of the knights, bishops, rooks, queens and kings of both sides
+        (pawns are not counted)
+
+        Args:
+            bitboards (np.ndarray): An (N, 16) uint64 array
+
+        Returns:
+            np.ndarray: (N, 2) mobility counts, white then black
+        """
+        empty = bitboards[:, Pieces.EMPTY]
+        counts = np.zeros((len(bitboards), 2), dtype=np.int64)
+        for side, color, own in ((0, Pieces.WHITE, Pieces.ALL_WHITE), (1, Pieces.BLACK, Pieces.ALL_BLACK)):
+            targets = ~bitboards[:, own]
+            for piece, steps in ((Pieces.KNIGHT, KNIGHT_JUMPS), (Pieces.KING, KING_STEPS)):
+                pieces = bitboards[:, color | piece]
+                for shift, mask in steps:
+                    counts[:, side] += BatchEvaluation.popcount(BatchEvaluation.shift(pieces, shift) & mask & targets)
+            queens = bitboards[:, color | Pieces.QUEEN]
+            for sliders, rays in ((bitboards[:, color | Pieces.ROOK], ROOK_RAYS), (bitboards[:, color | Pieces.BISHOP], BISHOP_RAYS),
+                                  (queens, ROOK_RAYS), (queens, BISHOP_RAYS)):
+                for shift, mask in rays:
+                    counts[:, side] += BatchEvaluation.popcount(BatchEvaluation.slider_attacks(sliders, empty, shift, mask) & targets)
+        return counts
+
+    @staticmethod
+    def evaluate(bitboards: np.ndarray, turns: np.ndarray = None, mobility_weight: int = 0) -> np.ndarray:
+        """ Evaluates every position
+
+        Args:
+            bitboards (np.ndarray): An (N, 16) uint64 array with up to date aggregate bitboards
+            turns (np.ndarray, optional): (N,) booleans, True for white to move, scores are then from the
+                                          point of view of the side to move
+            mobility_weight (int, optional): Centipawns per move of mobility difference
+
+        Returns:
+            np.ndarray: (N,) scores in centipawns
+        """
+        scores = BatchEvaluation.material(bitboards) + BatchEvaluation.piece_square(bitboards)
+        if mobility_weight:
+            mobility = BatchEvaluation.mobility(bitboards)
+            scores += mobility_weight * (mobility[:, 0] - mobility[:, 1])
+        if turns is not None:
+            scores = np.where(turns, scores, -scores)
+        return scores
\ No newline at end of file
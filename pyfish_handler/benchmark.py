@@ -0,0 +1,54 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+
+# standard
+import time
+
+# project
+from .board import Board, BACKENDS
+from .perft import Perft
+
+POSITIONS = (
+    ("startpos", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", 3),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1", 2),
+    ("endgame", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1", 3),
+)
+
+class Benchmark:
+    """ Measures the perft throughput of each board backend """
+    @staticmethod
+    def run(backends: tuple = BACKENDS, positions: tuple = POSITIONS) -> dict[str, float]:
+        """ Runs every position on every backend and prints the nodes per second
+
+        Args:
+            backends (tuple, optional): The board backends to compare
+            positions (tuple, optional): (name, fen, depth) triples
+
+        Returns:
+            dict[str, float]: The overall nodes per second of each backend
+        """
+        results = {}
+        for backend in backends:
+            total_nodes, total_time = 0, 0.0
+            for name, fen, depth in positions:
+                board = Board(fen, backend=backend)
+                start = time.perf_counter()
+                nodes = Perft.perft(board, depth)
+                elapsed = time.perf_counter() - start
+                total_nodes += nodes
+                total_time += elapsed
+                print(f"{backend:>6} | {name:<10} | depth {depth} | {nodes:>8} nodes | {nodes / elapsed:>10.0f} nps")
+            results[backend] = total_nodes / total_time
+            print(f"{backend:>6} | {'total':<10} |         | {total_nodes:>8} nodes | {results[backend]:>10.0f} nps")
+        return results
+
+if __name__ == '__main__':
+    Benchmark.run()
@@ -18,7 +18,14 @@ from typing import Self, NewType
 import numpy as np
 
 # project
-from pieces import Pieces
+from .instrumentation import Instrumentation
+from .pieces import Pieces
+from .zobrist import Zobrist
+
+MASK64 = 0xffffffffffffffff
+BACKENDS = ("numpy", "int")
+NO_PIECE = 0xf # mailbox value of an empty square
+DEFAULT_STATE = (None, 0, 1) # en passant square, halfmove clock and fullmove number when they are not given
 
 FenString = NewType("FenString", str)
 Bitboards = NewType("Bitboards", np.ndarray)
@@ -28,10 +35,19 @@ CastlingRights = NewType("CastlingRights", int)
 # TODO: Add the following stuff
 # 12 bitboards for each color (complete)
 # 2 bitboards for occupancy (unoptimized)
-# game state information
-# game history
-# zobrist keys
-# piece lists
+# game state information (complete)
+# game history (complete)
+# zobrist keys (complete)
+# piece lists (mailbox complete)
+
+class Castling:
+    """ Assigns names to the bits of the 4 bit castling rights (KQkq) """
+    WHITE_SHORT = 0b1000
+    WHITE_LONG  = 0b0100
+    BLACK_SHORT = 0b0010
+    BLACK_LONG  = 0b0001
+    
+    ENCODE = {"K": WHITE_SHORT, "Q": WHITE_LONG, "k": BLACK_SHORT, "q": BLACK_LONG}
 
 class Board(np.ndarray):
     """
@@ -41,25 +57,50 @@ class Board(np.ndarray):
             - board (np.ndarray): The board state in bitboard format
             - turn (bool): True for white, False for black
             - castling_rights (int): The castling rights represented as a 4 bit integer
+            - en_passant (int, optional): The en passant target square, None if there is none
+            - halfmove (int, optional): The halfmove clock, 0 by default
+            - fullmove (int, optional): The fullmove number, 1 by default
     
     - The class represents a board state with bitboards
     - For all bitboards, LSB = A1 (Little-Endian Rank-File mapping)
         - reference: https://www.chessprogramming.org/Square_Mapping_Considerations
     - This object is a numpy array of 12 unsigned 64-bit integers which represents
       the board state
+    - board.zobrist holds the Zobrist key of the position, MoveMaker keeps it up to date
+    - board.mailbox is a 64 byte bytearray of the piece encoding on every square (NO_PIECE if empty),
+      MoveMaker keeps it up to date so that the piece on a square is a single index
+    - The game state (turn, castling_rights, en_passant, halfmove, fullmove) is stored per instance
+    - board.history is the stack of the Zobrist keys of the positions before every move played with
+      MoveMaker, board.key_counts counts them so that repetitions are found in O(1)
+    - Passing backend="int" returns an IntBoard instead, which stores the same bitboards as plain ints
     """
-    def __new__(cls, data="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1") -> Self:
+    def __new__(cls, data="rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1", backend: str = "numpy") -> Self:
+        if backend == "int":
+            return IntBoard(data)
+        if backend != "numpy":
+            raise ValueError(f"Unknown board backend: {backend}, expected one of {BACKENDS}")
+        
         if isinstance(data, str):
-            bitboards, cls.turn, cls.castling_rights = cls.load_from_fen(data)
-        elif isinstance(data, (list, tuple)) and len(data) == 3:
-            bitboards, cls.turn, cls.castling_rights = data
+            bitboards, turn, castling_rights, en_passant, halfmove, fullmove = cls.load_from_fen(data)
+        elif isinstance(data, (list, tuple)) and 3 <= len(data) <= 6:
+            bitboards, turn, castling_rights, en_passant, halfmove, fullmove = (*data, *DEFAULT_STATE[len(data) - 3:])
         else:
             raise ValueError("Invalid data format")
         
-        obj = np.asarray(bitboards, dtype=np.uint64).view(cls)
+        # the game state lives on the instance so that several boards can coexist
+        obj = np.array(bitboards, dtype=np.uint64).view(cls)
+        obj.turn = turn
+        obj.castling_rights = castling_rights
+        obj.en_passant = Zobrist.capturable(obj, turn, en_passant) # dropped like MoveMaker does when no pawn can capture
+        obj.halfmove = halfmove
+        obj.fullmove = fullmove
+        obj.history = []
+        obj.key_counts = {}
+        obj.zobrist = Zobrist.hash(obj, turn, castling_rights, en_passant)
+        obj.mailbox = Board.build_mailbox(obj)
         return obj
     
-    def __init__(self, data = None | FenString | list[Bitboards, Turn, CastlingRights]) -> None:
+    def __init__(self, data = None | FenString | list[Bitboards, Turn, CastlingRights], backend: str = "numpy") -> None:
         self.update_bitboard_info()
     
     def __repr__(self) -> str:
@@ -85,7 +126,7 @@ class Board(np.ndarray):
         return self.__repr__()
 
     @staticmethod
-    def load_from_fen(fen: str) -> list[list[np.uint64], bool, int]:
+    def load_from_fen(fen: str) -> list[list[np.uint64], bool, int, int | None]:
         """ Converts a FEN string into a list of bitboards
 
         Args:
@@ -95,6 +136,9 @@ class Board(np.ndarray):
             bitboard: A list of 12 bitboards
             turn: The current turn
             castling_rights: The current castling rights
+            en_passant: The en passant target square (None if there is none)
+            halfmove: The halfmove clock (0 if the field is missing)
+            fullmove: The fullmove number (1 if the field is missing)
         """
         
         # initilize an empty board
@@ -104,7 +148,12 @@ class Board(np.ndarray):
         fen_data = fen.split(' ')
         fen_board = fen.split(' ')[0]
         turn = True if fen_data[1] == "w" else False
-        castling_rights = int("".join(["1" if char != "-" else "0" for char in fen_data[2]]), 2)
+        castling_rights = sum(Castling.ENCODE.get(char, 0) for char in fen_data[2])
+        en_passant = None
+        if len(fen_data) > 3 and fen_data[3] != "-":
+            en_passant = "abcdefgh".index(fen_data[3][0]) + 8 * (int(fen_data[3][1]) - 1)
+        halfmove = int(fen_data[4]) if len(fen_data) > 4 else 0
+        fullmove = int(fen_data[5]) if len(fen_data) > 5 else 1
         
         column = 0
         row = 7
@@ -120,7 +169,25 @@ class Board(np.ndarray):
                 bitboards[piece_index] |= 1 << square_index
                 column += 1
         
-        return bitboards, turn, castling_rights
+        return bitboards, turn, castling_rights, en_passant, halfmove, fullmove
+
+    @staticmethod
+    def build_mailbox(bitboards: list[int]) -> bytearray:
+        """ Builds the square to piece table of a set of bitboards
+
+        Args:
+            bitboards (list[int]): The 16 bitboards (any backend)
+
+        Returns:
+            bytearray: The piece encoding on every square, NO_PIECE for empty squares
+        """
+        mailbox = bytearray([NO_PIECE]) * 64
+        for piece in Pieces.DECODE:
+            bitboard = int(bitboards[piece])
+            while bitboard:
+                mailbox[(bitboard & -bitboard).bit_length() - 1] = piece
+                bitboard &= bitboard - 1
+        return mailbox
 
     @staticmethod
     def display_bitboard(bitboard: np.uint64) -> None:
@@ -136,6 +203,7 @@ class Board(np.ndarray):
         print('----------------+')
         print('a b c d e f g h')
 
+    @Instrumentation.timed
     def update_bitboard_info(self) -> None:
         """ Updates bitboard info (all pieces data) """
         self[Pieces.ALL_WHITE] = \
@@ -157,10 +225,116 @@ class Board(np.ndarray):
         self[Pieces.OCCUPIED] = self[Pieces.ALL_WHITE] | self[Pieces.ALL_BLACK]
         self[Pieces.EMPTY] = ~self[Pieces.OCCUPIED]
 
+    def repetitions(self) -> int:
+        """ Returns how many times the current position occurred before in the history """
+        return self.key_counts.get(self.zobrist, 0)
+
+    def is_fifty_moves(self) -> bool:
+        """ Checks the 50 move rule (100 halfmoves without a capture or a pawn move) """
+        return self.halfmove >= 100
+
+    def is_threefold_repetition(self) -> bool:
+        """ Checks whether the current position occurred at least 3 times """
+        return self.key_counts.get(self.zobrist, 0) >= 2
+
+    @Instrumentation.timed
+    def deepcopy(self) -> Self:
+        """ Returns a copy of this board instance, including its history
+
+        Returns:
+            Self: A new copy of the board instance
+        """
+        copy = Board((self, self.turn, self.castling_rights, self.en_passant, self.halfmove, self.fullmove))
+        copy.history = self.history[:]
+        copy.key_counts = self.key_counts.copy()
+        return copy
+
+
+class IntBoard:
+    """
+    Args:
+        data (str, optional): Must be a fen string
+        data (list, optional): Same format as Board
+    
+    - Pure int alternative to Board, selected with Board(data, backend="int")
+    - The 16 bitboards are stored as Python ints in a flat list, CPython operates on those
+      several times faster than on numpy scalars
+    - Every bitboard is kept within 64 bits, bitwise NOT must be masked explicitly with MASK64
+    - The interface mirrors Board (indexing, tolist, update_bitboard_info, deepcopy, __repr__, mailbox)
+    """
+    __slots__ = ("bitboards", "turn", "castling_rights", "en_passant", "halfmove", "fullmove", "history", "key_counts", "zobrist", "mailbox")
+    
+    def __init__(self, data = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1") -> None:
+        if isinstance(data, str):
+            bitboards, self.turn, self.castling_rights, self.en_passant, self.halfmove, self.fullmove = self.load_from_fen(data)
+        elif isinstance(data, (list, tuple)) and 3 <= len(data) <= 6:
+            bitboards, self.turn, self.castling_rights, self.en_passant, self.halfmove, self.fullmove = (*data, *DEFAULT_STATE[len(data) - 3:])
+        else:
+            raise ValueError("Invalid data format")
+        self.history = []
+        self.key_counts = {}
+        
+        self.bitboards = [int(bitboard) & MASK64 for bitboard in bitboards]
+        self.en_passant = Zobrist.capturable(self.bitboards, self.turn, self.en_passant)
+        self.update_bitboard_info()
+        self.zobrist = Zobrist.hash(self.bitboards, self.turn, self.castling_rights, self.en_passant)
+        self.mailbox = Board.build_mailbox(self.bitboards)
+    
+    def __getitem__(self, index: int) -> int:
+        return self.bitboards[index]
+    
+    def __setitem__(self, index: int, value: int) -> None:
+        self.bitboards[index] = value
+    
+    def __len__(self) -> int:
+        return 16
+    
+    def __iter__(self):
+        return iter(self.bitboards)
+    
+    __repr__ = Board.__repr__
+    __str__ = Board.__str__
+    load_from_fen = staticmethod(Board.load_from_fen)
+    repetitions = Board.repetitions
+    is_fifty_moves = Board.is_fifty_moves
+    is_threefold_repetition = Board.is_threefold_repetition
+    display_bitboard = staticmethod(Board.display_bitboard)
+    
+    def tolist(self) -> list[int]:
+        """ Returns a copy of the bitboards as plain ints (mirrors np.ndarray.tolist) """
+        return self.bitboards[:]
+    
+    @Instrumentation.timed
+    def update_bitboard_info(self) -> None:
+        """ Updates bitboard info (all pieces data) """
+        bitboards = self.bitboards
+        bitboards[Pieces.ALL_WHITE] = \
+            bitboards[Pieces.WHITE | Pieces.KING] | \
+            bitboards[Pieces.WHITE | Pieces.QUEEN] | \
+            bitboards[Pieces.WHITE | Pieces.ROOK] | \
+            bitboards[Pieces.WHITE | Pieces.BISHOP] | \
+            bitboards[Pieces.WHITE | Pieces.KNIGHT] | \
+            bitboards[Pieces.WHITE | Pieces.PAWN]
+        
+        bitboards[Pieces.ALL_BLACK] = \
+            bitboards[Pieces.BLACK | Pieces.KING] | \
+            bitboards[Pieces.BLACK | Pieces.QUEEN] | \
+            bitboards[Pieces.BLACK | Pieces.ROOK] | \
+            bitboards[Pieces.BLACK | Pieces.BISHOP] | \
+            bitboards[Pieces.BLACK | Pieces.KNIGHT] | \
+            bitboards[Pieces.BLACK | Pieces.PAWN]
+        
+        bitboards[Pieces.OCCUPIED] = bitboards[Pieces.ALL_WHITE] | bitboards[Pieces.ALL_BLACK]
+        bitboards[Pieces.EMPTY] = MASK64 ^ bitboards[Pieces.OCCUPIED]
+    
+    @Instrumentation.timed
     def deepcopy(self) -> Self:
         """ Returns a copy of this board instance
 
         Returns:
             Self: A new copy of the board instance
         """
-        return Board((self, self.turn, self.castling_rights))
+        copy = IntBoard((self.bitboards, self.turn, self.castling_rights, self.en_passant, self.halfmove, self.fullmove))
+        copy.history = self.history[:]
+        copy.key_counts = self.key_counts.copy()
+        return copy
\ No newline at end of file
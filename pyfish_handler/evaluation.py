@@ -0,0 +1,117 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+
+# project
+from .instrumentation import Instrumentation
+from .pieces import Pieces
+from .board import Board
+
+# reference: https://www.chessprogramming.org/Simplified_Evaluation_Function
+PIECE_VALUES = {Pieces.KING: 0, Pieces.QUEEN: 900, Pieces.ROOK: 500, Pieces.BISHOP: 330, Pieces.KNIGHT: 320, Pieces.PAWN: 100}
+
+# the tables are written from white's point of view with rank 8 on top, as they appear on the board
+PIECE_SQUARE_TABLES = {
+    Pieces.PAWN: (
+          0,   0,   0,   0,   0,   0,   0,   0,
+         50,  50,  50,  50,  50,  50,  50,  50,
+         10,  10,  20,  30,  30,  20,  10,  10,
+          5,   5,  10,  25,  25,  10,   5,   5,
+          0,   0,   0,  20,  20,   0,   0,   0,
+          5,  -5, -10,   0,   0, -10,  -5,   5,
+          5,  10,  10, -20, -20,  10,  10,   5,
+          0,   0,   0,   0,   0,   0,   0,   0,
+    ),
+    Pieces.KNIGHT: (
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20,   0,   0,   0,   0, -20, -40,
+        -30,   0,  10,  15,  15,  10,   0, -30,
+        -30,   5,  15,  20,  20,  15,   5, -30,
+        -30,   0,  15,  20,  20,  15,   0, -30,
+        -30,   5,  10,  15,  15,  10,   5, -30,
+        -40, -20,   0,   5,   5,   0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50,
+    ),
+    Pieces.BISHOP: (
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,  10,  10,   5,   0, -10,
+        -10,   5,   5,  10,  10,   5,   5, -10,
+        -10,   0,  10,  10,  10,  10,   0, -10,
+        -10,  10,  10,  10,  10,  10,  10, -10,
+        -10,   5,   0,   0,   0,   0,   5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20,
+    ),
+    Pieces.ROOK: (
+          0,   0,   0,   0,   0,   0,   0,   0,
+          5,  10,  10,  10,  10,  10,  10,   5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+         -5,   0,   0,   0,   0,   0,   0,  -5,
+          0,   0,   0,   5,   5,   0,   0,   0,
+    ),
+    Pieces.QUEEN: (
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+        -10,   0,   0,   0,   0,   0,   0, -10,
+        -10,   0,   5,   5,   5,   5,   0, -10,
+         -5,   0,   5,   5,   5,   5,   0,  -5,
+          0,   0,   5,   5,   5,   5,   0,  -5,
+        -10,   5,   5,   5,   5,   5,   0, -10,
+        -10,   0,   5,   0,   0,   0,   0, -10,
+        -20, -10, -10,  -5,  -5, -10, -10, -20,
+    ),
+    Pieces.KING: (
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+         20,  20,   0,   0,   0,   0,  20,  20,
+         20,  30,  10,   0,   0,  10,  30,  20,
+    ),
+}
+
+def _square_scores(piece: int) -> list[int]:
+    """ Returns the material plus piece-square score of a piece encoding for every square (LSB = A1),
+    positive for white and negative for black """
+    piece_type, table = piece & 7, PIECE_SQUARE_TABLES[piece & 7]
+    if piece & Pieces.BLACK:
+        return [-(PIECE_VALUES[piece_type] + table[square]) for square in range(64)]
+    return [PIECE_VALUES[piece_type] + table[square ^ 56] for square in range(64)]
+
+# indexed by piece encoding then square, the aggregate bitboard slots are left empty
+SQUARE_SCORES: list[list[int]] = [_square_scores(index) if index in Pieces.DECODE else [] for index in range(16)]
+
+class Evaluation:
+    """ Static evaluation of a board state: material and piece-square tables
+    """
+    @staticmethod
+    @Instrumentation.timed
+    def evaluate(board: Board) -> int:
+        """ Evaluates a board state
+
+        Args:
+            board (Board): The board state (any backend)
+
+        Returns:
+            int: The score in centipawns from the point of view of the side to move
+        """
+        bitboards = board.tolist()
+        score = 0
+        for piece in Pieces.DECODE:
+            bitboard = bitboards[piece]
+            scores = SQUARE_SCORES[piece]
+            while bitboard:
+                score += scores[(bitboard & -bitboard).bit_length() - 1]
+                bitboard &= bitboard - 1
+        return score if board.turn else -score
\ No newline at end of file
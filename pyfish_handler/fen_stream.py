@@ -0,0 +1,312 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import re
+from itertools import islice
+from typing import Iterable, Iterator, NamedTuple, TextIO
+
+# third-party
+import numpy as np
+
+# project
+from .pieces import Pieces
+from .board import Board, Castling
+from .move import SQUARE_NAMES
+
+PIECES = tuple(Pieces.DECODE) # the 12 piece bitboard indices
+PIECE_CODES = np.array([ord(Pieces.DECODE[piece]) for piece in PIECES], dtype=np.uint8)
+
+# expands a FEN placement into 8 ranks of 8 characters (rank 8 first) separated by '/', empty squares become '.'
+EXPAND_PLACEMENT = str.maketrans({str(count): "." * count for count in range(1, 9)})
+EXPANDED_LENGTH = 64 + 7
+SEPARATORS = np.arange(8, EXPANDED_LENGTH, 9) # the '/' columns of an expanded placement
+SQUARE_COLUMNS = np.setdiff1d(np.arange(EXPANDED_LENGTH), SEPARATORS)
+VALID_SQUARE = np.zeros(256, dtype=bool) # the characters allowed on a square: a piece letter or '.'
+VALID_SQUARE[PIECE_CODES] = True
+VALID_SQUARE[ord(".")] = True
+# FEN string index -> square (LSB = A1)
+FEN_ORDER = np.arange(64) ^ 56
+EMPTY_RUN = re.compile(r"\.+")
+OPERATION = re.compile(r'\s*([A-Za-z][\w.]*)\s*((?:"[^"]*"|[^;])*);?')
+CLOCKS = re.compile(r"\s*(\d+)\s+(\d+)(?=\s|;|$)")
+
+class PositionBatch(NamedTuple):
+    """ A chunk of parsed positions, one row per position """
+    bitboards: np.ndarray       # (n, 16) uint64, the Board layout
+    turns: np.ndarray           # (n,) bool, True for white
+    castling_rights: np.ndarray # (n,) uint8
+    en_passant: np.ndarray      # (n,) int8, -1 if there is no en passant square
+    halfmove: np.ndarray        # (n,) uint16
+    fullmove: np.ndarray        # (n,) uint16
+    operations: list[dict[str, str]] # the EPD operations of every position (bm, id, D1, ...)
+
+class FenStream:
+    """ Streams FEN and EPD files into stacked bitboards and back
+    reference: https://www.chessprogramming.org/Extended_Position_Description
+
+    - Lines are read lazily in chunks, the piece placements of a whole chunk are parsed at once:
+        - every placement is expanded to 64 characters with str.translate
+        - the chunk becomes one (n, 64) uint8 array, compared against each piece letter and packed to bitboards
+    - Both FEN lines (6 fields) and EPD lines (4 fields followed by operations) are accepted,
+      operations such as bm, id or the perft counts D1, D2, ... are returned as strings
+    - The writer does the reverse: the bits are unpacked into characters and empty runs are collapsed
+    """
+    @staticmethod
+    def lines(source: str | Iterable[str]) -> Iterator[str]:
+        """ Yields the non-empty lines of a file path or of an iterable of lines """
+        if isinstance(source, str):
+            with open(source, encoding="utf-8") as file:
+                yield from (line for line in file if line.strip())
+        else:
+            yield from (line for line in source if line.strip())
+
+    @staticmethod
+    def parse_operations(text: str) -> dict[str, str]:
+        """ Parses EPD operations ("bm Nf3; id \\"WAC.001\\";" or ";D1 20 ;D2 400")
+
+        Args:
+            text (str): The text after the position fields
+
+        Returns:
+            dict[str, str]: The operand text of every opcode, without quotes
+        """
+        return {opcode: operand.strip().strip('"') for opcode, operand in OPERATION.findall(text)}
+
+    @staticmethod
+    def parse_placements(placements: list[str], out: np.ndarray) -> None:
+        """ Converts FEN piece placements into bitboards, vectorised over the whole list
+
+        Args:
+            placements (list[str]): The piece placement fields
+            out (np.ndarray): An (n, 16) uint64 array to fill, the aggregate bitboards are computed too
+
+        Raises:
+            ValueError: If a placement does not have 8 ranks of 8 squares or holds an unknown character
+        """
+        expanded = [placement.translate(EXPAND_PLACEMENT) for placement in placements]
+        for placement, ranks in zip(placements, expanded):
+            if len(ranks) != EXPANDED_LENGTH or "." in placement:
+                raise ValueError(f"Invalid piece placement in FEN data: {placement}")
+        characters = np.frombuffer("".join(expanded).encode("ascii", "replace"), dtype=np.uint8).reshape(-1, EXPANDED_LENGTH)
+        invalid = ~np.all(characters[:, SEPARATORS] == ord("/"), axis=1) | ~np.all(VALID_SQUARE[characters[:, SQUARE_COLUMNS]], axis=1)
+        if invalid.any():
+            raise ValueError(f"Invalid piece placement in FEN data: {placements[int(np.argmax(invalid))]}")
+        squares = characters[:, SQUARE_COLUMNS][:, FEN_ORDER]
+        matches = squares[:, None, :] == PIECE_CODES[None, :, None] # (n, 12, 64)
+        packed = np.packbits(matches, axis=-1, bitorder="little") # (n, 12, 8) little-endian bytes
+        out[:, PIECES] = np.ascontiguousarray(packed).view("<u8")[..., 0]
+        out[:, Pieces.ALL_WHITE] = np.bitwise_or.reduce(out[:, PIECES[:6]], axis=1)
+        out[:, Pieces.ALL_BLACK] = np.bitwise_or.reduce(out[:, PIECES[6:]], axis=1)
+        out[:, Pieces.OCCUPIED] = out[:, Pieces.ALL_WHITE] | out[:, Pieces.ALL_BLACK]
+        out[:, Pieces.EMPTY] = ~out[:, Pieces.OCCUPIED]
+
+    @staticmethod
+    def validate(fen: str) -> None:
+        """ Checks a FEN string before it is given to Board, which trusts its input
+
+        Args:
+            fen (str): The FEN string
+
+        Raises:
+            ValueError: If a field is malformed or either side does not have exactly one king
+        """
+        fields = fen.split()
+        if not 4 <= len(fields) <= 6:
+            raise ValueError(f"expected 4 to 6 fields, got {len(fields)}")
+        bitboards = np.zeros((1, 16), dtype=np.uint64)
+        FenStream.parse_placements(fields[:1], bitboards)
+        for king in (Pieces.WHITE | Pieces.KING, Pieces.BLACK | Pieces.KING):
+            if int(bitboards[0, king]).bit_count() != 1:
+                raise ValueError(f"expected exactly one {Pieces.DECODE[king]}")
+        if fields[1] not in ("w", "b"):
+            raise ValueError(f"invalid side to move {fields[1]}")
+        if fields[2] != "-" and (not fields[2] or any(char not in Castling.ENCODE for char in fields[2])):
+            raise ValueError(f"invalid castling rights {fields[2]}")
+        if fields[3] != "-" and fields[3] not in SQUARE_NAMES:
+            raise ValueError(f"invalid en passant square {fields[3]}")
+        if not all(field.isdigit() for field in fields[4:]):
+            raise ValueError(f"invalid move counters {' '.join(fields[4:])}")
+
+    @staticmethod
+    def parse_batch(lines: list[str]) -> PositionBatch:
+        """ Parses a chunk of FEN or EPD lines
+
+        Args:
+            lines (list[str]): The lines to parse
+
+        Returns:
+            PositionBatch: The parsed positions
+        """
+        count = len(lines)
+        batch = PositionBatch(
+            np.zeros((count, 16), dtype=np.uint64), np.zeros(count, dtype=bool), np.zeros(count, dtype=np.uint8),
+            np.full(count, -1, dtype=np.int8), np.zeros(count, dtype=np.uint16), np.ones(count, dtype=np.uint16), []
+        )
+        placements = []
+        for row, line in enumerate(lines):
+            fields = line.split(None, 4)
+            if len(fields) < 4:
+                raise ValueError(f"Invalid FEN/EPD line: {line.strip()}")
+            placements.append(fields[0])
+            batch.turns[row] = fields[1] == "w"
+            batch.castling_rights[row] = sum(Castling.ENCODE.get(char, 0) for char in fields[2])
+            if fields[3] != "-":
+                batch.en_passant[row] = SQUARE_NAMES.index(fields[3])
+
+            rest = fields[4] if len(fields) > 4 else ""
+            clocks = CLOCKS.match(rest)
+            if clocks:
+                batch.halfmove[row], batch.fullmove[row] = int(clocks.group(1)), int(clocks.group(2))
+                rest = rest[clocks.end():]
+            operations = FenStream.parse_operations(rest)
+            if "hmvc" in operations:
+                batch.halfmove[row] = int(operations["hmvc"])
+            if "fmvn" in operations:
+                batch.fullmove[row] = int(operations["fmvn"])
+            batch.operations.append(operations)
+        FenStream.parse_placements(placements, batch.bitboards)
+        return batch
+
+    @staticmethod
+    def read_batches(source: str | Iterable[str], chunk_size: int = 1 << 16) -> Iterator[PositionBatch]:
+        """ Lazily parses a FEN/EPD file chunk by chunk
+
+        Args:
+            source (str | Iterable[str]): A file path or an iterable of lines
+            chunk_size (int, optional): The number of positions per batch
+
+        Yields:
+            PositionBatch: The parsed positions of every chunk
+        """
+        lines = FenStream.lines(source)
+        while chunk := list(islice(lines, chunk_size)):
+            yield FenStream.parse_batch(chunk)
+
+    @staticmethod
+    def read_boards(source: str | Iterable[str], backend: str = "numpy", chunk_size: int = 4096) -> Iterator[tuple[Board, dict[str, str]]]:
+        """ Lazily yields one board per line
+
+        Args:
+            source (str | Iterable[str]): A file path or an iterable of lines
+            backend (str, optional): The board backend
+            chunk_size (int, optional): The number of lines parsed at once
+
+        Yields:
+            tuple[Board, dict[str, str]]: The board and its EPD operations
+        """
+        for batch in FenStream.read_batches(source, chunk_size):
+            for row in range(len(batch.turns)):
+                en_passant = int(batch.en_passant[row])
+                board = Board((batch.bitboards[row], bool(batch.turns[row]), int(batch.castling_rights[row]),
+                               None if en_passant < 0 else en_passant, int(batch.halfmove[row]), int(batch.fullmove[row])), backend=backend)
+                yield board, batch.operations[row]
+
+    @staticmethod
+    def fill(source: str | Iterable[str], bitboards: np.ndarray, turns: np.ndarray = None, chunk_size: int = 1 << 16) -> int:
+        """ Parses a FEN/EPD file into preallocated arrays, stops when they are full
+
+        Args:
+            source (str | Iterable[str]): A file path or an iterable of lines
+            bitboards (np.ndarray): An (N, 16) uint64 array to fill
+            turns (np.ndarray, optional): An (N,) bool array to fill with the side to move
+            chunk_size (int, optional): The number of lines parsed at once
+
+        Returns:
+            int: The number of positions written
+        """
+        lines = FenStream.lines(source)
+        count = 0
+        while count < len(bitboards):
+            chunk = list(islice(lines, min(chunk_size, len(bitboards) - count)))
+            if not chunk:
+                break
+            batch = FenStream.parse_batch(chunk)
+            bitboards[count:count + len(chunk)] = batch.bitboards
+            if turns is not None:
+                turns[count:count + len(chunk)] = batch.turns
+            count += len(chunk)
+        return count
+
+    @staticmethod
+    def placements(bitboards: np.ndarray) -> list[str]:
+        """ Converts bitboards into FEN piece placements, vectorised over all rows
+
+        Args:
+            bitboards (np.ndarray): An (n, 16) uint64 array
+
+        Returns:
+            list[str]: The piece placement fields
+        """
+        count = len(bitboards)
+        pieces = np.ascontiguousarray(bitboards[:, PIECES], dtype="<u8")
+        bits = np.unpackbits(pieces.view(np.uint8).reshape(count, len(PIECES), 8), axis=-1, bitorder="little").astype(bool)
+        squares = np.full((count, 64), ord("."), dtype=np.uint8)
+        for index, code in enumerate(PIECE_CODES):
+            squares[bits[:, index]] = code
+
+        # rank 8 first, with a '/' after every rank and a newline after every position
+        text = np.full((count, 8, 9), ord("/"), dtype=np.uint8)
+        text[:, :, :8] = squares[:, FEN_ORDER].reshape(count, 8, 8)
+        text[:, 7, 8] = ord("\n")
+        collapsed = EMPTY_RUN.sub(lambda run: str(len(run.group())), text.tobytes().decode("ascii"))
+        return collapsed.split("\n")[:count]
+
+    @staticmethod
+    def batch_to_fens(batch: PositionBatch) -> list[str]:
+        """ Serialises a batch into FEN strings (the operations are not written) """
+        fens = []
+        for row, placement in enumerate(FenStream.placements(batch.bitboards)):
+            en_passant = int(batch.en_passant[row])
+            fens.append(FenStream.format_fen(placement, bool(batch.turns[row]), int(batch.castling_rights[row]),
+                                             None if en_passant < 0 else en_passant, int(batch.halfmove[row]), int(batch.fullmove[row])))
+        return fens
+
+    @staticmethod
+    def format_fen(placement: str, turn: bool, castling_rights: int, en_passant: int | None, halfmove: int = 0, fullmove: int = 1) -> str:
+        """ Joins the FEN fields of a position """
+        castling = "".join(char for char, right in Castling.ENCODE.items() if castling_rights & right) or "-"
+        return f"{placement} {'w' if turn else 'b'} {castling} {'-' if en_passant is None else SQUARE_NAMES[en_passant]} {halfmove} {fullmove}"
+
+    @staticmethod
+    def to_fen(board: Board) -> str:
+        """ Serialises a board (any backend) into a FEN string
+
+        Args:
+            board (Board): The board state
+
+        Returns:
+            str: The FEN string
+        """
+        placement = FenStream.placements(np.array([board.tolist()], dtype=np.uint64))[0]
+        return FenStream.format_fen(placement, board.turn, board.castling_rights, board.en_passant, board.halfmove, board.fullmove)
+
+    @staticmethod
+    def write(destination: str | TextIO, positions: Iterable[Board | PositionBatch]) -> int:
+        """ Writes boards and batches as FEN lines
+
+        Args:
+            destination (str | TextIO): A file path or an open text file
+            positions (Iterable[Board | PositionBatch]): The positions to write
+
+        Returns:
+            int: The number of lines written
+        """
+        if isinstance(destination, str):
+            with open(destination, "w", encoding="utf-8") as file:
+                return FenStream.write(file, positions)
+        count = 0
+        for item in positions:
+            fens = FenStream.batch_to_fens(item) if isinstance(item, PositionBatch) else [FenStream.to_fen(item)]
+            destination.write("".join(fen + "\n" for fen in fens))
+            count += len(fens)
+        return count
\ No newline at end of file
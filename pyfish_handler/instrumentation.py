@@ -0,0 +1,143 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import atexit
+import functools
+import marshal
+import os
+import sys
+import threading
+import time
+from typing import Callable
+
+# PYFISH_INSTRUMENT=1 enables the counters, PYFISH_INSTRUMENT_DUMP=<path> also writes a pstats file and prints
+# the summary to stderr when the process exits; both are read once at import
+ENABLED = os.environ.get("PYFISH_INSTRUMENT", "") not in ("", "0") or bool(os.environ.get("PYFISH_INSTRUMENT_DUMP"))
+DUMP_PATH = os.environ.get("PYFISH_INSTRUMENT_DUMP")
+
+# name -> [calls, outermost calls, self nanoseconds, cumulative nanoseconds, active calls, (file, line, function)]
+_records: dict[str, list] = {}
+# name -> count, for events that are not function calls
+_counters: dict[str, int] = {}
+_local = threading.local()
+
+class Instrumentation:
+    """ Optional call counters and timers for the hot paths, off unless PYFISH_INSTRUMENT is set
+
+    - Instrumentation.timed decorates a function. When disabled it returns the function itself, so the
+      instrumented code runs exactly as if it were not decorated
+    - When enabled every call records its count, its self time (without the instrumented functions it calls) and,
+      for the outermost call of a recursion, its cumulative time
+        - timed(hits=True) also counts the calls returning something other than None (table probes)
+    - Instrumentation.count adds to named event counters (e.g. the nodes of a search)
+    - summary() formats everything as a table, dump() writes a file that pstats.Stats loads
+      (the caller lists are left empty)
+    """
+    @staticmethod
+    def timed(function: Callable = None, *, name: str = None, hits: bool = False) -> Callable:
+        """ Decorator counting and timing the calls of a function, used bare or with arguments
+
+        Args:
+            function (Callable, optional): The function, when used as a bare decorator
+            name (str, optional): The record name, the qualified function name by default
+            hits (bool, optional): Also counts the results that are not None under "<name> hits"
+
+        Returns:
+            Callable: The function itself when disabled, a timing wrapper otherwise
+        """
+        if function is None:
+            return lambda decorated: Instrumentation.timed(decorated, name=name, hits=hits)
+        if not ENABLED:
+            return function
+
+        record_name = name or function.__qualname__
+        code = function.__code__
+        record = _records.setdefault(record_name, [0, 0, 0, 0, 0, (code.co_filename, code.co_firstlineno, record_name)])
+        hits_name = f"{record_name} hits"
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            stack = getattr(_local, "stack", None)
+            if stack is None:
+                stack = _local.stack = []
+            stack.append(0)
+            record[4] += 1
+            start = clock()
+            try:
+                result = function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                children = stack.pop()
+                record[4] -= 1
+                record[0] += 1
+                record[2] += elapsed - children
+                if not record[4]:
+                    record[1] += 1
+                    record[3] += elapsed
+                if stack:
+                    stack[-1] += elapsed
+            if hits and result is not None:
+                _counters[hits_name] = _counters.get(hits_name, 0) + 1
+            return result
+        return wrapper
+
+    @staticmethod
+    def count(name: str, amount: int = 1) -> None:
+        """ Adds to a named event counter, does nothing when disabled """
+        if ENABLED:
+            _counters[name] = _counters.get(name, 0) + amount
+
+    @staticmethod
+    def reset() -> None:
+        """ Zeroes every record and counter """
+        for record in _records.values():
+            record[:5] = [0, 0, 0, 0, 0]
+        _counters.clear()
+
+    @staticmethod
+    def records() -> dict[str, tuple[int, float, float]]:
+        """ Returns the (calls, self seconds, cumulative seconds) of every function that was called """
+        return {name: (record[0], record[2] / 1e9, record[3] / 1e9) for name, record in _records.items() if record[0]}
+
+    @staticmethod
+    def counters() -> dict[str, int]:
+        """ Returns the event counters, including the hit counts """
+        return dict(_counters)
+
+    @staticmethod
+    def summary() -> str:
+        """ Formats the records (sorted by self time) and the counters as a table """
+        lines = [f"{'function':<40} | {'calls':>10} | {'self':>9} | {'cumulative':>10} | {'per call':>9}"]
+        for name, (calls, self_time, cumulative) in sorted(Instrumentation.records().items(), key=lambda item: -item[1][1]):
+            lines.append(f"{name:<40} | {calls:>10} | {self_time:>8.3f}s | {cumulative:>9.3f}s | {self_time / calls * 1e6:>7.2f}us")
+        for name, value in sorted(_counters.items()):
+            lines.append(f"{name:<40} | {value:>10}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def dump(path: str) -> None:
+        """ Writes the records in the pstats format, load them with pstats.Stats(path) """
+        stats = {
+            record[5]: (record[1], record[0], record[2] / 1e9, record[3] / 1e9, {})
+            for record in _records.values() if record[0]
+        }
+        with open(path, "wb") as file:
+            marshal.dump(stats, file)
+
+def _dump_at_exit() -> None:
+    Instrumentation.dump(DUMP_PATH)
+    print(Instrumentation.summary(), file=sys.stderr)
+
+if DUMP_PATH:
+    atexit.register(_dump_at_exit)
\ No newline at end of file
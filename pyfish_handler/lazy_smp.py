@@ -0,0 +1,159 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import multiprocessing
+import queue
+import time
+from typing import Callable
+
+# project
+from .board import Board
+from .move import Move
+from .parallel_perft import ParallelPerft, PackedBoard
+from .search import Search, MAX_PLY
+from .nnue import NNUE
+from .tablebase import Tablebases
+from .transposition_table import TranspositionTable
+
+RESULT_POLL = 0.1 # seconds between the liveness checks while waiting for the helpers
+HELPER_TIMEOUT = 5.0 # seconds a stopped helper may take to report before its nodes are given up on
+
+class LazySMP:
+    """ Parallel search: helper processes search the same position and share one transposition table
+    reference: https://www.chessprogramming.org/Lazy_SMP
+
+    - The table lives in multiprocessing.shared_memory, the helpers attach to it by name and
+      rely on the table's XOR key check instead of locks
+    - The main search runs in the calling process and decides the move, the helpers only fill the table
+        - helper i starts iterative deepening at depth 1 + i % 2 so that they do not all walk the
+          same tree in lockstep
+    - The helpers are started once and wait for positions, a multiprocessing Event stops them when the
+      main search returns
+    - Boards are sent as raw bitboard buffers (see ParallelPerft.pack)
+    - Waiting for the helpers never blocks forever: a helper that died is dropped and counts 0 nodes,
+      one that does not report within HELPER_TIMEOUT of the stop is skipped, results are tagged with
+      the search number so a late one is ignored by the next search
+    - The interface mirrors Search (search, stop), so the UCI front-end can use either
+    - With tablebases, every helper maps the same table files, the operating system shares their pages
+    - With a network, every helper loads the same weights file
+    """
+    def __init__(self, table: TranspositionTable, threads: int, tablebases: Tablebases = None, network: NNUE = None) -> None:
+        if not table.shared:
+            raise ValueError("Lazy SMP needs a shared transposition table (TranspositionTable(size_mb, shared=True))")
+        self.table = table
+        context = multiprocessing.get_context("spawn") # forking the threaded UCI process is unsafe
+        self.stop_event = context.Event()
+        self.search_main = Search(table, tablebases=tablebases, network=network)
+        self.results = context.Queue()
+        self.tasks = [context.Queue() for _ in range(threads - 1)]
+        self.helpers = [
+            context.Process(target=LazySMP.helper, args=(index, table.memory.name, tasks, self.results, self.stop_event,
+                                                                 tablebases.directory if tablebases is not None else None,
+                                                                 network.path if network is not None else None), daemon=True)
+            for index, tasks in enumerate(self.tasks, start=1)
+        ]
+        self.numbers = list(range(1, threads)) # the index every helper was started with
+        for helper in self.helpers:
+            helper.start()
+        self.helper_nodes = 0
+        self.search_number = 0
+
+    @staticmethod
+    def helper(index: int, table_name: str, tasks: multiprocessing.Queue, results: multiprocessing.Queue, stop_event,
+               tablebase_directory: str = None, network_path: str = None) -> None:
+        """ The main loop of a helper process, searches every position it receives until it gets None
+
+        Args:
+            index (int): The helper number, starting at 1
+            table_name (str): The shared memory name of the transposition table
+            tasks (multiprocessing.Queue): Receives (search number, packed board, generation, max depth) tuples
+            results (multiprocessing.Queue): Receives (search number, helper number, node count) after every search
+            stop_event (multiprocessing.Event): Set when the main search is done
+            tablebase_directory (str, optional): The directory of the tablebase files
+            network_path (str, optional): The NNUE weights file
+        """
+        table = TranspositionTable.attach(table_name)
+        search = Search(table, stop_event, Tablebases(tablebase_directory) if tablebase_directory is not None else None,
+                        NNUE(network_path) if network_path is not None else None)
+        while (task := tasks.get()) is not None:
+            search_number, packed, generation, max_depth = task
+            table.generation = generation
+            search.search(ParallelPerft.unpack(packed), max_depth, start_depth=1 + index % 2, new_search=False)
+            results.put((search_number, index, search.nodes + search.qnodes))
+        table.close()
+
+    def search(self, board: Board, max_depth: int = MAX_PLY - 1, soft_time: float = None, hard_time: float = None,
+               max_nodes: int = None, info: Callable = None, clear_stop: bool = True) -> tuple[Move | None, int]:
+        """ Searches a position with the main search and every helper (same arguments as Search.search),
+        the node counts of the helpers are added to self.helper_nodes """
+        if clear_stop:
+            self.clear_stop()
+        self.table.new_search()
+        self.drop_dead_helpers()
+        self.search_number += 1
+        packed: PackedBoard = ParallelPerft.pack(board)
+        for tasks in self.tasks:
+            tasks.put((self.search_number, packed, self.table.generation, max_depth))
+        try:
+            return self.search_main.search(board, max_depth, soft_time, hard_time, max_nodes, info, new_search=False, clear_stop=False)
+        finally:
+            self.stop_event.set()
+            self.helper_nodes = self.collect()
+
+    def collect(self) -> int:
+        """ Waits for the node counts of the current search, never longer than HELPER_TIMEOUT
+
+        Returns:
+            int: The nodes of the helpers that reported, dead or late helpers count 0
+        """
+        pending = dict(zip(self.numbers, self.helpers))
+        nodes = 0
+        deadline = time.monotonic() + HELPER_TIMEOUT
+        while pending and time.monotonic() < deadline:
+            try:
+                search_number, index, helper_nodes = self.results.get(timeout=RESULT_POLL)
+            except queue.Empty:
+                pending = {index: helper for index, helper in pending.items() if helper.is_alive()}
+                continue
+            if search_number == self.search_number and pending.pop(index, None) is not None:
+                nodes += helper_nodes
+        return nodes
+
+    def drop_dead_helpers(self) -> None:
+        """ Forgets the helpers whose process exited, the others keep their numbers """
+        alive = [index for index, helper in enumerate(self.helpers) if helper.is_alive()]
+        if len(alive) < len(self.helpers):
+            self.numbers = [self.numbers[index] for index in alive]
+            self.helpers = [self.helpers[index] for index in alive]
+            self.tasks = [self.tasks[index] for index in alive]
+
+    def stop(self) -> None:
+        """ Asks a running search to return as soon as possible """
+        self.search_main.stop()
+        self.stop_event.set()
+
+    def clear_stop(self) -> None:
+        """ Forgets an earlier stop of the main search and the helpers """
+        self.search_main.clear_stop()
+        self.stop_event.clear()
+
+    def close(self) -> None:
+        """ Shuts the helper processes down """
+        self.stop_event.set()
+        for tasks in self.tasks:
+            tasks.put(None)
+        for helper in self.helpers:
+            helper.join(HELPER_TIMEOUT)
+            if helper.is_alive():
+                helper.terminate()
+        self.helpers, self.tasks, self.numbers = [], [], []
\ No newline at end of file
@@ -16,6 +16,8 @@ from typing import overload
 # third party
 import numpy as np
 
+SQUARE_NAMES = [file + rank for rank in "12345678" for file in "abcdefgh"]
+
 class Flags:
     """ Assigns names to the different encodings for move types """
     QUIET                  = 0b0000
@@ -33,12 +35,39 @@ class Flags:
     ROOK_PROMOTE_CAPTURE   = 0b1110
     QUEEN_PROMOTE_CAPTURE  = 0b1111
 
+# decode tables covering all 65536 codes, indexing bytes is cheaper than shifting and masking
+_codes = np.arange(1 << 16, dtype=np.uint16)
+MOVE_FLAGS = (_codes >> 12).astype(np.uint8).tobytes()
+MOVE_FROM = ((_codes >> 6) & 0x3f).astype(np.uint8).tobytes()
+MOVE_TO = (_codes & 0x3f).astype(np.uint8).tobytes()
+del _codes
+
+# helpers on plain int codes, the generator, move maker and search never build Move objects
+def move_flags(code: int) -> int:
+    return MOVE_FLAGS[code]
+
+def move_initial_square(code: int) -> int:
+    return MOVE_FROM[code]
+
+def move_target_square(code: int) -> int:
+    return MOVE_TO[code]
+
+def move_to_uci(code: int) -> str:
+    """ Returns an encoded move in UCI long algebraic notation (e.g. e2e4, e7e8q) """
+    uci = SQUARE_NAMES[(code >> 6) & 0x3f] + SQUARE_NAMES[code & 0x3f]
+    if code & 0x8000:
+        uci += "nbrq"[(code >> 12) & 3]
+    return uci
+
 class Move(np.uint16):
     """ Represents a chess move with a 16 bit unsigned integer
     - 4 bits for move type (information below)
     - 6 bits for the initial square
     - 6 bits for the target square
     reference: https://www.chessprogramming.org/Encoding_Moves
+    
+    - Move objects are only created at the API boundary (legal_moves, search results), the engine
+      internals pass the encoding around as plain ints, see the move_* helpers above
     """
     
     @overload
@@ -48,17 +77,21 @@ class Move(np.uint16):
         value = ((flags & 0xf)<<12) | ((initial_square & 0x3f)<<6) | (target_square & 0x3f)
         return np.uint16.__new__(cls, value)
     
+    @classmethod
+    def from_code(cls, code: int) -> "Move":
+        return cls(code >> 12, code >> 6, code)
+    
     @property
     def flags(self) -> int:
-        return (self >> 12) & 0xf
+        return MOVE_FLAGS[int(self)]
     
     @property
     def initial_square(self) -> int:
-        return (self >> 6) & 0x3f
+        return MOVE_FROM[int(self)]
     
     @property
     def target_square(self) -> int:
-        return self & 0x3f
+        return MOVE_TO[int(self)]
     
     @property
     def is_quiet(self) -> bool:
@@ -70,11 +103,11 @@ class Move(np.uint16):
     
     @property
     def is_short_castle(self) -> bool:
-        return self.flags == Flags.KING_CASTLE
+        return self.flags == Flags.SHORT_CASTLE
     
     @property
     def is_long_castle(self) -> bool:
-        return self.flags == Flags.QUEEN_CASTLE
+        return self.flags == Flags.LONG_CASTLE
     
     @property
     def is_capture(self) -> bool:
@@ -86,4 +119,8 @@ class Move(np.uint16):
     
     @property
     def is_promotion(self) -> bool:
-        return (self.flags >> 3) != 0
\ No newline at end of file
+        return (self.flags >> 3) != 0
+    
+    def to_uci(self) -> str:
+        """ Returns the move in UCI long algebraic notation (e.g. e2e4, e7e8q) """
+        return move_to_uci(int(self))
\ No newline at end of file
@@ -0,0 +1,76 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+from array import array
+
+# project
+from .board import Board
+from .move_generator import MoveGenerator, MAX_MOVES
+
+class MoveBuffer:
+    """ Preallocated move and score storage for every ply of a search
+
+    - Ply p owns the slots p * MAX_MOVES to (p + 1) * MAX_MOVES of two flat arrays:
+        - moves: array('H') of encoded moves (see Move)
+        - scores: array('q') of ordering scores
+    - Nothing is allocated per node, the generator writes the codes straight into the ply's slots
+    - pick() is an incremental selection sort: the best remaining move is swapped forward only when
+      it is needed, so a beta cutoff skips sorting the rest of the list
+    """
+    def __init__(self, plies: int) -> None:
+        self.moves = array('H', bytes(2 * MAX_MOVES * plies))
+        self.scores = array('q', bytes(8 * MAX_MOVES * plies))
+
+    def generate(self, board: Board, ply: int, captures_only: bool = False) -> int:
+        """ Generates the legal moves of a position into the slots of a ply
+
+        Args:
+            board (Board): The board state
+            ply (int): The ply whose slots are written
+            captures_only (bool, optional): Keeps only captures (including en passant and promotion-captures)
+
+        Returns:
+            int: The number of moves
+        """
+        start = ply * MAX_MOVES
+        moves = self.moves
+        count = MoveGenerator.legal_codes(board, board.tolist(), moves, start)
+        if captures_only:
+            end = start
+            for slot in range(start, start + count):
+                code = moves[slot]
+                if code & 0x4000:
+                    moves[end] = code
+                    end += 1
+            count = end - start
+        return count
+
+    def pick(self, ply: int, index: int, count: int) -> int:
+        """ Moves the best scored remaining move of a ply to position index and returns it
+
+        Args:
+            ply (int): The ply
+            index (int): The position to fill, every move before it was already picked
+            count (int): The number of moves of the ply
+
+        Returns:
+            int: The encoded move
+        """
+        start = ply * MAX_MOVES
+        moves, scores = self.moves, self.scores
+        current = start + index
+        best = max(range(current, start + count), key=scores.__getitem__)
+        if best != current:
+            moves[current], moves[best] = moves[best], moves[current]
+            scores[current], scores[best] = scores[best], scores[current]
+        return moves[current]
\ No newline at end of file
@@ -10,19 +10,46 @@
 # pylint: disable=import-error
 # pylint: disable=line-too-long
 
+# standard
+from array import array
+
 # project
-from bit_master import BitMaster
-from pieces import Pieces
-from board import Board
-from move import Move
+from .instrumentation import Instrumentation
+from .attack_tables import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, MASK64, BETWEEN, LINE, rook_attacks, bishop_attacks
+from .pieces import Pieces
+from .board import Board, Castling
+from .move import Move, Flags
+
+FILE_A = 0x0101010101010101
+FILE_H = 0x8080808080808080
+RANK_1 = 0x00000000000000ff
+RANK_3 = 0x0000000000ff0000
+RANK_6 = 0x0000ff0000000000
+RANK_8 = 0xff00000000000000
+
+PROMOTIONS = (Flags.QUEEN_PROMOTE, Flags.ROOK_PROMOTE, Flags.BISHOP_PROMOTE, Flags.KNIGHT_PROMOTE)
+PROMOTION_CAPTURES = (Flags.QUEEN_PROMOTE_CAPTURE, Flags.ROOK_PROMOTE_CAPTURE, Flags.BISHOP_PROMOTE_CAPTURE, Flags.KNIGHT_PROMOTE_CAPTURE)
+MAX_MOVES = 256 # no legal position has more than 218 moves, pseudo-legal ones stay below 256 as well
 
 class MoveGenerator:
     """ Handles all legal move generation for a given board state
+    - Leaper attacks come from 64 entry tables and slider attacks from magic bitboards (see attack_tables.py)
+    - The bitboards are read once per position as plain ints, numpy scalars are far slower to operate on
+    - Moves are generated as encoded ints and only wrapped into Move objects once they are known to be legal
+    - Legality comes from masks computed once per position instead of testing every move:
+        - the checkers of the king restrict the other pieces to capturing or blocking a single checker
+        - pinned pieces may only move along the line through the king and the pinning slider
+        - the king may only step to squares that stay unattacked once it has left its square
+        - en passant is the one move still tested individually, it removes two pieces from the rank
+    - legal_codes and pseudo_legal_codes write into the slots of a caller's array('H') from a start index and
+      return the number of moves, so the search and perft generate without allocating; legal_code_list
+      returns a new list for the callers outside the hot paths
+    reference: https://www.chessprogramming.org/Checks_and_Pinned_Pieces_(Bitboards)
     """
     @staticmethod
-    def legal_pawn_moves(board: Board) -> list[Move]:
-        """ Generates the legal pawn moves for a given board state
-        reference: https://www.chessprogramming.org/Pawn_Pattern_and_Properties
+    @Instrumentation.timed
+    def legal_moves(board: Board) -> list[Move]:
+        """ Generates the legal moves for a given board state
 
         Args:
             board (Board): The board state
@@ -30,19 +57,392 @@ class MoveGenerator:
         Returns:
             list[Move]: A list of the legal moves
         """
-        # initialize color
+        return [Move(code >> 12, code >> 6, code) for code in MoveGenerator.legal_code_list(board, board.tolist())]
+
+    @staticmethod
+    def legal_code_list(board: Board, bitboards: list[int]) -> list[int]:
+        """ Generates the encoded legal moves into a new list
+
+        Args:
+            board (Board): The board state
+            bitboards (list[int]): The bitboards of the board state as plain ints
+
+        Returns:
+            list[int]: The encoded moves (see Move)
+        """
+        moves = array('H', bytes(2 * MAX_MOVES))
+        return moves[:MoveGenerator.legal_codes(board, bitboards, moves)].tolist()
+
+    @staticmethod
+    @Instrumentation.timed
+    def legal_codes(board: Board, bitboards: list[int], moves: array, start: int = 0) -> int:
+        """ Generates the encoded legal moves from the check and pin masks
+
+        Args:
+            board (Board): The board state
+            bitboards (list[int]): The bitboards of the board state as plain ints
+            moves (array): The array('H') written to, MAX_MOVES slots from start must be available
+            start (int, optional): The first slot written
+
+        Returns:
+            int: The number of moves written (see Move for the encoding)
+        """
+        end = start
+        turn = board.turn
+        color, enemy_color = (Pieces.WHITE, Pieces.BLACK) if turn else (Pieces.BLACK, Pieces.WHITE)
+        own = bitboards[Pieces.ALL_WHITE if turn else Pieces.ALL_BLACK]
+        enemy = bitboards[Pieces.ALL_BLACK if turn else Pieces.ALL_WHITE]
+        occupied = own | enemy
+        empty = MASK64 ^ occupied
+        king = bitboards[color | Pieces.KING]
+        king_square = king.bit_length() - 1
+
+        # king steps, tested without the king on the board so that it cannot hide behind itself
+        targets = KING_ATTACKS[king_square] & ~own
+        without_king = occupied ^ king
+        while targets:
+            target = targets & -targets
+            targets ^= target
+            target_square = target.bit_length() - 1
+            if not MoveGenerator.is_square_attacked(bitboards, target_square, enemy_color, without_king, target):
+                moves[end] = ((Flags.CAPTURE if target & enemy else Flags.QUIET) << 12) | (king_square << 6) | target_square
+                end += 1
+
+        enemy_queens = bitboards[enemy_color | Pieces.QUEEN]
+        enemy_rooks = bitboards[enemy_color | Pieces.ROOK] | enemy_queens
+        enemy_bishops = bitboards[enemy_color | Pieces.BISHOP] | enemy_queens
+        checkers = (KNIGHT_ATTACKS[king_square] & bitboards[enemy_color | Pieces.KNIGHT]) \
+            | (PAWN_ATTACKS[0 if turn else 1][king_square] & bitboards[enemy_color | Pieces.PAWN]) \
+            | (rook_attacks(king_square, occupied) & enemy_rooks) \
+            | (bishop_attacks(king_square, occupied) & enemy_bishops)
+        if checkers & (checkers - 1):
+            return end - start # double check, only the king can move
+        if checkers:
+            check_mask = checkers | BETWEEN[king_square][checkers.bit_length() - 1]
+        else:
+            check_mask = MASK64
+
+        # a piece is pinned if it is the only piece between the king and an enemy slider on the same line
+        pinned = 0
+        snipers = (rook_attacks(king_square, 0) & enemy_rooks) | (bishop_attacks(king_square, 0) & enemy_bishops)
+        while snipers:
+            sniper_square = (snipers & -snipers).bit_length() - 1
+            snipers &= snipers - 1
+            blockers = BETWEEN[king_square][sniper_square] & occupied
+            if blockers and not blockers & (blockers - 1) and blockers & own:
+                pinned |= blockers
+
+        line = LINE[king_square]
+        pawns = bitboards[color | Pieces.PAWN]
+        end = MoveGenerator.pawn_codes(pawns & ~pinned, turn, enemy, empty, None, moves, end, check_mask)
+        pinned_pawns = pawns & pinned
+        while pinned_pawns:
+            pawn = pinned_pawns & -pinned_pawns
+            pinned_pawns ^= pawn
+            end = MoveGenerator.pawn_codes(pawn, turn, enemy, empty, None, moves, end, check_mask & line[pawn.bit_length() - 1])
+        if board.en_passant is not None:
+            # generated after the other pawn moves, the illegal ones are dropped by compacting the slots
+            first = end
+            end = MoveGenerator.pawn_codes(pawns, turn, 0, 0, board.en_passant, moves, end)
+            for slot in range(first, end):
+                code = moves[slot]
+                if MoveGenerator.is_legal_code(bitboards, turn, king_square, code):
+                    moves[first] = code
+                    first += 1
+            end = first
+
+        for piece, attack_function in (
+            (Pieces.KNIGHT, lambda square: KNIGHT_ATTACKS[square]),
+            (Pieces.BISHOP, lambda square: bishop_attacks(square, occupied)),
+            (Pieces.ROOK, lambda square: rook_attacks(square, occupied)),
+            (Pieces.QUEEN, lambda square: rook_attacks(square, occupied) | bishop_attacks(square, occupied))
+        ):
+            pieces = bitboards[color | piece]
+            if piece == Pieces.KNIGHT:
+                pieces &= ~pinned # a pinned knight can never stay on its line
+            while pieces:
+                initial = pieces & -pieces
+                pieces ^= initial
+                initial_square = initial.bit_length() - 1
+                attacks = attack_function(initial_square) & check_mask
+                if initial & pinned:
+                    attacks &= line[initial_square]
+                end = MoveGenerator.serialize(initial_square, attacks & enemy, Flags.CAPTURE, moves, end)
+                end = MoveGenerator.serialize(initial_square, attacks & empty, Flags.QUIET, moves, end)
+
+        if not checkers:
+            end = MoveGenerator.castling_codes(bitboards, turn, board.castling_rights, occupied, moves, end)
+        return end - start
+
+    @staticmethod
+    def pseudo_legal_moves(board: Board) -> list[Move]:
+        """ Generates the pseudo-legal moves (moves that may leave the king in check)
+
+        Args:
+            board (Board): The board state
+
+        Returns:
+            list[Move]: A list of the pseudo-legal moves
+        """
+        moves = array('H', bytes(2 * MAX_MOVES))
+        count = MoveGenerator.pseudo_legal_codes(board, board.tolist(), moves)
+        return [Move(code >> 12, code >> 6, code) for code in moves[:count]]
+
+    @staticmethod
+    @Instrumentation.timed
+    def pseudo_legal_codes(board: Board, bitboards: list[int], moves: array, start: int = 0) -> int:
+        """ Generates the encoded pseudo-legal moves of every piece type
+
+        Args:
+            board (Board): The board state
+            bitboards (list[int]): The bitboards of the board state as plain ints
+            moves (array): The array('H') written to, MAX_MOVES slots from start must be available
+            start (int, optional): The first slot written
+
+        Returns:
+            int: The number of moves written (see Move for the encoding)
+        """
+        end = start
         color = Pieces.WHITE if board.turn else Pieces.BLACK
-        pawns = board[color | Pieces.PAWN]
-        second_rank = 0xff00 if board.turn else 0x00ff000000000000
+        own = bitboards[Pieces.ALL_WHITE if board.turn else Pieces.ALL_BLACK]
+        enemy = bitboards[Pieces.ALL_BLACK if board.turn else Pieces.ALL_WHITE]
+        occupied = own | enemy
+        empty = MASK64 ^ occupied
+
+        end = MoveGenerator.pawn_codes(bitboards[color | Pieces.PAWN], board.turn, enemy, empty, board.en_passant, moves, end)
+
+        for piece, attack_function in (
+            (Pieces.KNIGHT, lambda square: KNIGHT_ATTACKS[square]),
+            (Pieces.BISHOP, lambda square: bishop_attacks(square, occupied)),
+            (Pieces.ROOK, lambda square: rook_attacks(square, occupied)),
+            (Pieces.QUEEN, lambda square: rook_attacks(square, occupied) | bishop_attacks(square, occupied)),
+            (Pieces.KING, lambda square: KING_ATTACKS[square])
+        ):
+            pieces = bitboards[color | piece]
+            while pieces:
+                initial_square = (pieces & -pieces).bit_length() - 1
+                pieces &= pieces - 1
+                attacks = attack_function(initial_square)
+                end = MoveGenerator.serialize(initial_square, attacks & enemy, Flags.CAPTURE, moves, end)
+                end = MoveGenerator.serialize(initial_square, attacks & empty, Flags.QUIET, moves, end)
+
+        end = MoveGenerator.castling_codes(bitboards, board.turn, board.castling_rights, occupied, moves, end)
+        return end - start
+
+    @staticmethod
+    def serialize(initial_square: int, targets: int, flags: int, moves: array, end: int) -> int:
+        """ Writes one encoded move per target bit
+
+        Args:
+            initial_square (int): The square the piece moves from
+            targets (int): The bitboard of target squares
+            flags (int): The move flags
+            moves (array): The array('H') written to
+            end (int): The first free slot
+
+        Returns:
+            int: The first free slot after the written moves
+        """
+        base = (flags << 12) | (initial_square << 6)
+        while targets:
+            moves[end] = base | ((targets & -targets).bit_length() - 1)
+            end += 1
+            targets &= targets - 1
+        return end
+
+    @staticmethod
+    @Instrumentation.timed
+    def pawn_codes(pawns: int, turn: bool, enemy: int, empty: int, en_passant: int | None, moves: array, end: int, targets: int = MASK64) -> int:
+        """ Generates the pseudo-legal pawn moves set-wise with shifts
+        reference: https://www.chessprogramming.org/Pawn_Pattern_and_Properties
+
+        Args:
+            pawns (int): The bitboard of the pawns to move
+            turn (bool): True for white, False for black
+            enemy (int): The bitboard of the enemy pieces
+            empty (int): The bitboard of the empty tiles
+            en_passant (int | None): The en passant target square
+            moves (array): The array('H') written to
+            end (int): The first free slot
+            targets (int, optional): Restricts the target squares of pushes and captures (check and pin masks),
+                                     en passant captures are not restricted
+
+        Returns:
+            int: The first free slot after the written moves
+        """
+        if turn:
+            single_push = (pawns << 8) & empty
+            double_push = ((single_push & RANK_3) << 8) & empty
+            captures = (((pawns & ~FILE_A) << 7) & enemy, ((pawns & ~FILE_H) << 9) & enemy)
+            forward, capture_offsets, last_rank = 8, (7, 9), RANK_8
+        else:
+            single_push = (pawns >> 8) & empty
+            double_push = ((single_push & RANK_6) >> 8) & empty
+            captures = (((pawns & ~FILE_H) >> 7) & enemy, ((pawns & ~FILE_A) >> 9) & enemy)
+            forward, capture_offsets, last_rank = -8, (-7, -9), RANK_1
+
+        single_push, double_push = single_push & targets, double_push & targets
+        captures = (captures[0] & targets, captures[1] & targets)
+        end = MoveGenerator.pawn_targets(single_push & ~last_rank, forward, Flags.QUIET, moves, end)
+        end = MoveGenerator.pawn_targets(double_push, 2 * forward, Flags.DOUBLE_PAWN_PUSH, moves, end)
+        if single_push & last_rank:
+            for promotion in PROMOTIONS:
+                end = MoveGenerator.pawn_targets(single_push & last_rank, forward, promotion, moves, end)
+        for targets, offset in zip(captures, capture_offsets):
+            end = MoveGenerator.pawn_targets(targets & ~last_rank, offset, Flags.CAPTURE, moves, end)
+            if targets & last_rank:
+                for promotion in PROMOTION_CAPTURES:
+                    end = MoveGenerator.pawn_targets(targets & last_rank, offset, promotion, moves, end)
+
+        if en_passant is not None:
+            # the pawns able to capture are the ones an enemy pawn on the target square would attack
+            attackers = PAWN_ATTACKS[1 if turn else 0][en_passant] & pawns
+            while attackers:
+                initial_square = (attackers & -attackers).bit_length() - 1
+                attackers &= attackers - 1
+                moves[end] = (Flags.EN_PASSANT << 12) | (initial_square << 6) | en_passant
+                end += 1
+        return end
+
+    @staticmethod
+    def pawn_targets(targets: int, offset: int, flags: int, moves: array, end: int) -> int:
+        """ Writes one encoded move per target bit for pawns shifted by a fixed offset
+
+        Args:
+            targets (int): The bitboard of target squares
+            offset (int): The distance between the initial and target squares
+            flags (int): The move flags
+            moves (array): The array('H') written to
+            end (int): The first free slot
+
+        Returns:
+            int: The first free slot after the written moves
+        """
+        while targets:
+            target_square = (targets & -targets).bit_length() - 1
+            targets &= targets - 1
+            moves[end] = (flags << 12) | ((target_square - offset) << 6) | target_square
+            end += 1
+        return end
+
+    @staticmethod
+    @Instrumentation.timed
+    def castling_codes(bitboards: list[int], turn: bool, castling_rights: int, occupied: int, moves: array, end: int) -> int:
+        """ Generates the castling moves, these are fully legal since every square the king crosses is checked
+
+        Args:
+            bitboards (list[int]): The bitboards as plain ints
+            turn (bool): True for white, False for black
+            castling_rights (int): The castling rights
+            occupied (int): The bitboard of all the pieces
+            moves (array): The array('H') written to
+            end (int): The first free slot
+
+        Returns:
+            int: The first free slot after the written moves
+        """
+        if turn:
+            short_right, long_right, color, row = Castling.WHITE_SHORT, Castling.WHITE_LONG, Pieces.WHITE, 0
+        else:
+            short_right, long_right, color, row = Castling.BLACK_SHORT, Castling.BLACK_LONG, Pieces.BLACK, 56
+        if not castling_rights & (short_right | long_right):
+            return end
+
+        enemy = Pieces.BLACK if turn else Pieces.WHITE
+        king_square = 4 + row
+        rooks = bitboards[color | Pieces.ROOK]
+        if MoveGenerator.is_square_attacked(bitboards, king_square, enemy, occupied):
+            return end
 
-        # single pawn push (shift the pawn bitboard upwards and mask it with the empty tiles)
-        single_push_targets = BitMaster.shift_vertical(pawns, 1, color) & board[Pieces.EMPTY]
-        
-        # double pawn push
-        double_push_targets = BitMaster.shift_vertical(pawns & second_rank, 2, color) & board[Pieces.EMPTY]
+        if castling_rights & short_right and rooks & (1 << (7 + row)) and not occupied & (0x60 << row) \
+                and not MoveGenerator.is_square_attacked(bitboards, 5 + row, enemy, occupied) \
+                and not MoveGenerator.is_square_attacked(bitboards, 6 + row, enemy, occupied):
+            moves[end] = (Flags.SHORT_CASTLE << 12) | (king_square << 6) | (6 + row)
+            end += 1
 
-        board.display_bitboard(single_push_targets | double_push_targets)
+        if castling_rights & long_right and rooks & (1 << row) and not occupied & (0x0e << row) \
+                and not MoveGenerator.is_square_attacked(bitboards, 3 + row, enemy, occupied) \
+                and not MoveGenerator.is_square_attacked(bitboards, 2 + row, enemy, occupied):
+            moves[end] = (Flags.LONG_CASTLE << 12) | (king_square << 6) | (2 + row)
+            end += 1
+        return end
+
+    @staticmethod
+    @Instrumentation.timed
+    def is_square_attacked(bitboards: list[int], square: int, attacker: int, occupied: int, removed: int = 0) -> bool:
+        """ Checks whether a square is attacked by a given color
+
+        Args:
+            bitboards (list[int]): The bitboards as plain ints
+            square (int): The square to check
+            attacker (int): The color of the attacking side (Pieces.WHITE or Pieces.BLACK)
+            occupied (int): The occupancy used for the sliding pieces
+            removed (int, optional): A bitboard of attacking pieces to ignore (captured pieces)
+
+        Returns:
+            bool: True if the square is attacked
+        """
+        keep = ~removed
+        if KNIGHT_ATTACKS[square] & bitboards[attacker | Pieces.KNIGHT] & keep:
+            return True
+        if PAWN_ATTACKS[0 if attacker else 1][square] & bitboards[attacker | Pieces.PAWN] & keep:
+            return True
+        if KING_ATTACKS[square] & bitboards[attacker | Pieces.KING]:
+            return True
+        queens = bitboards[attacker | Pieces.QUEEN]
+        if bishop_attacks(square, occupied) & (bitboards[attacker | Pieces.BISHOP] | queens) & keep:
+            return True
+        return bool(rook_attacks(square, occupied) & (bitboards[attacker | Pieces.ROOK] | queens) & keep)
+
+    @staticmethod
+    @Instrumentation.timed
+    def is_legal_code(bitboards: list[int], turn: bool, king_square: int, code: int) -> bool:
+        """ Checks that a pseudo-legal move does not leave the king in check, without copying the board
+
+        Args:
+            bitboards (list[int]): The bitboards as plain ints
+            turn (bool): True for white, False for black
+            king_square (int): The square of the king of the side to move
+            code (int): The encoded move
+
+        Returns:
+            bool: True if the move is legal
+        """
+        flags = code >> 12
+        if flags in (Flags.SHORT_CASTLE, Flags.LONG_CASTLE):
+            return True
+
+        initial_square = (code >> 6) & 0x3f
+        target_square = code & 0x3f
+        removed = 1 << target_square
+        occupied = (bitboards[Pieces.OCCUPIED] ^ (1 << initial_square)) | removed
+        if flags == Flags.EN_PASSANT:
+            removed = 1 << (target_square - 8 if turn else target_square + 8)
+            occupied ^= removed
+        if initial_square == king_square:
+            king_square = target_square
+
+        enemy = Pieces.BLACK if turn else Pieces.WHITE
+        return not MoveGenerator.is_square_attacked(bitboards, king_square, enemy, occupied, removed)
+
+    @staticmethod
+    @Instrumentation.timed
+    def in_check(board: Board) -> bool:
+        """ Checks whether the side to move is in check
+
+        Args:
+            board (Board): The board state
+
+        Returns:
+            bool: True if the king of the side to move is attacked
+        """
+        bitboards = board.tolist()
+        color = Pieces.WHITE if board.turn else Pieces.BLACK
+        king_square = bitboards[color | Pieces.KING].bit_length() - 1
+        enemy = Pieces.BLACK if board.turn else Pieces.WHITE
+        return MoveGenerator.is_square_attacked(bitboards, king_square, enemy, bitboards[Pieces.OCCUPIED])
 
 if __name__ == '__main__':
-    test_board = Board("rnbqkbnr/pp1p1ppp/2p5/2P5/1P2p3/P7/3PPPPP/RNBQKBNR w KQkq - 0 1")
-    MoveGenerator.legal_pawn_moves(test_board)
\ No newline at end of file
+    test_board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    print(test_board)
+    print(len(MoveGenerator.legal_moves(test_board)), "legal moves")
\ No newline at end of file
@@ -9,182 +9,334 @@
 # pylint: disable=unused-wildcard-import
 # pylint: disable=import-error
 
-# third-party
-import numpy as np
+# standard
+from array import array
 
 # project
-from bit_master import BitMaster
-from pieces import Pieces
-from board import Board
-from move import Move
+from .instrumentation import Instrumentation
+from .pieces import Pieces
+from .board import Board, Castling, NO_PIECE
+from .move import Move, Flags, MOVE_FLAGS, MOVE_FROM, MOVE_TO
+from .attack_tables import PAWN_ATTACKS
+from .zobrist import PIECE_KEYS, SIDE_KEY, CASTLING_KEYS, EN_PASSANT_KEYS
+
+MAX_PLY = 1024
+NO_SQUARE = 64
+
+# castling rights that survive a move touching a square (king or rook squares lose theirs)
+CASTLING_MASKS = [0b1111] * 64
+CASTLING_MASKS[0] &= ~Castling.WHITE_LONG
+CASTLING_MASKS[7] &= ~Castling.WHITE_SHORT
+CASTLING_MASKS[4] &= ~(Castling.WHITE_SHORT | Castling.WHITE_LONG)
+CASTLING_MASKS[56] &= ~Castling.BLACK_LONG
+CASTLING_MASKS[63] &= ~Castling.BLACK_SHORT
+CASTLING_MASKS[60] &= ~(Castling.BLACK_SHORT | Castling.BLACK_LONG)
+
+PROMOTION_PIECES = (Pieces.KNIGHT, Pieces.BISHOP, Pieces.ROOK, Pieces.QUEEN)
 
 class MoveMaker:
     """ Handles the manipulation of board objects to represent move making
+    - Moves are made and unmade in place, only the bits of the touched squares are XORed
+    - Every handler is its own inverse, unmaking a move applies the same handler a second time
+    - The handler is picked from HANDLERS, a 16 entry table indexed by the move flags, and the squares
+      come from the decode tables of move.py, so a move costs one lookup and one call
+        - every handler takes (board, flags, color, piece, initial_square, target_square, captured)
+          and ignores what it does not need
+    - The Zobrist key is updated the same way, every handler XORs the keys of the pieces it moves
+    - So is the mailbox: a square changing from piece a to piece b is XORed with a ^ b
+      (NO_PIECE stands for an empty square)
+    - The information a move destroys (captured piece, castling rights, en passant square) is packed
+      into one integer and pushed onto a preallocated undo stack, which doubles in size when a game
+      outgrows it:
+        - bits 0-15: the move
+        - bits 16-19: the captured piece (NO_PIECE if there is none)
+        - bits 20-23: the castling rights before the move
+        - bits 24-30: the en passant square before the move (NO_SQUARE if there is none)
+        - bits 32-47: the halfmove clock before the move
+    - The Zobrist key of the position before every move is pushed onto board.history and counted
+      in board.key_counts, unmake pops it again
     """
+    def __init__(self, size: int = MAX_PLY) -> None:
+        self.undo_stack = array('Q', bytes(8 * size))
+        self.ply = 0
+
+    def grow(self) -> None:
+        """ Doubles the undo stack, called when a game outgrows the preallocated plies """
+        self.undo_stack.frombytes(bytes(8 * max(1, len(self.undo_stack))))
+
     @staticmethod
-    def quiet(board: Board, move: Move) -> Board:
-        """ Performs a quiet move
+    @Instrumentation.timed
+    def quiet(board: Board, flags: int, color: int, piece: int, initial_square: int, target_square: int, captured: int) -> None:
+        """ Moves a piece to an empty square (quiet moves and double pawn pushes)
 
         Args:
             board (Board): The board to operate on
-            move (Move): Data regarding the move
+            piece (int): The piece encoding
+            initial_square (int): The square the piece moves from
+            target_square (int): The square the piece moves to
         """
-        new_board = board.deepcopy()
-        piece = BitMaster.get(board, move.initial_square)
-        BitMaster.destroy(board, move.initial_square)
-        BitMaster.place(board, move.target_square, piece)
-        new_board.update_bitboard_info()
-        return new_board
+        bits = (1 << initial_square) | (1 << target_square)
+        board[piece] ^= bits
+        board[Pieces.ALL_BLACK if piece & Pieces.BLACK else Pieces.ALL_WHITE] ^= bits
+        board[Pieces.OCCUPIED] ^= bits
+        board[Pieces.EMPTY] ^= bits
+        board.zobrist ^= PIECE_KEYS[piece][initial_square] ^ PIECE_KEYS[piece][target_square]
+        mailbox = board.mailbox
+        mailbox[initial_square] ^= piece ^ NO_PIECE
+        mailbox[target_square] ^= piece ^ NO_PIECE
 
     @staticmethod
-    def short_castle(board: Board) -> Board:
-        """ Performs a short-castle
+    @Instrumentation.timed
+    def capture(board: Board, flags: int, color: int, piece: int, initial_square: int, target_square: int, captured: int) -> None:
+        """ Moves a piece onto an enemy piece
 
         Args:
             board (Board): The board to operate on
+            piece (int): The piece encoding
+            initial_square (int): The square the piece moves from
+            target_square (int): The square the piece moves to
+            captured (int): The encoding of the captured piece
         """
-        # choose side and color
-        row = 0 if board.turn else 7
-        color = Pieces.WHITE if board.turn else Pieces.BLACK
-        
-        new_board = board.deepcopy()
-        new_board &= ~np.uint64(15 << (4 + row*8))
-        new_board[color | Pieces.ROOK] |= np.uint64(1 << (5 + row*8))
-        new_board[color | Pieces.KING]  = np.uint64(1 << (6 + row*8))
-        new_board.update_bitboard_info()
-        return new_board
-    
+        initial_bit, target_bit = 1 << initial_square, 1 << target_square
+        board[piece] ^= initial_bit | target_bit
+        board[captured] ^= target_bit
+        if piece & Pieces.BLACK:
+            board[Pieces.ALL_BLACK] ^= initial_bit | target_bit
+            board[Pieces.ALL_WHITE] ^= target_bit
+        else:
+            board[Pieces.ALL_WHITE] ^= initial_bit | target_bit
+            board[Pieces.ALL_BLACK] ^= target_bit
+        board[Pieces.OCCUPIED] ^= initial_bit
+        board[Pieces.EMPTY] ^= initial_bit
+        board.zobrist ^= PIECE_KEYS[piece][initial_square] ^ PIECE_KEYS[piece][target_square] ^ PIECE_KEYS[captured][target_square]
+        mailbox = board.mailbox
+        mailbox[initial_square] ^= piece ^ NO_PIECE
+        mailbox[target_square] ^= piece ^ captured
+
     @staticmethod
-    def long_castle(board: Board) -> Board:
-        """ Performs a long-castle
+    @Instrumentation.timed
+    def castle(board: Board, flags: int, color: int, piece: int, initial_square: int, target_square: int, captured: int) -> None:
+        """ Performs a short or long castle, the rook squares are derived from the king squares
 
         Args:
             board (Board): The board to operate on
+            color (int): The color of the castling side
+            initial_square (int): The square the king moves from
+            target_square (int): The square the king moves to
         """
-        row = 0 if board.turn else 7
-        color = Pieces.WHITE if board.turn else Pieces.black
-        
-        new_board = board.deepcopy()
-        new_board &= ~np.uint64(15 << (row*8))
-        new_board[color | Pieces.KING] = np.uint64(1 << (2 + row*8))
-        new_board[color | Pieces.ROOK] |= np.uint64(1 << (3 + row*8))
-        new_board.update_bitboard_info()
-        return new_board
-    
+        if target_square > initial_square:
+            rook_initial, rook_target = initial_square + 3, initial_square + 1
+        else:
+            rook_initial, rook_target = initial_square - 4, initial_square - 1
+        king_bits = (1 << initial_square) | (1 << target_square)
+        rook_bits = (1 << rook_initial) | (1 << rook_target)
+        board[color | Pieces.KING] ^= king_bits
+        board[color | Pieces.ROOK] ^= rook_bits
+        board[Pieces.ALL_BLACK if color else Pieces.ALL_WHITE] ^= king_bits | rook_bits
+        board[Pieces.OCCUPIED] ^= king_bits | rook_bits
+        board[Pieces.EMPTY] ^= king_bits | rook_bits
+        king_keys, rook_keys = PIECE_KEYS[color | Pieces.KING], PIECE_KEYS[color | Pieces.ROOK]
+        board.zobrist ^= king_keys[initial_square] ^ king_keys[target_square] ^ rook_keys[rook_initial] ^ rook_keys[rook_target]
+        mailbox = board.mailbox
+        mailbox[initial_square] ^= (color | Pieces.KING) ^ NO_PIECE
+        mailbox[target_square] ^= (color | Pieces.KING) ^ NO_PIECE
+        mailbox[rook_initial] ^= (color | Pieces.ROOK) ^ NO_PIECE
+        mailbox[rook_target] ^= (color | Pieces.ROOK) ^ NO_PIECE
+
     @staticmethod
-    def capture(board: Board, move: Move) -> Board:
-        """ Performs a capture move
+    @Instrumentation.timed
+    def en_passant(board: Board, flags: int, color: int, piece: int, initial_square: int, target_square: int, captured: int) -> None:
+        """ Performs an en passant capture
 
         Args:
             board (Board): The board to operate on
+            color (int): The color of the capturing pawn
+            initial_square (int): The square the pawn moves from
+            target_square (int): The square the pawn moves to
         """
-        new_board = board.deepcopy()
-        piece = BitMaster.get(board, move.initial_square)
-        BitMaster.destroy(board, move.initial_square)
-        BitMaster.destroy(board, move.target_square)
-        BitMaster.place(board, move.target_square, piece)
-        new_board.update_bitboard_info()
-        return new_board
-    
+        captured_square = target_square - 8 if color == Pieces.WHITE else target_square + 8
+        captured_bit = 1 << captured_square
+        bits = (1 << initial_square) | (1 << target_square)
+        board[color | Pieces.PAWN] ^= bits
+        board[(color ^ Pieces.BLACK) | Pieces.PAWN] ^= captured_bit
+        if color:
+            board[Pieces.ALL_BLACK] ^= bits
+            board[Pieces.ALL_WHITE] ^= captured_bit
+        else:
+            board[Pieces.ALL_WHITE] ^= bits
+            board[Pieces.ALL_BLACK] ^= captured_bit
+        board[Pieces.OCCUPIED] ^= bits | captured_bit
+        board[Pieces.EMPTY] ^= bits | captured_bit
+        pawn_keys = PIECE_KEYS[color | Pieces.PAWN]
+        board.zobrist ^= pawn_keys[initial_square] ^ pawn_keys[target_square] ^ PIECE_KEYS[(color ^ Pieces.BLACK) | Pieces.PAWN][captured_square]
+        mailbox = board.mailbox
+        mailbox[initial_square] ^= (color | Pieces.PAWN) ^ NO_PIECE
+        mailbox[target_square] ^= (color | Pieces.PAWN) ^ NO_PIECE
+        mailbox[captured_square] ^= (color ^ Pieces.BLACK | Pieces.PAWN) ^ NO_PIECE
+
     @staticmethod
-    def en_passant(board: Board, move: Move) -> Board:
-        """ Performs an en passant capture
+    @Instrumentation.timed
+    def promotion(board: Board, flags: int, color: int, piece: int, initial_square: int, target_square: int, captured: int) -> None:
+        """ Performs a promotion or a promotion-capture move
 
         Args:
             board (Board): The board to operate on
+            flags (int): The move flags, the low 2 bits select the new piece
+            color (int): The color of the promoting pawn
+            initial_square (int): The square the pawn moves from
+            target_square (int): The square the pawn promotes on
+            captured (int): The encoding of the captured piece (NO_PIECE if there is none)
         """
-        new_board = board.deepcopy()
-        piece = BitMaster.get(board, move.initial_square)
-        BitMaster.destroy(board, move.initial_square)
-        BitMaster.destroy(board, int(move.target_square) + (8 * (-1 if board.turn else 1)))
-        BitMaster.place(board, move.target_square, piece)
-        new_board.update_bitboard_info()
-        return new_board
-    
+        promoted = color | PROMOTION_PIECES[flags & 3]
+        initial_bit, target_bit = 1 << initial_square, 1 << target_square
+        board[color | Pieces.PAWN] ^= initial_bit
+        board[promoted] ^= target_bit
+        board[Pieces.ALL_BLACK if color else Pieces.ALL_WHITE] ^= initial_bit | target_bit
+        board.zobrist ^= PIECE_KEYS[color | Pieces.PAWN][initial_square] ^ PIECE_KEYS[promoted][target_square]
+        board.mailbox[initial_square] ^= (color | Pieces.PAWN) ^ NO_PIECE
+        board.mailbox[target_square] ^= promoted ^ captured
+        if captured == NO_PIECE:
+            board[Pieces.OCCUPIED] ^= initial_bit | target_bit
+            board[Pieces.EMPTY] ^= initial_bit | target_bit
+        else:
+            board[captured] ^= target_bit
+            board[Pieces.ALL_WHITE if color else Pieces.ALL_BLACK] ^= target_bit
+            board[Pieces.OCCUPIED] ^= initial_bit
+            board[Pieces.EMPTY] ^= initial_bit
+            board.zobrist ^= PIECE_KEYS[captured][target_square]
+
     @staticmethod
-    def promotion(board: Board, move: Move) -> Board:
-        """ Performs a promotion move
+    def toggle(board: Board, code: int, color: int, piece: int, captured: int) -> None:
+        """ Applies the bit changes of an encoded move, applying them twice restores the board
 
         Args:
             board (Board): The board to operate on
+            code (int): The encoded move
+            color (int): The color of the moving side
+            piece (int): The encoding of the moving piece (unused by castling and promotions)
+            captured (int): The encoding of the captured piece (NO_PIECE if there is none)
         """
-        color = Pieces.WHITE if board.turn else Pieces.BLACK
-        piece = [Pieces.KNIGHT, Pieces.BISHOP, Pieces.ROOK, Pieces.QUEEN][move.flags & 3]
-        
-        new_board = board.deepcopy()
-        BitMaster.destroy(board, move.initial_square)
-        BitMaster.place(board, move.target_square, color | piece)
-        new_board.update_bitboard_info()
-        return new_board
-    
+        flags = MOVE_FLAGS[code]
+        HANDLERS[flags](board, flags, color, piece, MOVE_FROM[code], MOVE_TO[code], captured)
+
     @staticmethod
-    def promotion_capture(board: Board, move: Move) -> Board:
-        """ Performs a promotion-capture move
+    def invalid(board: Board, flags: int, color: int, piece: int, initial_square: int, target_square: int, captured: int) -> None:
+        """ Fills the unused flag values 6 and 7 of the dispatch table """
+        raise ValueError(f"Invalid move flags: {flags}")
+
+    @Instrumentation.timed
+    def make_move(self, board: Board, move: Move | int) -> None:
+        """ Plays a given move in place and pushes its undo record
 
         Args:
             board (Board): The board to operate on
+            move (Move | int): The move to play
         """
+        code = int(move)
+        flags = MOVE_FLAGS[code]
+        initial_square = MOVE_FROM[code]
+        target_square = MOVE_TO[code]
         color = Pieces.WHITE if board.turn else Pieces.BLACK
-        piece = [Pieces.KNIGHT, Pieces.BISHOP, Pieces.ROOK, Pieces.QUEEN][move.flags & 3]
-        
-        new_board = board.deepcopy()
-        BitMaster.destroy(board, move.initial_square)
-        BitMaster.destroy(board, move.target_square)
-        BitMaster.place(board, move.target_square, color | piece)
-        new_board.update_bitboard_info()
-        return new_board
-    
-    def make_move(self, board: Board, move: Move) -> Board:
-        """ Plays a given move
 
-        Args:
-            move (Move): the move to play
+        piece = board.mailbox[initial_square]
+        captured = NO_PIECE if flags == Flags.EN_PASSANT else board.mailbox[target_square]
+        previous_key = board.zobrist
+        HANDLERS[flags](board, flags, color, piece, initial_square, target_square, captured)
+
+        en_passant = NO_SQUARE if board.en_passant is None else board.en_passant
+        record = code | (captured << 16) | (board.castling_rights << 20) | (en_passant << 24) | (min(board.halfmove, 0xffff) << 32)
+        try:
+            self.undo_stack[self.ply] = record
+        except IndexError:
+            self.grow()
+            self.undo_stack[self.ply] = record
+        self.ply += 1
+
+        board.history.append(previous_key)
+        key_counts = board.key_counts
+        key_counts[previous_key] = key_counts.get(previous_key, 0) + 1
+        # captures and pawn moves are irreversible, they reset the 50 move rule clock
+        board.halfmove = 0 if flags & Flags.CAPTURE or piece & 7 == Pieces.PAWN else board.halfmove + 1
+        if color:
+            board.fullmove += 1
+
+        # side, castling and en passant keys: XOR the old values out and the new ones in
+        key = board.zobrist ^ SIDE_KEY ^ CASTLING_KEYS[board.castling_rights]
+        if board.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[board.en_passant & 7]
+        board.castling_rights &= CASTLING_MASKS[initial_square] & CASTLING_MASKS[target_square]
+        key ^= CASTLING_KEYS[board.castling_rights]
 
-        Returns:
-            Self: A copy of the board with the move applied
+        # the en passant square is only recorded if an enemy pawn could actually capture
+        board.en_passant = None
+        if flags == Flags.DOUBLE_PAWN_PUSH:
+            en_passant = (initial_square + target_square) >> 1
+            if PAWN_ATTACKS[color >> 3][en_passant] & board[(color ^ Pieces.BLACK) | Pieces.PAWN]:
+                board.en_passant = en_passant
+                key ^= EN_PASSANT_KEYS[en_passant & 7]
+        board.zobrist = key
+        board.turn = not board.turn
+
+    @Instrumentation.timed
+    def unmake_move(self, board: Board) -> None:
+        """ Takes back the last move played with make_move
+
+        Args:
+            board (Board): The board to operate on
         """
-        if move.is_quiet or move.is_double_pawn_push:
-            return self.quiet(board, move)
-        elif move.is_short_castle:
-            return self.short_castle(board)
-        elif move.is_long_castle:
-            return self.long_castle(board)
-        elif move.is_en_passant:
-            return self.en_passant(board, move)
-        elif move.is_promotion:
-            return self.promotion(board, move)
-        elif move.is_capture:
-            return self.capture(board, move)
+        if not self.ply:
+            raise IndexError("unmake_move called with no move left to take back")
+        self.ply -= 1
+        record = self.undo_stack[self.ply]
+        code = record & 0xffff
+        board.turn = not board.turn
+        board.halfmove = (record >> 32) & 0xffff
+        if not board.turn:
+            board.fullmove -= 1
+
+        previous_key = board.history.pop()
+        key_counts = board.key_counts
+        if key_counts[previous_key] == 1:
+            del key_counts[previous_key]
         else:
-            raise ValueError(f"Invalid move data: {move}")
+            key_counts[previous_key] -= 1
+
+        key = board.zobrist ^ SIDE_KEY ^ CASTLING_KEYS[board.castling_rights]
+        if board.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[board.en_passant & 7]
+        board.castling_rights = (record >> 20) & 0xf
+        key ^= CASTLING_KEYS[board.castling_rights]
+        en_passant = (record >> 24) & 0x7f
+        board.en_passant = None if en_passant == NO_SQUARE else en_passant
+        if board.en_passant is not None:
+            key ^= EN_PASSANT_KEYS[en_passant & 7]
+        board.zobrist = key
+
+        color = Pieces.WHITE if board.turn else Pieces.BLACK
+        MoveMaker.toggle(board, code, color, board.mailbox[MOVE_TO[code]], (record >> 16) & 0xf)
+
+# indexed by the 4 bit move flags (see Flags)
+HANDLERS = (
+    MoveMaker.quiet, MoveMaker.quiet, MoveMaker.castle, MoveMaker.castle,
+    MoveMaker.capture, MoveMaker.en_passant, MoveMaker.invalid, MoveMaker.invalid,
+    *[MoveMaker.promotion] * 8,
+)
 
 if __name__ == '__main__':
-    # quiet test
-    test_board = Board()
-    MoveMaker.quiet(test_board, Move(0, 12, 28))
-    #print(test_board)
-    
-    # long castle test
-    test_board = Board("r2qkb1r/ppp1pppp/2n1bn2/6B1/2pP4/2N5/PPQ1PPPP/R3KBNR w KQkq - 6 6")
-    MoveMaker.short_castle(test_board)
-    #print(test_board)
-    
-    # short castle test
+    move_maker = MoveMaker()
+
+    # castle test
     test_board = Board("r1bqkb1r/pppp1ppp/2n2n2/1B2p3/4P3/5N2/PPPP1PPP/RNBQK2R w KQkq - 4 4")
-    MoveMaker.long_castle(test_board)
-    #print(test_board)
-    
-    # capture test
-    test_board = Board("rnbqkb1r/pppp1ppp/8/4P3/3pn3/5N2/PPP2PPP/RNBQKB1R w KQkq - 1 5")
-    MoveMaker.capture(test_board, Move(4, 3, 27))
-    #print(test_board)
-    
+    move_maker.make_move(test_board, Move(Flags.SHORT_CASTLE, 4, 6))
+    print(test_board)
+    move_maker.unmake_move(test_board)
+
     # en passant test
     test_board = Board("rnbqkb1r/ppp2ppp/8/3pP3/3Qn3/5N2/PPP2PPP/RNB1KB1R w KQkq d6 0 6")
-    MoveMaker.en_passant(test_board, Move(5, 36, 43))
-    #print(test_board)
-    
+    move_maker.make_move(test_board, Move(Flags.EN_PASSANT, 36, 43))
+    print(test_board)
+
     # promotion test
-    test_board = Board("2q2K2/5P1k/5Qpp/p2p4/3P4/P2b2P1/5K1P/1r6 w - - 0 1")
-    MoveMaker.promotion_capture(test_board, Move(15, 53, 61))
+    test_board = Board("2q4k/1P6/8/8/8/8/8/K7 w - - 0 1")
+    move_maker.make_move(test_board, Move(Flags.QUEEN_PROMOTE_CAPTURE, 49, 58))
     print(test_board)
\ No newline at end of file
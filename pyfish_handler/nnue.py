@@ -0,0 +1,260 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import argparse
+
+# third-party
+import numpy as np
+
+# project
+from .board import Board
+from .evaluation import SQUARE_SCORES
+from .move import Move, Flags, MOVE_FLAGS, MOVE_FROM, MOVE_TO
+from .move_maker import MoveMaker, MAX_PLY, PROMOTION_PIECES
+from .pieces import Pieces
+
+# HalfKP: one feature per (king square of the perspective, non-king piece relative to the perspective, square),
+# squares are flipped vertically for black so that both perspectives share the weights
+PIECE_KINDS = 10 # queen, rook, bishop, knight, pawn of the perspective, then the same for the opponent
+FEATURES = 64 * PIECE_KINDS * 64
+KIND_ORDER = (Pieces.QUEEN, Pieces.ROOK, Pieces.BISHOP, Pieces.KNIGHT, Pieces.PAWN)
+HIDDEN = 32
+SEED_SPAN = 8000 # centipawns mapped onto the [0, 1] range of the clipped ReLU by from_piece_square_tables
+
+# feature index = KING_OFFSETS[perspective][king square] + PIECE_FEATURES[perspective][piece][square],
+# perspectives are indexed 0 for white and 1 for black
+KING_OFFSETS = [[(square ^ (56 * perspective)) * PIECE_KINDS * 64 for square in range(64)] for perspective in (0, 1)]
+PIECE_FEATURES = [
+    [
+        [(KIND_ORDER.index(piece & 7) + (5 if (piece >> 3) != perspective else 0)) * 64 + (square ^ (56 * perspective)) for square in range(64)]
+        if piece in Pieces.DECODE and piece & 7 != Pieces.KING else None
+        for piece in range(16)
+    ]
+    for perspective in (0, 1)
+]
+
+class NNUE:
+    """ The weights of a small HalfKP network, loaded from a numpy .npz file
+    reference: https://www.chessprogramming.org/NNUE
+
+    - feature_weights (40960, N) and feature_bias (N,): the feature transformer, one accumulator of N values per perspective
+    - hidden_weights (2N, 32) and hidden_bias (32,): the accumulators of the side to move and of the opponent,
+      concatenated in that order after a clipped ReLU
+    - output_weights (32,) and output_bias (): the score in centipawns after a second clipped ReLU
+    - The clipped ReLU clamps to [0, 1], all weights are float32
+    """
+    def __init__(self, path: str = None, arrays: dict[str, np.ndarray] = None) -> None:
+        if arrays is None:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in data.files}
+        self.path = path
+        self.feature_weights = np.ascontiguousarray(arrays["feature_weights"], dtype=np.float32)
+        self.feature_bias = np.asarray(arrays["feature_bias"], dtype=np.float32)
+        self.hidden_weights = np.asarray(arrays["hidden_weights"], dtype=np.float32)
+        self.hidden_bias = np.asarray(arrays["hidden_bias"], dtype=np.float32)
+        self.output_weights = np.asarray(arrays["output_weights"], dtype=np.float32)
+        self.output_bias = float(arrays["output_bias"])
+        if self.feature_weights.shape[0] != FEATURES or self.hidden_weights.shape[0] != 2 * self.feature_weights.shape[1]:
+            raise ValueError(f"{path} does not hold a HalfKP network ({FEATURES} features)")
+
+    @property
+    def width(self) -> int:
+        """ The number of values of one accumulator """
+        return self.feature_weights.shape[1]
+
+    def save(self, path: str) -> None:
+        """ Writes the weights to a .npz file """
+        np.savez(path, feature_weights=self.feature_weights, feature_bias=self.feature_bias, hidden_weights=self.hidden_weights,
+                 hidden_bias=self.hidden_bias, output_weights=self.output_weights, output_bias=np.float32(self.output_bias))
+
+    @staticmethod
+    def features(board: Board, perspective: int) -> list[int]:
+        """ Lists the active features of a board for one perspective (0 for white, 1 for black) """
+        bitboards = board.tolist()
+        king_offset = KING_OFFSETS[perspective][bitboards[(perspective << 3) | Pieces.KING].bit_length() - 1]
+        features = []
+        for piece in Pieces.DECODE:
+            piece_features = PIECE_FEATURES[perspective][piece]
+            if piece_features is None:
+                continue
+            bitboard = bitboards[piece]
+            while bitboard:
+                features.append(king_offset + piece_features[(bitboard & -bitboard).bit_length() - 1])
+                bitboard &= bitboard - 1
+        return features
+
+    def output(self, us: np.ndarray, them: np.ndarray) -> int:
+        """ Runs the layers after the feature transformer
+
+        Args:
+            us (np.ndarray): The accumulator of the side to move
+            them (np.ndarray): The accumulator of the opponent
+
+        Returns:
+            int: The score in centipawns from the point of view of the side to move
+        """
+        hidden = np.clip(np.concatenate((us, them)), 0.0, 1.0) @ self.hidden_weights + self.hidden_bias
+        return int(round(float(np.clip(hidden, 0.0, 1.0) @ self.output_weights) + self.output_bias))
+
+    @staticmethod
+    def from_piece_square_tables(width: int = 64, seed: int = 0) -> "NNUE":
+        """ Builds a network that reproduces the material and piece-square evaluation of the non-king pieces
+
+        - Accumulator value 0 holds 0.5 + score / SEED_SPAN of its perspective, hidden unit 0 takes the difference
+          of both perspectives and the output scales it back to centipawns, exact while |score| < SEED_SPAN / 2
+        - Every other weight is small random noise that does not reach the output, so the network has the
+          cost of a real one and is a starting point for training
+
+        Args:
+            width (int, optional): The accumulator width
+            seed (int, optional): The seed of the noise
+
+        Returns:
+            NNUE: The network
+        """
+        rng = np.random.default_rng(seed)
+        feature_weights = rng.normal(0, 0.01, (FEATURES, width)).astype(np.float32)
+        feature_bias = rng.normal(0.5, 0.1, width).astype(np.float32)
+        hidden_weights = rng.normal(0, 0.1, (2 * width, HIDDEN)).astype(np.float32)
+        hidden_bias = rng.normal(0.5, 0.1, HIDDEN).astype(np.float32)
+        output_weights = np.zeros(HIDDEN, dtype=np.float32)
+
+        # the weights of both perspectives are the piece-square scores seen from white
+        for king_square in range(64):
+            for kind, piece_type in enumerate(KIND_ORDER):
+                base = (king_square * PIECE_KINDS + kind) * 64
+                feature_weights[base:base + 64, 0] = np.array(SQUARE_SCORES[Pieces.WHITE | piece_type]) / SEED_SPAN
+                base += 5 * 64
+                feature_weights[base:base + 64, 0] = np.array(SQUARE_SCORES[Pieces.BLACK | piece_type]) / SEED_SPAN
+        feature_bias[0] = 0.5
+        hidden_weights[:, 0] = 0.0
+        hidden_weights[0, 0], hidden_weights[width, 0], hidden_bias[0] = 0.5, -0.5, 0.5
+        output_weights[0] = SEED_SPAN
+        return NNUE(arrays={
+            "feature_weights": feature_weights, "feature_bias": feature_bias, "hidden_weights": hidden_weights,
+            "hidden_bias": hidden_bias, "output_weights": output_weights, "output_bias": -SEED_SPAN / 2,
+        })
+
+class AccumulatorStack:
+    """ The first layer outputs of the positions along the current line, one entry per ply
+
+    - make() copies the top entry and adds or subtracts the weight rows of the features a move changes,
+      unmake() drops the top entry, so taking a move back costs nothing
+    - A king move changes every feature of its own perspective, that perspective is recomputed instead
+    """
+    def __init__(self, network: NNUE, size: int = MAX_PLY) -> None:
+        self.network = network
+        self.values = np.zeros((size + 1, 2, network.width), dtype=np.float32)
+        self.ply = 0
+
+    def refresh(self, board: Board, perspective: int = None) -> None:
+        """ Recomputes the top entry from scratch
+
+        Args:
+            board (Board): The board state
+            perspective (int, optional): Only this perspective (0 for white, 1 for black), both by default
+        """
+        weights, bias = self.network.feature_weights, self.network.feature_bias
+        for side in ((0, 1) if perspective is None else (perspective,)):
+            self.values[self.ply, side] = bias + weights[NNUE.features(board, side)].sum(axis=0)
+
+    def make(self, board: Board, removed: list[tuple[int, int]], added: list[tuple[int, int]], king_color: int | None) -> None:
+        """ Pushes the entry of the position after a move
+
+        Args:
+            board (Board): The board state after the move
+            removed (list[tuple[int, int]]): The (piece, square) pairs the move took off the board
+            added (list[tuple[int, int]]): The (piece, square) pairs the move put on the board
+            king_color (int | None): The color whose king moved (Pieces.WHITE or Pieces.BLACK), None if no king moved
+        """
+        if self.ply + 1 == len(self.values):
+            self.values = np.concatenate((self.values, np.zeros_like(self.values)))
+        values, weights = self.values, self.network.feature_weights
+        values[self.ply + 1] = values[self.ply]
+        self.ply += 1
+        bitboards = board.tolist()
+        for perspective in (0, 1):
+            if king_color is not None and king_color >> 3 == perspective:
+                self.refresh(board, perspective)
+                continue
+            accumulator = values[self.ply, perspective]
+            king_offset = KING_OFFSETS[perspective][bitboards[(perspective << 3) | Pieces.KING].bit_length() - 1]
+            features = PIECE_FEATURES[perspective]
+            for piece, square in removed:
+                if features[piece] is not None:
+                    accumulator -= weights[king_offset + features[piece][square]]
+            for piece, square in added:
+                if features[piece] is not None:
+                    accumulator += weights[king_offset + features[piece][square]]
+
+    def unmake(self) -> None:
+        """ Pops the entry of the last move """
+        self.ply -= 1
+
+    def evaluate(self, board: Board) -> int:
+        """ Evaluates the position of the top entry
+
+        Args:
+            board (Board): The board state, only the side to move is read
+
+        Returns:
+            int: The score in centipawns from the point of view of the side to move
+        """
+        white, black = self.values[self.ply]
+        return self.network.output(white, black) if board.turn else self.network.output(black, white)
+
+class NNUEMoveMaker(MoveMaker):
+    """ MoveMaker that keeps an AccumulatorStack in step with the moves it makes and unmakes
+
+    - The pieces a move removes and adds are read from the mailbox before the move is made
+    - refresh() must be called once on the root position before the first move
+    """
+    def __init__(self, network: NNUE, size: int = MAX_PLY) -> None:
+        super().__init__(size)
+        self.accumulators = AccumulatorStack(network, size)
+
+    def refresh(self, board: Board) -> None:
+        """ Recomputes the accumulators of the current position """
+        self.accumulators.ply = self.ply
+        self.accumulators.refresh(board)
+
+    def make_move(self, board: Board, move: Move | int) -> None:
+        code = int(move)
+        flags, initial_square, target_square = MOVE_FLAGS[code], MOVE_FROM[code], MOVE_TO[code]
+        mailbox = board.mailbox
+        piece = mailbox[initial_square]
+        color = piece & Pieces.BLACK
+        removed = [(piece, initial_square)]
+        added = [((color | PROMOTION_PIECES[flags & 3]) if flags & 0b1000 else piece, target_square)]
+        if flags == Flags.EN_PASSANT:
+            removed.append((color ^ Pieces.BLACK | Pieces.PAWN, target_square + (8 if color else -8)))
+        elif flags & Flags.CAPTURE:
+            removed.append((mailbox[target_square], target_square))
+        elif flags in (Flags.SHORT_CASTLE, Flags.LONG_CASTLE):
+            rook_initial, rook_target = (initial_square + 3, initial_square + 1) if flags == Flags.SHORT_CASTLE else (initial_square - 4, initial_square - 1)
+            removed.append((color | Pieces.ROOK, rook_initial))
+            added.append((color | Pieces.ROOK, rook_target))
+        super().make_move(board, code)
+        self.accumulators.make(board, removed, added, color if piece & 7 == Pieces.KING else None)
+
+    def unmake_move(self, board: Board) -> None:
+        super().unmake_move(board)
+        self.accumulators.unmake()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="writes a network seeded with the piece-square tables, a starting point for training")
+    parser.add_argument("path", help="the .npz file to write")
+    parser.add_argument("--width", type=int, default=64, help="the accumulator width")
+    parser.add_argument("--seed", type=int, default=0, help="the seed of the random weights")
+    args = parser.parse_args()
+    NNUE.from_piece_square_tables(args.width, args.seed).save(args.path)
\ No newline at end of file
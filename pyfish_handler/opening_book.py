@@ -0,0 +1,162 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import os
+import random
+
+# third-party
+import numpy as np
+
+# project
+from .attack_tables import PAWN_ATTACKS
+from .board import Board, Castling
+from .move import Move, MOVE_FROM, MOVE_TO
+from .move_generator import MoveGenerator
+from .pieces import Pieces
+from .polyglot_keys import POLYGLOT_RANDOM
+
+# one book entry, all fields are big-endian and the file is sorted by key
+ENTRY = np.dtype([("key", ">u8"), ("move", ">u2"), ("weight", ">u2"), ("learn", ">u4")])
+
+# Polyglot numbers the piece types from pawn to king, the kind of a piece is 2 * type + 1 for white
+POLYGLOT_TYPES = {Pieces.PAWN: 0, Pieces.KNIGHT: 1, Pieces.BISHOP: 2, Pieces.ROOK: 3, Pieces.QUEEN: 4, Pieces.KING: 5}
+PIECE_OFFSETS = {
+    color | piece_type: 64 * (2 * polyglot_type + (color == Pieces.WHITE))
+    for color in (Pieces.WHITE, Pieces.BLACK) for piece_type, polyglot_type in POLYGLOT_TYPES.items()
+}
+CASTLING_OFFSETS = ((Castling.WHITE_SHORT, 768), (Castling.WHITE_LONG, 769), (Castling.BLACK_SHORT, 770), (Castling.BLACK_LONG, 771))
+EN_PASSANT_OFFSET = 772
+TURN_OFFSET = 780
+
+# castling is stored as the king capturing its own rook
+CASTLING_TARGETS = {(4, 7): 6, (4, 0): 2, (60, 63): 62, (60, 56): 58}
+
+class PolyglotBook:
+    """ Read-only Polyglot opening book (.bin)
+    reference: http://hgm.nubati.net/book_format.html
+
+    - The file is opened with np.memmap, probing a position binary searches the sorted keys so only
+      the pages on the search path are read, however large the book is
+    - Positions are looked up by their Polyglot key, which uses the standard Random64 table instead of
+      the engine's own Zobrist keys
+    - Book moves are matched against the legal moves and returned in the Move encoding, entries that
+      are not legal in the position are ignored
+    """
+    def __init__(self, path: str) -> None:
+        size = os.path.getsize(path)
+        if size % ENTRY.itemsize:
+            raise ValueError(f"{path} is not a Polyglot book, its size is not a multiple of {ENTRY.itemsize} bytes")
+        self.path = path
+        self.entries = np.memmap(path, dtype=ENTRY, mode="r") if size else np.zeros(0, dtype=ENTRY)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @staticmethod
+    def key(board: Board) -> int:
+        """ Computes the Polyglot key of a board state
+
+        Args:
+            board (Board): The board state (any backend)
+
+        Returns:
+            int: The 64 bit Polyglot key
+        """
+        bitboards = board.tolist()
+        key = 0
+        for piece, offset in PIECE_OFFSETS.items():
+            bitboard = bitboards[piece]
+            while bitboard:
+                key ^= POLYGLOT_RANDOM[offset + (bitboard & -bitboard).bit_length() - 1]
+                bitboard &= bitboard - 1
+        for right, offset in CASTLING_OFFSETS:
+            if board.castling_rights & right:
+                key ^= POLYGLOT_RANDOM[offset]
+        # the en passant file only counts if a pawn of the side to move stands next to the pawn that can be taken
+        if board.en_passant is not None:
+            pawns = bitboards[(Pieces.WHITE if board.turn else Pieces.BLACK) | Pieces.PAWN]
+            if PAWN_ATTACKS[1 if board.turn else 0][board.en_passant] & pawns:
+                key ^= POLYGLOT_RANDOM[EN_PASSANT_OFFSET + (board.en_passant & 7)]
+        if board.turn:
+            key ^= POLYGLOT_RANDOM[TURN_OFFSET]
+        return key
+
+    def moves(self, board: Board) -> list[tuple[Move, int]]:
+        """ Lists the book moves of a position
+
+        Args:
+            board (Board): The board state
+
+        Returns:
+            list[tuple[Move, int]]: Every legal book move and its weight, in book order
+        """
+        key = PolyglotBook.key(board)
+        keys = self.entries["key"]
+        start = int(np.searchsorted(keys, key, side="left"))
+        end = int(np.searchsorted(keys, key, side="right"))
+        if start == end:
+            return []
+
+        legal_codes = MoveGenerator.legal_code_list(board, board.tolist())
+        found = []
+        for entry in self.entries[start:end]:
+            code = PolyglotBook.decode(board, int(entry["move"]), legal_codes)
+            if code is not None:
+                found.append((Move.from_code(code), int(entry["weight"])))
+        return found
+
+    @staticmethod
+    def decode(board: Board, book_move: int, legal_codes: list[int]) -> int | None:
+        """ Finds the legal move matching a Polyglot move
+
+        Args:
+            board (Board): The board state
+            book_move (int): The 16 bit Polyglot move (to file, to rank, from file, from rank, promotion, 3 bits each)
+            legal_codes (list[int]): The legal moves of the position
+
+        Returns:
+            int | None: The encoded move, None if it is not legal
+        """
+        target_square = book_move & 0x3f
+        initial_square = (book_move >> 6) & 0x3f
+        promotion = (book_move >> 12) & 7 # 0 for none, then knight, bishop, rook, queen
+        if (initial_square, target_square) in CASTLING_TARGETS and board.mailbox[initial_square] & 7 == Pieces.KING:
+            target_square = CASTLING_TARGETS[initial_square, target_square]
+        for code in legal_codes:
+            if MOVE_FROM[code] == initial_square and MOVE_TO[code] == target_square:
+                if (((code >> 12) & 3) + 1 if code & 0x8000 else 0) == promotion:
+                    return code
+        return None
+
+    def choose(self, board: Board, best: bool = False, rng: random.Random = None) -> Move | None:
+        """ Picks a book move
+
+        Args:
+            board (Board): The board state
+            best (bool, optional): Returns the highest weighted move instead of a weighted random one
+            rng (random.Random, optional): The random number generator, the module's by default
+
+        Returns:
+            Move | None: The book move, None if the position is not in the book
+        """
+        candidates = [(move, weight) for move, weight in self.moves(board) if weight > 0]
+        if not candidates:
+            return None
+        if best:
+            return max(candidates, key=lambda candidate: candidate[1])[0]
+        moves, weights = zip(*candidates)
+        return (rng or random).choices(moves, weights)[0]
+
+    def close(self) -> None:
+        """ Drops the mapping of the book file, the file is unmapped once no returned array refers to it """
+        self.entries = np.zeros(0, dtype=ENTRY)
\ No newline at end of file
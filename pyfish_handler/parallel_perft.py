@@ -0,0 +1,159 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+# third-party
+import numpy as np
+
+# project
+from .board import Board, IntBoard
+from .move import move_to_uci
+from .move_generator import MoveGenerator
+from .move_maker import MoveMaker
+from .perft import Perft
+from .perft_cache import PerftCache
+from .transposition_table import TranspositionTable
+
+# (raw 16 x uint64 bitboards, turn, castling rights, en passant square, halfmove clock, fullmove number),
+# the picklable form of a board
+PackedBoard = tuple[bytes, bool, int, int | None, int, int]
+
+CHUNKS_PER_WORKER = 4 # enough chunks to balance uneven subtrees, few enough that IPC stays negligible
+
+# per worker process state, set by ParallelPerft.initialize
+_worker_backend = "numpy"
+_worker_table = None
+
+class ParallelPerft:
+    """ Perft split over several processes, each one runs the single threaded Perft on its own core
+
+    - The tree is expanded to split_depth plies in the parent and the frontier positions are dealt round-robin into
+      about CHUNKS_PER_WORKER chunks per worker, a chunk is counted in one call so the IPC cost does not grow
+      with the number of frontier positions
+        - split_depth 1 is a plain root split, 2 or more gives enough positions to balance 32 cores
+    - Boards are shipped as raw 16 x uint64 buffers plus the game state instead of pickled Board objects
+    - The counts are summed per root move and the busy time and node rate of every worker is reported
+    - A hash table or PerftCache is private to its worker, positions reached in two workers are counted twice
+    """
+    @staticmethod
+    def pack(board: Board) -> PackedBoard:
+        """ Converts a board of any backend into its picklable form """
+        return np.array(board.tolist(), dtype="<u8").tobytes(), board.turn, board.castling_rights, board.en_passant, board.halfmove, board.fullmove
+
+    @staticmethod
+    def unpack(packed: PackedBoard, backend: str = "numpy") -> Board:
+        """ Rebuilds a board from its picklable form """
+        bitboards, *state = packed
+        return Board((np.frombuffer(bitboards, dtype="<u8"), *state), backend=backend)
+
+    @staticmethod
+    def initialize(backend: str, hash_mb: float, cache_mb: float = 0) -> None:
+        """ Runs once in every worker process """
+        global _worker_backend, _worker_table # pylint: disable=global-statement
+        _worker_backend = backend
+        _worker_table = PerftCache(cache_mb) if cache_mb else TranspositionTable(hash_mb) if hash_mb else None
+
+    @staticmethod
+    def count(chunk: list[tuple[str, PackedBoard]], depth: int) -> tuple[dict[str, int], float, int]:
+        """ Counts the subtrees of a chunk of frontier positions in a worker process
+
+        Returns:
+            tuple[dict[str, int], float, int]: The node count of every root move in the chunk, the busy time and the worker pid
+        """
+        start = time.perf_counter()
+        counts = {}
+        move_maker = MoveMaker()
+        for root_move, packed in chunk:
+            nodes = Perft.perft(ParallelPerft.unpack(packed, _worker_backend), depth, move_maker, _worker_table)
+            counts[root_move] = counts.get(root_move, 0) + nodes
+        return counts, time.perf_counter() - start, os.getpid()
+
+    @staticmethod
+    def frontier(board: Board, split_depth: int) -> list[tuple[str, PackedBoard]]:
+        """ Lists the positions split_depth plies below the root
+
+        Args:
+            board (Board): The root position, restored before returning
+            split_depth (int): The number of plies expanded in the parent process (at least 1)
+
+        Returns:
+            list[tuple[str, PackedBoard]]: The root move leading to every frontier position and the position
+        """
+        move_maker = MoveMaker()
+        tasks = []
+
+        def expand(root_move: str, ply: int) -> None:
+            if ply == split_depth:
+                tasks.append((root_move, ParallelPerft.pack(board)))
+                return
+            for move in MoveGenerator.legal_code_list(board, board.tolist()):
+                move_maker.make_move(board, move)
+                expand(root_move or move_to_uci(move), ply + 1)
+                move_maker.unmake_move(board)
+
+        expand("", 0)
+        return tasks
+
+    @staticmethod
+    def divide(board: Board, depth: int, workers: int = None, split_depth: int = 1, hash_mb: float = 0,
+               verbose: bool = True, cache_mb: float = 0) -> tuple[dict[str, int], dict[int, tuple[int, float]]]:
+        """ Counts the leaf nodes below every root move with a pool of worker processes
+
+        Args:
+            board (Board): The board state (any backend, the workers use the same backend)
+            depth (int): The depth to search to (at least 1)
+            workers (int, optional): The number of processes, defaults to the number of cores
+            split_depth (int, optional): The number of plies expanded before the tree is split
+            hash_mb (float, optional): Size of the hashed perft table of every worker, 0 to disable
+            verbose (bool, optional): Prints the counts, the worker rates and a summary if True
+            cache_mb (float, optional): Size of the PerftCache of every worker, replaces hash_mb, 0 to disable
+
+        Returns:
+            tuple[dict[str, int], dict[int, tuple[int, float]]]:
+                the node count of every root move in UCI notation and the (nodes, busy seconds) of every worker pid
+        """
+        split_depth = max(1, min(split_depth, depth))
+        workers = workers or os.cpu_count() or 1
+        backend = "int" if isinstance(board, IntBoard) else "numpy"
+        start = time.perf_counter()
+        tasks = ParallelPerft.frontier(board, split_depth)
+        counts = {}
+        for move in MoveGenerator.legal_code_list(board, board.tolist()):
+            counts[move_to_uci(move)] = 0
+        worker_stats = {}
+
+        with ProcessPoolExecutor(workers, initializer=ParallelPerft.initialize, initargs=(backend, hash_mb, cache_mb)) as executor:
+            chunk_count = max(1, min(len(tasks), workers * CHUNKS_PER_WORKER))
+            chunks = [tasks[index::chunk_count] for index in range(chunk_count)]
+            futures = [executor.submit(ParallelPerft.count, chunk, depth - split_depth) for chunk in chunks]
+            for future in as_completed(futures):
+                chunk_counts, busy, pid = future.result()
+                for root_move, nodes in chunk_counts.items():
+                    counts[root_move] += nodes
+                nodes = sum(chunk_counts.values())
+                worker_nodes, worker_busy = worker_stats.get(pid, (0, 0.0))
+                worker_stats[pid] = (worker_nodes + nodes, worker_busy + busy)
+        elapsed = time.perf_counter() - start
+
+        if verbose:
+            for move, nodes in counts.items():
+                print(f"{move}: {nodes}")
+            print(f"\n{'worker':>8} | {'nodes':>10} | {'busy':>8} | {'nps':>9}")
+            for pid, (nodes, busy) in sorted(worker_stats.items()):
+                print(f"{pid:>8} | {nodes:>10} | {busy:>7.3f}s | {nodes / max(busy, 1e-9):>9.0f}")
+            nodes = sum(counts.values())
+            print(f"\npositions: {len(tasks)}\nchunks: {len(chunks)}\nnodes: {nodes}\ntime: {elapsed:.3f}s\nnps: {nodes / max(elapsed, 1e-9):.0f}")
+        return counts, worker_stats
\ No newline at end of file
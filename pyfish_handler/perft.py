@@ -0,0 +1,173 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import argparse
+import time
+
+# project
+from .board import Board
+from .move_generator import MoveGenerator
+from .move import move_to_uci
+from .move_buffer import MoveBuffer, MAX_MOVES
+from .move_maker import MoveMaker
+from .perft_cache import PerftCache
+from .transposition_table import TranspositionTable
+
+# reference: https://www.chessprogramming.org/Perft_Results
+# (name, fen, node counts for depth 1, 2, 3, ...)
+REFERENCE_POSITIONS = (
+    ("initial", "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1",
+     (20, 400, 8902, 197281, 4865609, 119060324)),
+    ("kiwipete", "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1",
+     (48, 2039, 97862, 4085603, 193690690)),
+    ("position 3", "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+     (14, 191, 2812, 43238, 674624, 11030083)),
+    ("position 4", "r3k2r/Pppp1ppp/1b3nbN/nP6/BBP1P3/q4N2/Pp1P2PP/R2Q1RK1 w kq - 0 1",
+     (6, 264, 9467, 422333, 15833292)),
+    ("position 5", "rnbq1k1r/pp1Pbppp/2p5/8/2B5/8/PPP1NnPP/RNBQK2R w KQ - 1 8",
+     (44, 1486, 62379, 2103487, 89941194)),
+    ("position 6", "r4rk1/1pp1qppp/p1np1n2/2b1p1B1/2B1P1b1/P1NP1N2/1PP1QPPP/R4RK1 w - - 0 10",
+     (46, 2079, 89890, 3894594, 164075551)),
+)
+
+class Perft:
+    """ Counts the leaf nodes of the legal move tree, used to verify move generation and to
+    measure its throughput
+    reference: https://www.chessprogramming.org/Perft
+    """
+    @staticmethod
+    def perft(board: Board, depth: int, move_maker: MoveMaker = None, table: TranspositionTable | PerftCache = None,
+              buffer: MoveBuffer = None) -> int:
+        """ Counts the leaf nodes at a given depth (the last ply is bulk counted)
+
+        Args:
+            board (Board): The board state (any backend), restored before returning
+            depth (int): The depth to search to
+            move_maker (MoveMaker, optional): The move maker holding the undo stack
+            table (TranspositionTable | PerftCache, optional): Caches subtree counts by Zobrist key (hashed perft),
+                a PerftCache caches the move lists as well
+            buffer (MoveBuffer, optional): The move slots, indexed by the remaining depth
+
+        Returns:
+            int: The number of leaf nodes
+        """
+        if move_maker is None:
+            move_maker = MoveMaker()
+        if buffer is None:
+            buffer = MoveBuffer(max(depth, 0) + 1)
+        if table is not None and depth > 1:
+            nodes = table.probe_count(board.zobrist, depth)
+            if nodes is not None:
+                return nodes
+        if depth <= 0:
+            return 1
+        if isinstance(table, PerftCache):
+            moves = table.moves(board)
+            start, count = 0, len(moves)
+        else:
+            moves = buffer.moves
+            start, count = depth * MAX_MOVES, buffer.generate(board, depth)
+        if depth == 1:
+            return count
+        nodes = 0
+        for slot in range(start, start + count):
+            move_maker.make_move(board, moves[slot])
+            nodes += Perft.perft(board, depth - 1, move_maker, table, buffer)
+            move_maker.unmake_move(board)
+        if table is not None:
+            table.store_count(board.zobrist, depth, nodes)
+        return nodes
+
+    @staticmethod
+    def divide(board: Board, depth: int, verbose: bool = True, table: TranspositionTable | PerftCache = None) -> dict[str, int]:
+        """ Counts the leaf nodes below every root move, reports the total and the node rate
+
+        Args:
+            board (Board): The board state
+            depth (int): The depth to search to (at least 1)
+            verbose (bool, optional): Prints one line per root move and a summary if True
+            table (TranspositionTable | PerftCache, optional): Enables hashed perft
+
+        Returns:
+            dict[str, int]: The node count of every root move in UCI notation
+        """
+        move_maker = MoveMaker()
+        buffer = MoveBuffer(depth + 1)
+        counts = {}
+        start = time.perf_counter()
+        for move in MoveGenerator.legal_code_list(board, board.tolist()):
+            move_maker.make_move(board, move)
+            counts[move_to_uci(move)] = Perft.perft(board, depth - 1, move_maker, table, buffer)
+            move_maker.unmake_move(board)
+            if verbose:
+                print(f"{move_to_uci(move)}: {counts[move_to_uci(move)]}")
+        elapsed = time.perf_counter() - start
+        if verbose:
+            nodes = sum(counts.values())
+            print(f"\nnodes: {nodes}\ntime: {elapsed:.3f}s\nnps: {nodes / max(elapsed, 1e-9):.0f}")
+        return counts
+
+    @staticmethod
+    def suite(max_depth: int = 3, backend: str = "numpy", max_nodes: int = 10_000_000, table: TranspositionTable | PerftCache = None) -> bool:
+        """ Runs the reference positions and compares every count with the known results
+
+        Args:
+            max_depth (int, optional): The deepest depth to run for every position
+            backend (str, optional): The board backend to use
+            max_nodes (int, optional): Depths whose expected count exceeds this are skipped
+            table (TranspositionTable | PerftCache, optional): Enables hashed perft
+
+        Returns:
+            bool: True if every count matched
+        """
+        passed = True
+        total_nodes, total_time = 0, 0.0
+        for name, fen, expected_counts in REFERENCE_POSITIONS:
+            for depth, expected in enumerate(expected_counts[:max_depth], start=1):
+                if expected > max_nodes:
+                    break
+                board = Board(fen, backend=backend)
+                start = time.perf_counter()
+                nodes = Perft.perft(board, depth, table=table)
+                elapsed = time.perf_counter() - start
+                total_nodes += nodes
+                total_time += elapsed
+                status = "ok" if nodes == expected else f"FAILED (expected {expected})"
+                passed &= nodes == expected
+                print(f"{name:<10} | depth {depth} | {nodes:>10} nodes | {nodes / max(elapsed, 1e-9):>9.0f} nps | {status}")
+        print(f"{'total':<10} |         | {total_nodes:>10} nodes | {total_nodes / max(total_time, 1e-9):>9.0f} nps | {'ok' if passed else 'FAILED'}")
+        return passed
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="perft driver, runs the reference suite without a fen")
+    parser.add_argument("fen", nargs="?", help="the position to divide")
+    parser.add_argument("-d", "--depth", type=int, default=3, help="the depth to search to")
+    parser.add_argument("--backend", default="numpy", help="the board backend (numpy or int)")
+    parser.add_argument("--max-nodes", type=int, default=10_000_000, help="skip suite depths above this count")
+    parser.add_argument("--hash", type=float, default=0, help="transposition table size in MB for hashed perft")
+    parser.add_argument("--cache", type=float, default=0, help="LRU cache size in MB for node counts and move lists (replaces --hash)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="divide over this many processes (0 for one per core)")
+    parser.add_argument("--split", type=int, default=1, help="plies expanded before the tree is split over the processes")
+    args = parser.parse_args()
+
+    hash_table = PerftCache(args.cache) if args.cache else TranspositionTable(args.hash) if args.hash else None
+    if args.fen and args.jobs != 1:
+        from .parallel_perft import ParallelPerft # pylint: disable=import-outside-toplevel
+        ParallelPerft.divide(Board(args.fen, backend=args.backend), args.depth, args.jobs or None, args.split, args.hash, cache_mb=args.cache)
+    elif args.fen:
+        Perft.divide(Board(args.fen, backend=args.backend), args.depth, table=hash_table)
+    else:
+        suite_passed = Perft.suite(args.depth, args.backend, args.max_nodes, hash_table)
+        if isinstance(hash_table, PerftCache):
+            print(" | ".join(f"{name} {value:.3f}" if isinstance(value, float) else f"{name} {value}" for name, value in hash_table.stats().items()))
+        raise SystemExit(0 if suite_passed else 1)
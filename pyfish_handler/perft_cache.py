@@ -0,0 +1,136 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+from array import array
+from collections import OrderedDict
+
+# project
+from .board import Board
+from .move_generator import MoveGenerator, MAX_MOVES
+
+MOVES = -1 # the depth slot of move list entries
+# approximate CPython cost of one entry: the dict slot and linked list node, the (key, depth) tuple and its ints
+ENTRY_BYTES = 200
+ARRAY_BYTES = 64 # the header of an array('H'), its items take 2 bytes each
+
+class PerftCache:
+    """ Bounded LRU cache of perft node counts and legal move lists, keyed by Zobrist key
+
+    - Entries live in one OrderedDict under (key, depth) for counts and (key, MOVES) for move lists, a hit moves the
+      entry to the end and the least recently used entries are evicted from the front once the memory cap is reached
+    - The memory use is estimated from the entry count and the move list lengths (ENTRY_BYTES, ARRAY_BYTES)
+    - Unlike the TranspositionTable buckets, nothing is overwritten by an unrelated position, so a cache kept
+      across perft runs of overlapping positions answers every subtree it has seen until it is evicted
+    - probe_count/store_count mirror the TranspositionTable methods, so Perft accepts either
+    - Hits and misses are counted separately for counts and move lists, see stats()
+    """
+    def __init__(self, size_mb: float = 64) -> None:
+        self.capacity = int(size_mb * (1 << 20))
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.count_hits = self.count_misses = 0
+        self.move_hits = self.move_misses = 0
+        self.evictions = 0
+        self.scratch = array('H', bytes(2 * MAX_MOVES)) # generation slots, the cached list is a copy
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @property
+    def size_mb(self) -> float:
+        return self.capacity / (1 << 20)
+
+    def clear(self) -> None:
+        """ Drops every entry and resets the counters """
+        self.entries.clear()
+        self.bytes = 0
+        self.count_hits = self.count_misses = 0
+        self.move_hits = self.move_misses = 0
+        self.evictions = 0
+
+    def insert(self, entry_key: tuple[int, int], value: int | array, size: int) -> None:
+        """ Adds an entry and evicts the least recently used ones beyond the memory cap """
+        entries = self.entries
+        if entry_key in entries:
+            return
+        entries[entry_key] = value
+        self.bytes += size
+        while self.bytes > self.capacity and entries:
+            _, evicted = entries.popitem(last=False)
+            self.bytes -= ENTRY_BYTES + (ARRAY_BYTES + 2 * len(evicted) if isinstance(evicted, array) else 0)
+            self.evictions += 1
+
+    def probe_count(self, key: int, depth: int) -> int | None:
+        """ Looks up a perft node count
+
+        Args:
+            key (int): The Zobrist key of the position
+            depth (int): The perft depth
+
+        Returns:
+            int | None: The node count, None on a miss
+        """
+        nodes = self.entries.get((key, depth))
+        if nodes is None:
+            self.count_misses += 1
+            return None
+        self.entries.move_to_end((key, depth))
+        self.count_hits += 1
+        return nodes
+
+    def store_count(self, key: int, depth: int, count: int) -> None:
+        """ Stores a perft node count
+
+        Args:
+            key (int): The Zobrist key of the position
+            depth (int): The perft depth
+            count (int): The number of leaf nodes
+        """
+        self.insert((key, depth), count, ENTRY_BYTES)
+
+    def moves(self, board: Board) -> array:
+        """ Returns the legal moves of a position, generated on a miss
+
+        Args:
+            board (Board): The board state
+
+        Returns:
+            array: The encoded legal moves as array('H'), shared with the cache and must not be modified
+        """
+        entry_key = (board.zobrist, MOVES)
+        codes = self.entries.get(entry_key)
+        if codes is not None:
+            self.entries.move_to_end(entry_key)
+            self.move_hits += 1
+            return codes
+        self.move_misses += 1
+        scratch = self.scratch
+        codes = scratch[:MoveGenerator.legal_codes(board, board.tolist(), scratch)]
+        self.insert(entry_key, codes, ENTRY_BYTES + ARRAY_BYTES + 2 * len(codes))
+        return codes
+
+    def stats(self) -> dict[str, int | float]:
+        """ Returns the entry count, the estimated memory use, the hit and miss counters and the hit rates """
+        count_probes = self.count_hits + self.count_misses
+        move_probes = self.move_hits + self.move_misses
+        return {
+            "entries": len(self.entries),
+            "mb": self.bytes / (1 << 20),
+            "count_hits": self.count_hits,
+            "count_misses": self.count_misses,
+            "count_hit_rate": self.count_hits / count_probes if count_probes else 0.0,
+            "move_hits": self.move_hits,
+            "move_misses": self.move_misses,
+            "move_hit_rate": self.move_hits / move_probes if move_probes else 0.0,
+            "evictions": self.evictions,
+        }
\ No newline at end of file
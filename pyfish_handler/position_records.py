@@ -0,0 +1,211 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import os
+from typing import Iterable
+
+# third-party
+import numpy as np
+
+# project
+from .board import Board, IntBoard
+from .fen_stream import PositionBatch
+from .zobrist import Zobrist
+
+MAGIC = b"PYFISHPS"
+VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("record_size", "<u4")])
+
+# one position: the 16 bitboards in the Board layout, the packed game state and the Zobrist key
+RECORD = np.dtype([("bitboards", "<u8", (16,)), ("state", "<u8"), ("zobrist", "<u8")])
+
+# state word layout
+TURN_BIT = 0            # 1 bit, set for white
+CASTLING_SHIFT = 1      # 4 bits, KQkq
+EN_PASSANT_SHIFT = 5    # 7 bits, 64 if there is no en passant square
+HALFMOVE_SHIFT = 16     # 16 bits
+FULLMOVE_SHIFT = 32     # 16 bits
+NO_SQUARE = 64
+
+class PositionRecords:
+    """ Fixed-width binary position files that are read through np.memmap without parsing
+
+    - A 16 byte header (magic, version, record size) is followed by 144 byte records:
+        - bitboards: the 16 uint64 bitboards in the Board layout (aggregates included)
+        - state: turn (bit 0), castling rights (bits 1-4), en passant square (bits 5-11, 64 for none),
+          halfmove clock (bits 16-31) and fullmove number (bits 32-47)
+        - zobrist: the key of the position, so that boards need no hashing when they are viewed
+    - open() maps the file, records["bitboards"] is then an (N, 16) view of the whole file
+      that BatchEvaluation and friends accept directly
+    - view() wraps one record in a numpy Board without copying, use deepcopy() before making moves
+      on a read-only mapping
+    """
+    @staticmethod
+    def pack_state(turns: np.ndarray, castling_rights: np.ndarray, en_passant: np.ndarray,
+                   halfmove: np.ndarray, fullmove: np.ndarray) -> np.ndarray:
+        """ Packs the game state fields into state words (en passant -1 or 64 means none) """
+        en_passant = np.where(np.asarray(en_passant) < 0, NO_SQUARE, en_passant).astype(np.uint64)
+        return np.asarray(turns, dtype=np.uint64) << np.uint64(TURN_BIT) \
+            | np.asarray(castling_rights, dtype=np.uint64) << np.uint64(CASTLING_SHIFT) \
+            | en_passant << np.uint64(EN_PASSANT_SHIFT) \
+            | np.asarray(halfmove, dtype=np.uint64) << np.uint64(HALFMOVE_SHIFT) \
+            | np.asarray(fullmove, dtype=np.uint64) << np.uint64(FULLMOVE_SHIFT)
+
+    @staticmethod
+    def unpack_state(states: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """ Splits state words into (turns, castling rights, en passant squares, halfmove, fullmove),
+        the en passant square is 64 where there is none """
+        states = np.asarray(states, dtype=np.uint64)
+        return (
+            (states >> np.uint64(TURN_BIT) & np.uint64(1)).astype(bool),
+            (states >> np.uint64(CASTLING_SHIFT) & np.uint64(0xf)).astype(np.uint8),
+            (states >> np.uint64(EN_PASSANT_SHIFT) & np.uint64(0x7f)).astype(np.uint8),
+            (states >> np.uint64(HALFMOVE_SHIFT) & np.uint64(0xffff)).astype(np.uint16),
+            (states >> np.uint64(FULLMOVE_SHIFT) & np.uint64(0xffff)).astype(np.uint16),
+        )
+
+    @staticmethod
+    def from_batch(batch: PositionBatch) -> np.ndarray:
+        """ Converts a parsed FEN/EPD batch into records
+
+        Args:
+            batch (PositionBatch): The positions
+
+        Returns:
+            np.ndarray: The records
+        """
+        records = np.zeros(len(batch.turns), dtype=RECORD)
+        records["bitboards"] = batch.bitboards
+        # en passant squares no pawn can capture on are dropped, as Board and MoveMaker do
+        en_passant = np.full(len(records), -1, dtype=np.int8)
+        for row in range(len(records)):
+            bitboards, turn = batch.bitboards[row].tolist(), bool(batch.turns[row])
+            square = Zobrist.capturable(bitboards, turn, None if batch.en_passant[row] < 0 else int(batch.en_passant[row]))
+            en_passant[row] = -1 if square is None else square
+            records["zobrist"][row] = Zobrist.hash(bitboards, turn, int(batch.castling_rights[row]), square)
+        records["state"] = PositionRecords.pack_state(batch.turns, batch.castling_rights, en_passant, batch.halfmove, batch.fullmove)
+        return records
+
+    @staticmethod
+    def from_boards(boards: Iterable[Board]) -> np.ndarray:
+        """ Converts boards of any backend into records
+
+        Args:
+            boards (Iterable[Board]): The boards
+
+        Returns:
+            np.ndarray: The records
+        """
+        boards = list(boards)
+        records = np.zeros(len(boards), dtype=RECORD)
+        for row, board in enumerate(boards):
+            records["bitboards"][row] = board.tolist()
+            records["zobrist"][row] = board.zobrist
+        records["state"] = PositionRecords.pack_state(
+            [board.turn for board in boards], [board.castling_rights for board in boards],
+            [NO_SQUARE if board.en_passant is None else board.en_passant for board in boards],
+            [board.halfmove for board in boards], [board.fullmove for board in boards]
+        )
+        return records
+
+    @staticmethod
+    def write(path: str, items: Iterable[Board | PositionBatch | np.ndarray], append: bool = False) -> int:
+        """ Writes positions to a record file
+
+        Args:
+            path (str): The file path
+            items (Iterable[Board | PositionBatch | np.ndarray]): Boards, parsed batches or record arrays
+            append (bool, optional): Appends to an existing file instead of overwriting it
+
+        Returns:
+            int: The number of records written
+        """
+        append = append and os.path.exists(path) and os.path.getsize(path) > 0
+        count = 0
+        with open(path, "ab" if append else "wb") as file:
+            if not append:
+                np.array((MAGIC, VERSION, RECORD.itemsize), dtype=HEADER).tofile(file)
+            boards = []
+            for item in items:
+                if isinstance(item, PositionBatch):
+                    records = PositionRecords.from_batch(item)
+                elif isinstance(item, (Board, IntBoard)):
+                    boards.append(item)
+                    continue
+                else:
+                    records = np.asarray(item, dtype=RECORD)
+                if boards:
+                    count += PositionRecords.write_records(file, PositionRecords.from_boards(boards))
+                    boards = []
+                count += PositionRecords.write_records(file, records)
+            if boards:
+                count += PositionRecords.write_records(file, PositionRecords.from_boards(boards))
+        return count
+
+    @staticmethod
+    def write_records(file, records: np.ndarray) -> int:
+        """ Appends raw records to an open file and returns how many were written """
+        records.tofile(file)
+        return len(records)
+
+    @staticmethod
+    def open(path: str, mode: str = "r") -> np.memmap:
+        """ Maps a record file into memory
+
+        Args:
+            path (str): The file path
+            mode (str, optional): "r" for read-only, "r+" to modify the records in place
+
+        Returns:
+            np.memmap: The records, records["bitboards"] is an (N, 16) uint64 view
+        """
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) == 0 or header["magic"][0] != MAGIC:
+            raise ValueError(f"{path} is not a position record file")
+        if header["version"][0] != VERSION or header["record_size"][0] != RECORD.itemsize:
+            raise ValueError(f"{path} has record format version {header['version'][0]}, expected {VERSION}")
+        count = (os.path.getsize(path) - HEADER.itemsize) // RECORD.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=RECORD)
+        return np.memmap(path, dtype=RECORD, mode=mode, offset=HEADER.itemsize, shape=(count,))
+
+    @staticmethod
+    def view(records: np.ndarray, index: int) -> Board:
+        """ Wraps one record in a numpy Board that shares the record's memory
+
+        Args:
+            records (np.ndarray): Records returned by open()
+            index (int): The record index
+
+        Returns:
+            Board: The board, writes go straight to the mapping
+        """
+        record = records[index]
+        turn, castling_rights, en_passant, halfmove, fullmove = PositionRecords.unpack_state(record["state"])
+        board = records["bitboards"][index].view(Board)
+        board.turn = bool(turn)
+        board.castling_rights = int(castling_rights)
+        board.en_passant = None if en_passant == NO_SQUARE else int(en_passant)
+        board.halfmove = int(halfmove)
+        board.fullmove = int(fullmove)
+        board.history = []
+        board.key_counts = {}
+        board.zobrist = int(record["zobrist"])
+        board.mailbox = Board.build_mailbox(board)
+        return board
+
+    @staticmethod
+    def board(records: np.ndarray, index: int, backend: str = "numpy") -> Board:
+        """ Copies one record into a new board of the given backend """
+        view = PositionRecords.view(records, index)
+        return Board((view, view.turn, view.castling_rights, view.en_passant, view.halfmove, view.fullmove), backend=backend)
\ No newline at end of file
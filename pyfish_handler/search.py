@@ -0,0 +1,382 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import time
+from typing import Callable
+
+# project
+from .instrumentation import Instrumentation
+from .board import Board, NO_PIECE
+from .evaluation import Evaluation, PIECE_VALUES
+from .move import Move
+from .pieces import Pieces
+from .move_generator import MoveGenerator
+from .move_buffer import MoveBuffer, MAX_MOVES
+from .move_maker import MoveMaker, PROMOTION_PIECES
+from .nnue import NNUE, NNUEMoveMaker
+from .static_exchange import StaticExchange
+from .tablebase import Tablebases
+from .transposition_table import TranspositionTable, Bound
+
+MAX_PLY = 128
+INFINITY = 32000
+MATE = 31000
+MATE_BOUND = MATE - MAX_PLY # scores beyond this are mates
+TB_WIN = MATE_BOUND - MAX_PLY # tablebase wins score below the mates, closer wins score higher
+CHECK_MASK = 255 # the limits are checked every 256 nodes so that stop is honoured quickly
+
+# move ordering scores, higher is searched first
+TT_MOVE_SCORE = 1 << 30
+CAPTURE_SCORE = 1 << 28
+KILLER_SCORE = 1 << 27
+
+class SearchAborted(Exception):
+    """ Raised inside the search tree when a hard limit is hit, unwinds to the root """
+
+class Search:
+    """ Negamax alpha-beta search with iterative deepening
+    reference: https://www.chessprogramming.org/Alpha-Beta
+
+    - Quiescence search on captures at the leaves, captures losing material by static exchange are pruned
+    - Move ordering: transposition table move, MVV-LVA captures, killer moves, history heuristic, losing captures
+    - Limits:
+        - max_depth: the deepest iteration
+        - soft_time: no new iteration is started after this many seconds
+        - hard_time: the search is aborted after this many seconds
+        - max_nodes: the search is aborted after this many nodes
+        - stop(): aborts the search from another thread
+        - stop_event: any object with is_set() (e.g. a multiprocessing.Event), aborts the search from another process
+    - When a limit hits mid-iteration the best root move found so far is returned
+    - Positions repeated from board.history and positions past the 50 move rule score as draws
+    - With tablebases, covered positions return their exact result without being searched, a covered root
+      position is answered from the distances to zeroing
+    - With a network, positions are evaluated by the NNUE, its accumulators follow the moves of the search
+    """
+    def __init__(self, table: TranspositionTable = None, stop_event=None, tablebases: Tablebases = None, network: NNUE = None) -> None:
+        self.table = table if table is not None else TranspositionTable()
+        self.stop_event = stop_event
+        self.tablebases = tablebases
+        self.network = network
+        self.move_maker = NNUEMoveMaker(network) if network is not None else MoveMaker()
+        self.evaluate = self.move_maker.accumulators.evaluate if network is not None else Evaluation.evaluate
+        self.buffer = MoveBuffer(MAX_PLY)
+        self.stopped = False
+        self.reset()
+
+    def reset(self) -> None:
+        """ Clears the per-search state (counters, killers and history) """
+        self.nodes = 0
+        self.qnodes = 0
+        self.tb_hits = 0
+        self.killers = [[0, 0] for _ in range(MAX_PLY)]
+        self.history = [0] * 4096
+        self.best_move = 0
+        self.best_score = -INFINITY
+
+    def stop(self) -> None:
+        """ Asks a running search to return as soon as possible """
+        self.stopped = True
+
+    def clear_stop(self) -> None:
+        """ Forgets an earlier stop, called before a search is started on another thread so that
+        a stop arriving before the thread runs is not lost """
+        self.stopped = False
+
+    def search(self, board: Board, max_depth: int = MAX_PLY - 1, soft_time: float = None, hard_time: float = None,
+               max_nodes: int = None, info: Callable = None, start_depth: int = 1, new_search: bool = True,
+               clear_stop: bool = True) -> tuple[Move | None, int]:
+        """ Searches a position with iterative deepening
+
+        Args:
+            board (Board): The position to search, restored before returning
+            max_depth (int, optional): The deepest iteration
+            soft_time (float, optional): Seconds after which no new iteration is started
+            hard_time (float, optional): Seconds after which the search is aborted
+            max_nodes (int, optional): Nodes after which the search is aborted
+            info (Callable, optional): Called after every iteration with (depth, score, nodes, seconds, pv)
+            start_depth (int, optional): The first iteration, Lazy SMP helpers stagger it
+            new_search (bool, optional): Advances the table generation, False when the caller already did it
+            clear_stop (bool, optional): Forgets an earlier stop, False when the caller called clear_stop() itself
+
+        Returns:
+            tuple[Move | None, int]: The best move (None if there are no legal moves) and its score
+        """
+        self.reset()
+        if clear_stop:
+            self.stopped = False
+        if new_search:
+            self.table.new_search()
+        self.start_time = time.perf_counter()
+        self.hard_deadline = self.start_time + hard_time if hard_time is not None else None
+        self.max_nodes = max_nodes
+        self.root_ply = self.move_maker.ply
+        if self.network is not None:
+            self.move_maker.refresh(board)
+
+        root_moves = MoveGenerator.legal_code_list(board, board.tolist())
+        if not root_moves:
+            return None, -MATE if MoveGenerator.in_check(board) else 0
+        self.best_move = root_moves[0]
+
+        if self.tablebases is not None:
+            root = self.tablebases.root_move(board)
+            if root is not None:
+                move, wdl = root
+                self.tb_hits += 1
+                self.best_move, self.best_score = int(move), wdl * TB_WIN
+                if info is not None:
+                    info(1, self.best_score, 0, time.perf_counter() - self.start_time, [move])
+                return move, self.best_score
+
+        for depth in range(min(start_depth, max_depth), max_depth + 1):
+            try:
+                score = self.negamax(board, depth, -INFINITY, INFINITY, 0)
+            except SearchAborted:
+                while self.move_maker.ply > self.root_ply:
+                    self.move_maker.unmake_move(board)
+                break
+            self.best_score = score
+            elapsed = time.perf_counter() - self.start_time
+            if info is not None:
+                info(depth, score, self.nodes + self.qnodes, elapsed, self.principal_variation(board, depth))
+            if abs(score) >= MATE_BOUND or (soft_time is not None and elapsed >= soft_time):
+                break
+
+        Instrumentation.count("Search nodes", self.nodes)
+        Instrumentation.count("Search quiescence nodes", self.qnodes)
+        Instrumentation.count("Search tablebase hits", self.tb_hits)
+        return Move.from_code(self.best_move), self.best_score
+
+    def check_limits(self) -> None:
+        """ Raises SearchAborted if a hard limit was hit, called every CHECK_MASK + 1 nodes """
+        if self.stopped or (self.stop_event is not None and self.stop_event.is_set()) \
+                or (self.hard_deadline is not None and time.perf_counter() >= self.hard_deadline) \
+                or (self.max_nodes is not None and self.nodes + self.qnodes >= self.max_nodes):
+            self.stopped = True
+            raise SearchAborted
+
+    def score_moves(self, board: Board, ply: int, count: int, tt_move: int) -> None:
+        """ Scores the moves of a ply in the move buffer so that the most promising ones are picked first
+
+        Args:
+            board (Board): The board state
+            ply (int): The distance from the root
+            count (int): The number of moves of the ply
+            tt_move (int): The best move stored in the transposition table
+        """
+        killers = self.killers[ply]
+        history = self.history
+        moves, scores = self.buffer.moves, self.buffer.scores
+        mailbox = board.mailbox
+        for slot in range(ply * MAX_MOVES, ply * MAX_MOVES + count):
+            code = moves[slot]
+            if code == tt_move:
+                score = TT_MOVE_SCORE
+            elif code & 0x4000: # captures, including en passant and promotion-captures
+                # most valuable victim first, then least valuable attacker (the piece types are numbered
+                # from king to pawn, so a higher type is a cheaper attacker)
+                victim = mailbox[code & 0x3f]
+                victim_value = PIECE_VALUES[victim & 7] if victim != NO_PIECE else PIECE_VALUES[Pieces.PAWN]
+                attacker = mailbox[(code >> 6) & 0x3f] & 7
+                # only a capture by a more valuable piece can lose material, those sort after the quiet moves
+                exchange = StaticExchange.see(board, code) if PIECE_VALUES[attacker] > victim_value and not code & 0x8000 else 0
+                score = exchange if exchange < 0 else CAPTURE_SCORE + victim_value * 8 + attacker
+            elif code & 0x8000: # quiet promotions
+                score = CAPTURE_SCORE + PIECE_VALUES[PROMOTION_PIECES[(code >> 12) & 3]]
+            elif code in killers:
+                score = KILLER_SCORE - killers.index(code)
+            else:
+                score = history[code & 0xfff]
+            scores[slot] = score
+
+    @Instrumentation.timed
+    def negamax(self, board: Board, depth: int, alpha: int, beta: int, ply: int) -> int:
+        """ Fail-soft negamax alpha-beta search
+
+        Args:
+            board (Board): The board state
+            depth (int): The remaining depth
+            alpha (int): The lower bound
+            beta (int): The upper bound
+            ply (int): The distance from the root
+
+        Returns:
+            int: The score from the point of view of the side to move
+        """
+        # repetitions (of the game history or of the search path) and the 50 move rule are draws
+        if ply and (board.halfmove >= 100 or board.zobrist in board.key_counts):
+            return 0
+        if ply and self.tablebases is not None:
+            wdl = self.tablebases.probe_wdl(board)
+            if wdl is not None:
+                self.tb_hits += 1
+                return wdl * (TB_WIN - ply)
+
+        in_check = MoveGenerator.in_check(board)
+        if in_check:
+            depth += 1 # check extension
+        if depth <= 0 or ply >= MAX_PLY - 1:
+            return self.quiescence(board, alpha, beta, ply)
+
+        self.nodes += 1
+        if self.nodes & CHECK_MASK == 0:
+            self.check_limits()
+
+        # transposition table cutoffs (never at the root, a move must be returned there)
+        key = board.zobrist
+        tt_move = 0
+        entry = self.table.probe(key)
+        if entry is not None:
+            tt_move, tt_score, tt_depth, tt_bound = entry
+            if ply > 0 and tt_depth >= depth:
+                tt_score = Search.score_from_table(tt_score, ply)
+                if tt_bound == Bound.EXACT \
+                        or (tt_bound == Bound.LOWER and tt_score >= beta) \
+                        or (tt_bound == Bound.UPPER and tt_score <= alpha):
+                    return tt_score
+
+        count = self.buffer.generate(board, ply)
+        if not count:
+            return -MATE + ply if in_check else 0
+
+        self.score_moves(board, ply, count, tt_move)
+        original_alpha = alpha
+        best_score, best_move = -INFINITY, 0
+        for index in range(count):
+            code = self.buffer.pick(ply, index, count)
+            self.move_maker.make_move(board, code)
+            score = -self.negamax(board, depth - 1, -beta, -alpha, ply + 1)
+            self.move_maker.unmake_move(board)
+
+            if score > best_score:
+                best_score, best_move = score, code
+                if ply == 0:
+                    self.best_move, self.best_score = code, score
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                if not code & 0xc000: # quiet moves only
+                    killers = self.killers[ply]
+                    if killers[0] != code:
+                        killers[1], killers[0] = killers[0], code
+                    self.history[code & 0xfff] += depth * depth
+                break
+
+        if best_score >= beta:
+            bound = Bound.LOWER
+        elif best_score > original_alpha:
+            bound = Bound.EXACT
+        else:
+            bound = Bound.UPPER
+        self.table.store(key, best_move, Search.score_to_table(best_score, ply), depth, bound)
+        return best_score
+
+    @Instrumentation.timed
+    def quiescence(self, board: Board, alpha: int, beta: int, ply: int) -> int:
+        """ Searches captures only until the position is quiet, or every evasion when in check
+        reference: https://www.chessprogramming.org/Quiescence_Search
+
+        - A side in check cannot stand pat: all its legal moves are searched and having none is mate
+
+        Args:
+            board (Board): The board state
+            alpha (int): The lower bound
+            beta (int): The upper bound
+            ply (int): The distance from the root
+
+        Returns:
+            int: The score from the point of view of the side to move
+        """
+        self.qnodes += 1
+        if self.qnodes & CHECK_MASK == 0:
+            self.check_limits()
+
+        if ply >= MAX_PLY - 1:
+            return self.evaluate(board)
+        in_check = MoveGenerator.in_check(board)
+        if in_check:
+            best_score = -MATE + ply
+        else:
+            best_score = self.evaluate(board)
+            if best_score >= beta:
+                return best_score
+            if best_score > alpha:
+                alpha = best_score
+
+        count = self.buffer.generate(board, ply, captures_only=not in_check)
+        if in_check and count == 0:
+            return best_score
+        self.score_moves(board, ply, count, 0)
+        for index in range(count):
+            code = self.buffer.pick(ply, index, count)
+            if not in_check and self.buffer.scores[ply * MAX_MOVES + index] < 0:
+                break # the rest of the captures lose material by static exchange
+            self.move_maker.make_move(board, code)
+            score = -self.quiescence(board, -beta, -alpha, ply + 1)
+            self.move_maker.unmake_move(board)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def principal_variation(self, board: Board, depth: int) -> list[Move]:
+        """ Follows the best moves stored in the transposition table
+
+        Args:
+            board (Board): The root position, restored before returning
+            depth (int): The maximum length of the line
+
+        Returns:
+            list[Move]: The principal variation
+        """
+        pv = []
+        keys = set()
+        while len(pv) < depth and board.zobrist not in keys:
+            keys.add(board.zobrist)
+            entry = self.table.probe(board.zobrist)
+            if entry is None or entry[0] not in MoveGenerator.legal_code_list(board, board.tolist()):
+                break
+            pv.append(Move.from_code(entry[0]))
+            self.move_maker.make_move(board, entry[0])
+        for _ in pv:
+            self.move_maker.unmake_move(board)
+        return pv
+
+    @staticmethod
+    def score_to_table(score: int, ply: int) -> int:
+        """ Converts mate scores from distance-to-root to distance-to-node before storing """
+        if score >= MATE_BOUND:
+            return score + ply
+        if score <= -MATE_BOUND:
+            return score - ply
+        return score
+
+    @staticmethod
+    def score_from_table(score: int, ply: int) -> int:
+        """ Converts stored mate scores back to distance-to-root """
+        if score >= MATE_BOUND:
+            return score - ply
+        if score <= -MATE_BOUND:
+            return score + ply
+        return score
+
+if __name__ == '__main__':
+    def print_info(depth, score, nodes, seconds, pv):
+        print(f"depth {depth} score {score} nodes {nodes} nps {nodes / max(seconds, 1e-9):.0f} pv {' '.join(move.to_uci() for move in pv)}")
+
+    test_board = Board("r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w KQkq - 0 1")
+    best, best_score = Search().search(test_board, soft_time=2, hard_time=5, info=print_info)
+    print("bestmove", best.to_uci(), best_score)
\ No newline at end of file
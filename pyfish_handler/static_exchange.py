@@ -0,0 +1,127 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# project
+from .instrumentation import Instrumentation
+from .attack_tables import KNIGHT_ATTACKS, KING_ATTACKS, PAWN_ATTACKS, rook_attacks, bishop_attacks
+from .board import Board, NO_PIECE
+from .evaluation import PIECE_VALUES
+from .move import Flags, MOVE_FLAGS, MOVE_FROM, MOVE_TO
+from .pieces import Pieces
+
+# the king is worth more than everything else together so that capturing into a defended square with it never pays
+SEE_VALUES = [PIECE_VALUES.get(piece_type, 0) for piece_type in range(8)]
+SEE_VALUES[Pieces.KING] = 20000
+
+# least valuable attacker first
+ATTACKER_ORDER = (Pieces.PAWN, Pieces.KNIGHT, Pieces.BISHOP, Pieces.ROOK, Pieces.QUEEN, Pieces.KING)
+PROMOTION_TYPES = (Pieces.KNIGHT, Pieces.BISHOP, Pieces.ROOK, Pieces.QUEEN)
+
+class StaticExchange:
+    """ Static exchange evaluation: the material outcome of the capture sequence on one square
+    reference: https://www.chessprogramming.org/SEE_-_The_Swap_Algorithm
+
+    - Both sides recapture with their least valuable attacker, and either may stop when continuing loses material
+    - The attackers of the square are one bitboard, pieces are removed from the occupancy as they capture
+      and the sliders behind them (x-rays) are added by recomputing the slider attacks
+    - Pins are ignored, as usual for SEE
+    """
+    @staticmethod
+    def attackers_to(bitboards: list[int], square: int, occupied: int) -> int:
+        """ Returns every piece of both colors attacking a square
+
+        Args:
+            bitboards (list[int]): The bitboards as plain ints
+            square (int): The square
+            occupied (int): The occupancy used for the sliding pieces
+
+        Returns:
+            int: The bitboard of the attackers
+        """
+        rooks = bitboards[Pieces.WHITE | Pieces.ROOK] | bitboards[Pieces.BLACK | Pieces.ROOK] \
+            | bitboards[Pieces.WHITE | Pieces.QUEEN] | bitboards[Pieces.BLACK | Pieces.QUEEN]
+        bishops = bitboards[Pieces.WHITE | Pieces.BISHOP] | bitboards[Pieces.BLACK | Pieces.BISHOP] \
+            | bitboards[Pieces.WHITE | Pieces.QUEEN] | bitboards[Pieces.BLACK | Pieces.QUEEN]
+        return (PAWN_ATTACKS[1][square] & bitboards[Pieces.WHITE | Pieces.PAWN]) \
+            | (PAWN_ATTACKS[0][square] & bitboards[Pieces.BLACK | Pieces.PAWN]) \
+            | (KNIGHT_ATTACKS[square] & (bitboards[Pieces.WHITE | Pieces.KNIGHT] | bitboards[Pieces.BLACK | Pieces.KNIGHT])) \
+            | (KING_ATTACKS[square] & (bitboards[Pieces.WHITE | Pieces.KING] | bitboards[Pieces.BLACK | Pieces.KING])) \
+            | (rook_attacks(square, occupied) & rooks) \
+            | (bishop_attacks(square, occupied) & bishops)
+
+    @staticmethod
+    @Instrumentation.timed
+    def see(board: Board, move: int) -> int:
+        """ Evaluates the exchange started by a move
+
+        Args:
+            board (Board): The board state (any backend)
+            move (int): The encoded move, usually a capture
+
+        Returns:
+            int: The material won (negative if lost) by the side to move, in centipawns
+        """
+        code = int(move)
+        flags, initial_square, target_square = MOVE_FLAGS[code], MOVE_FROM[code], MOVE_TO[code]
+        bitboards = board.tolist()
+        mailbox = board.mailbox
+
+        occupied = bitboards[Pieces.OCCUPIED] ^ (1 << initial_square)
+        if flags == Flags.EN_PASSANT:
+            gain = [SEE_VALUES[Pieces.PAWN]]
+            occupied ^= 1 << (target_square - 8 if board.turn else target_square + 8)
+        else:
+            victim = mailbox[target_square]
+            gain = [SEE_VALUES[victim & 7] if victim != NO_PIECE else 0]
+        on_square = SEE_VALUES[mailbox[initial_square] & 7] # the value of the piece that would be captured next
+        if flags & 0b1000:
+            promoted = SEE_VALUES[PROMOTION_TYPES[flags & 3]]
+            gain[0] += promoted - SEE_VALUES[Pieces.PAWN]
+            on_square = promoted
+
+        rooks = bitboards[Pieces.WHITE | Pieces.ROOK] | bitboards[Pieces.BLACK | Pieces.ROOK] \
+            | bitboards[Pieces.WHITE | Pieces.QUEEN] | bitboards[Pieces.BLACK | Pieces.QUEEN]
+        bishops = bitboards[Pieces.WHITE | Pieces.BISHOP] | bitboards[Pieces.BLACK | Pieces.BISHOP] \
+            | bitboards[Pieces.WHITE | Pieces.QUEEN] | bitboards[Pieces.BLACK | Pieces.QUEEN]
+        attackers = StaticExchange.attackers_to(bitboards, target_square, occupied) & occupied
+        color = Pieces.BLACK if board.turn else Pieces.WHITE # the side to recapture
+
+        while True:
+            side_attackers = attackers & bitboards[Pieces.ALL_BLACK if color else Pieces.ALL_WHITE]
+            if not side_attackers:
+                break
+            for piece_type in ATTACKER_ORDER:
+                candidates = side_attackers & bitboards[color | piece_type]
+                if candidates:
+                    break
+            if piece_type == Pieces.KING and attackers & ~side_attackers:
+                break # the king cannot capture into a defended square
+
+            # speculative score if the piece on the square is captured, stop once neither side can gain by it
+            if max(-gain[-1], on_square - gain[-1]) < 0:
+                break
+            gain.append(on_square - gain[-1])
+            on_square = SEE_VALUES[piece_type]
+
+            occupied ^= candidates & -candidates
+            # the captured square is vacated by the attacker, sliders lined up behind it join in
+            if piece_type in (Pieces.PAWN, Pieces.BISHOP, Pieces.QUEEN):
+                attackers |= bishop_attacks(target_square, occupied) & bishops
+            if piece_type in (Pieces.ROOK, Pieces.QUEEN):
+                attackers |= rook_attacks(target_square, occupied) & rooks
+            attackers &= occupied
+            color ^= Pieces.BLACK
+
+        # negamax the speculative gains back to the first capture
+        for depth in range(len(gain) - 1, 0, -1):
+            gain[depth - 1] = -max(-gain[depth - 1], gain[depth])
+        return gain[0]
\ No newline at end of file
@@ -0,0 +1,96 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import os
+from typing import Callable
+
+# third-party
+import numpy as np
+
+# PYFISH_TABLE_CACHE=<directory> moves the cache, e.g. when the package is installed read-only
+CACHE_DIRECTORY = os.environ.get("PYFISH_TABLE_CACHE") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "tables")
+
+class TableCache:
+    """ On-disk cache of the tables computed at import (attack tables, Zobrist keys)
+
+    - Every table set lives in its own directory <name>-v<version> holding one .npy file per array,
+      bumping the version of a builder leaves the stale directory unused and builds a new one
+    - Arrays are loaded with mmap_mode="r", so loading only maps the files and the pages are read when
+      the arrays are first converted
+    - A set is written to a temporary directory that is renamed into place once complete, so that many
+      processes starting at once never read a half written set; the loser of a race keeps its own tables
+    - When the directory cannot be written the tables are rebuilt on every start
+    """
+    @staticmethod
+    def path(name: str, version: int, directory: str = CACHE_DIRECTORY) -> str:
+        """ Returns the directory of a table set """
+        return os.path.join(directory, f"{name}-v{version}")
+
+    @staticmethod
+    def load(name: str, version: int, build: Callable[[], dict[str, np.ndarray]], directory: str = CACHE_DIRECTORY) -> dict[str, np.ndarray]:
+        """ Maps a table set from the cache, building and caching it if needed
+
+        Args:
+            name (str): The name of the table set
+            version (int): The version of the builder, part of the directory name
+            build (Callable[[], dict[str, np.ndarray]]): Builds the arrays on a miss
+            directory (str, optional): The cache directory
+
+        Returns:
+            dict[str, np.ndarray]: The arrays, read-only memory maps on a hit
+        """
+        path = TableCache.path(name, version, directory)
+        try:
+            tables = {
+                file[:-len(".npy")]: np.load(os.path.join(path, file), mmap_mode="r")
+                for file in os.listdir(path) if file.endswith(".npy")
+            }
+            if tables:
+                return tables
+        except (OSError, ValueError):
+            pass
+        tables = build()
+        TableCache.save(path, tables)
+        return tables
+
+    @staticmethod
+    def save(path: str, tables: dict[str, np.ndarray]) -> bool:
+        """ Writes a table set and renames it into place
+
+        Args:
+            path (str): The directory of the table set
+            tables (dict[str, np.ndarray]): The arrays
+
+        Returns:
+            bool: Whether the set was written, False if the directory is read-only or another process was first
+        """
+        temporary = f"{path}.{os.getpid()}.building"
+        try:
+            os.makedirs(temporary, exist_ok=True)
+            for table_name, table in tables.items():
+                np.save(os.path.join(temporary, f"{table_name}.npy"), table)
+            os.rename(temporary, path)
+            return True
+        except OSError:
+            TableCache.remove(temporary)
+            return False
+
+    @staticmethod
+    def remove(path: str) -> None:
+        """ Deletes a table set directory, ignoring errors """
+        try:
+            for file in os.listdir(path):
+                os.remove(os.path.join(path, file))
+            os.rmdir(path)
+        except OSError:
+            pass
@@ -0,0 +1,344 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import argparse
+import os
+import time
+from array import array
+from itertools import product
+
+# third-party
+import numpy as np
+
+# project
+from .board import Board, IntBoard
+from .move import Move, MOVE_FLAGS, MOVE_FROM, MOVE_TO
+from .move_generator import MoveGenerator
+from .move_maker import MoveMaker, PROMOTION_PIECES
+from .pieces import Pieces
+
+MAGIC = b"PYFISHTB"
+VERSION = 1
+HEADER = np.dtype([("magic", "S8"), ("version", "<u4"), ("pieces", "<u4")])
+EXTENSION = ".pftb"
+
+# piece sets that are drawn without a table: bare kings, or a single minor piece
+DRAWN_MATERIAL = ("KvK", "KBvK", "KNvK", "KvKB", "KvKN")
+UNKNOWN_DTZ = 1 << 30
+# generate() expands every position in Python, about a minute for a 3 piece table; a 4 piece table would take
+# 64 times longer and hold hundreds of millions of move edges in memory, so generation stops at 3 pieces
+MAX_PIECES = 3
+
+# a piece list is a sorted list of (piece, square) pairs, white pieces first, from king to pawn
+PieceList = list[tuple[int, int]]
+
+class Tablebase:
+    """ One endgame table of the pyfish tablebase format: the exact result of every position with a given set of pieces
+
+    - The format is the engine's own, not Syzygy: a 16 byte header (magic, version, piece count) followed by
+        - wdl: one int8 per position, 1 win, 0 draw, -1 loss for the side to move
+        - dtz: one uint8 per position, the plies until the next zeroing move (capture or pawn move) or mate
+          with best play, the winning side minimises it and the losing side maximises it
+    - The position index is turn * 64^n + the squares of the pieces in signature order as base 64 digits,
+      identical pieces are ordered by square, impossible positions are stored as draws
+    - Tables cover the positions without castling rights or en passant square, the 50 move rule is ignored
+    - A table is named after its signature, e.g. KRvK.pftb holds king and rook against king; positions with the
+      colors swapped are probed by mirroring the board
+    - Both arrays are read through np.memmap, a probe reads two bytes
+    """
+    def __init__(self, path: str) -> None:
+        header = np.fromfile(path, dtype=HEADER, count=1)
+        if len(header) != 1 or header[0]["magic"] != MAGIC or header[0]["version"] != VERSION:
+            raise ValueError(f"{path} is not a pyfish tablebase file (version {VERSION})")
+        self.path = path
+        self.signature = os.path.basename(path)[:-len(EXTENSION)]
+        self.pieces = int(header[0]["pieces"])
+        size = 2 * 64 ** self.pieces
+        self.wdl = np.memmap(path, dtype=np.int8, mode="r", offset=HEADER.itemsize, shape=(size,))
+        self.dtz = np.memmap(path, dtype=np.uint8, mode="r", offset=HEADER.itemsize + size, shape=(size,))
+
+    @staticmethod
+    def parse(signature: str) -> list[int]:
+        """ Lists the pieces of a signature (e.g. KRvK) in signature order """
+        white, black = signature.split("v")
+        return sorted([Pieces.ENCODE[char] for char in white] + [Pieces.ENCODE[char.lower()] for char in black])
+
+    @staticmethod
+    def signature_of(pieces: PieceList) -> str:
+        """ Returns the signature of a piece list """
+        white = "".join(Pieces.DECODE[piece] for piece, _ in pieces if piece < Pieces.BLACK)
+        black = "".join(Pieces.DECODE[piece & 7] for piece, _ in pieces if piece >= Pieces.BLACK)
+        return f"{white}v{black}"
+
+    @staticmethod
+    def index(pieces: PieceList, turn: bool) -> int:
+        """ Returns the position index of a sorted piece list """
+        index = 0 if turn else 1
+        for _, square in pieces:
+            index = index * 64 + square
+        return index
+
+    @staticmethod
+    def piece_list(bitboards: list[int]) -> PieceList:
+        """ Lists the pieces of a board in signature order """
+        pieces = []
+        for piece in Pieces.DECODE:
+            bitboard = bitboards[piece]
+            while bitboard:
+                pieces.append((piece, (bitboard & -bitboard).bit_length() - 1))
+                bitboard &= bitboard - 1
+        return pieces
+
+    @staticmethod
+    def mirror(pieces: PieceList) -> PieceList:
+        """ Swaps the colors of a piece list and flips the board vertically """
+        return sorted((piece ^ Pieces.BLACK, square ^ 56) for piece, square in pieces)
+
+    def probe_index(self, index: int) -> tuple[int, int]:
+        """ Returns the (wdl, dtz) of a position index """
+        return int(self.wdl[index]), int(self.dtz[index])
+
+    @staticmethod
+    def generate(signature: str, directory: str, tablebases: "Tablebases" = None, verbose: bool = True) -> "Tablebase":
+        """ Builds a table by retrograde analysis and writes it to directory/<signature>.pftb
+
+        - Every legal position is expanded once, moves that stay in the table become edges of a move graph,
+          captures and promotions lead to smaller tables that are probed in tablebases
+        - Wins and losses are propagated over the graph with numpy until nothing changes, then the
+          distances to zeroing are relaxed the same way
+        - Tables of more than MAX_PIECES pieces are refused: the expansion is a Python loop over the unreduced
+          2 * 64^n index, a 3 piece table takes about a minute and a 4 piece one would take hours and gigabytes
+
+        Args:
+            signature (str): The piece set, e.g. KRvK
+            directory (str): The directory of the table files
+            tablebases (Tablebases, optional): The tables the captures and promotions lead to
+            verbose (bool, optional): Prints the progress
+
+        Returns:
+            Tablebase: The new table, opened from the written file
+        """
+        pieces = Tablebase.parse(signature)
+        count = len(pieces)
+        if pieces.count(Pieces.WHITE | Pieces.KING) != 1 or pieces.count(Pieces.BLACK | Pieces.KING) != 1:
+            raise ValueError(f"{signature} needs exactly one king per side")
+        if count > MAX_PIECES:
+            raise ValueError(f"{signature} has {count} pieces, generation is limited to {MAX_PIECES} (2 * 64^n positions expanded in Python)")
+        size = 2 * 64 ** count
+        start = time.perf_counter()
+
+        valid = np.zeros(size, dtype=bool)
+        mated = np.zeros(size, dtype=bool)
+        owners, children, outcomes, zeroing = array("i"), array("i"), array("b"), array("b")
+        for turn, squares in product((True, False), product(range(64), repeat=count)):
+            if len(set(squares)) < count or any(pieces[i] == pieces[i + 1] and squares[i] > squares[i + 1] for i in range(count - 1)) \
+                    or any(piece & 7 == Pieces.PAWN and not 8 <= square < 56 for piece, square in zip(pieces, squares)):
+                continue
+            bitboards = [0] * 16
+            for piece, square in zip(pieces, squares):
+                bitboards[piece] |= 1 << square
+            board = IntBoard((bitboards, turn, 0, None))
+            bitboards = board.tolist()
+            # the side that just moved cannot be in check
+            enemy = Pieces.BLACK if turn else Pieces.WHITE
+            enemy_king = bitboards[enemy | Pieces.KING].bit_length() - 1
+            if MoveGenerator.is_square_attacked(bitboards, enemy_king, enemy ^ Pieces.BLACK, bitboards[Pieces.OCCUPIED]):
+                continue
+
+            current = list(zip(pieces, squares))
+            index = Tablebase.index(current, turn)
+            valid[index] = True
+            codes = MoveGenerator.legal_code_list(board, bitboards)
+            if not codes:
+                mated[index] = MoveGenerator.in_check(board)
+            for code in codes:
+                initial_square, target_square, flags = MOVE_FROM[code], MOVE_TO[code], MOVE_FLAGS[code]
+                child = []
+                for piece, square in current:
+                    if square == initial_square:
+                        child.append((piece & Pieces.BLACK | PROMOTION_PIECES[flags & 3] if flags & 0b1000 else piece, target_square))
+                    elif square != target_square:
+                        child.append((piece, square))
+                child.sort()
+                owners.append(index)
+                if len(child) == count and not flags & 0b1000:
+                    children.append(Tablebase.index(child, not turn))
+                    outcomes.append(0)
+                    zeroing.append(any(piece & 7 == Pieces.PAWN for piece, square in current if square == initial_square))
+                else:
+                    result = tablebases.probe_pieces(child, not turn) if tablebases is not None else None
+                    if result is None and Tablebase.signature_of(child) not in DRAWN_MATERIAL:
+                        raise ValueError(f"{signature} needs the {Tablebase.signature_of(child)} table")
+                    children.append(-1)
+                    outcomes.append(result[0] if result is not None else 0)
+                    zeroing.append(True)
+        if verbose:
+            print(f"{signature}: {valid.sum()} positions, {len(owners)} moves, expanded in {time.perf_counter() - start:.1f}s")
+
+        owners = np.frombuffer(owners, dtype=np.int32)
+        children = np.frombuffer(children, dtype=np.int32)
+        internal = children >= 0
+        safe_children = np.where(internal, children, 0)
+        outcomes = np.frombuffer(outcomes, dtype=np.int8).astype(np.int64)
+        zeroing = np.frombuffer(zeroing, dtype=np.int8).astype(bool)
+        degrees = np.bincount(owners, minlength=size)
+
+        # win / draw / loss, a position is decided once one move reaches a lost position or every move reaches a won one
+        wdl = np.zeros(size, dtype=np.int8)
+        known = valid & (degrees == 0)
+        wdl[mated] = -1
+        while True:
+            child_wdl = np.where(internal, wdl[safe_children], outcomes)
+            child_known = np.where(internal, known[safe_children], True)
+            wins = np.bincount(owners, weights=child_known & (child_wdl == -1), minlength=size) > 0
+            losses = np.bincount(owners, weights=child_known & (child_wdl == 1), minlength=size) == degrees
+            new_wins = valid & ~known & wins
+            new_losses = valid & ~known & ~wins & losses
+            if not new_wins.any() and not new_losses.any():
+                break
+            wdl[new_wins], wdl[new_losses] = 1, -1
+            known |= new_wins | new_losses
+
+        # distance to zeroing: the winner takes the shortest way into a lost position, the loser the longest
+        starts = np.searchsorted(owners, np.arange(size))
+        has_moves = degrees > 0
+        decided = valid & has_moves
+        dtz = np.where(decided & (wdl != 0), UNKNOWN_DTZ, 0).astype(np.int64)
+        losing_child = np.where(internal, wdl[safe_children], outcomes) == -1
+        wins, losses = decided & (wdl == 1), decided & (wdl == -1)
+        shortest, longest = np.zeros(size, dtype=np.int64), np.zeros(size, dtype=np.int64)
+        while True:
+            contributions = np.where(zeroing, 0, dtz[safe_children])
+            shortest[has_moves] = np.minimum.reduceat(np.where(losing_child, contributions, UNKNOWN_DTZ), starts[has_moves])
+            longest[has_moves] = np.maximum.reduceat(contributions, starts[has_moves])
+            updated = np.where(wins, np.minimum(shortest + 1, UNKNOWN_DTZ), np.where(losses, np.minimum(longest + 1, UNKNOWN_DTZ), dtz))
+            if np.array_equal(updated, dtz):
+                break
+            dtz = updated
+        if dtz.max() > 255:
+            raise ValueError(f"{signature} has distances beyond the uint8 range")
+
+        path = os.path.join(directory, signature + EXTENSION)
+        os.makedirs(directory, exist_ok=True)
+        with open(path, "wb") as file:
+            np.array((MAGIC, VERSION, count), dtype=HEADER).tofile(file)
+            wdl.tofile(file)
+            dtz.astype(np.uint8).tofile(file)
+        if verbose:
+            print(f"{signature}: {(wdl[valid] == 1).sum()} wins, {(wdl[valid] == 0).sum()} draws, {(wdl[valid] == -1).sum()} losses, "
+                  f"longest dtz {dtz.max()}, {time.perf_counter() - start:.1f}s")
+        return Tablebase(path)
+
+class Tablebases:
+    """ The tables of a directory, probed by the search
+
+    - probe_wdl() is cheap enough for every node: a popcount, a piece list and one byte of a mapped file
+    - root_move() uses the distances to zeroing to pick a move that makes progress
+    """
+    def __init__(self, directory: str) -> None:
+        self.directory = directory
+        self.tables = {}
+        for name in sorted(os.listdir(directory)):
+            if name.endswith(EXTENSION):
+                table = Tablebase(os.path.join(directory, name))
+                self.tables[table.signature] = table
+        self.max_pieces = max((table.pieces for table in self.tables.values()), default=0)
+
+    def __len__(self) -> int:
+        return len(self.tables)
+
+    def probe_pieces(self, pieces: PieceList, turn: bool) -> tuple[int, int] | None:
+        """ Looks a sorted piece list up
+
+        Args:
+            pieces (PieceList): The pieces
+            turn (bool): The side to move
+
+        Returns:
+            tuple[int, int] | None: The (wdl, dtz) of the side to move, None if no table covers the pieces
+        """
+        signature = Tablebase.signature_of(pieces)
+        if signature in DRAWN_MATERIAL:
+            return 0, 0
+        table = self.tables.get(signature)
+        if table is not None:
+            return table.probe_index(Tablebase.index(pieces, turn))
+        white, black = signature.split("v")
+        table = self.tables.get(f"{black}v{white}")
+        if table is not None:
+            return table.probe_index(Tablebase.index(Tablebase.mirror(pieces), not turn))
+        return None
+
+    def probe(self, board: Board) -> tuple[int, int] | None:
+        """ Looks a board up
+
+        Args:
+            board (Board): The board state (any backend)
+
+        Returns:
+            tuple[int, int] | None: The (wdl, dtz) of the side to move, None if the position is not covered
+        """
+        bitboards = board.tolist()
+        if bitboards[Pieces.OCCUPIED].bit_count() > self.max_pieces or board.castling_rights or board.en_passant is not None:
+            return None
+        return self.probe_pieces(Tablebase.piece_list(bitboards), board.turn)
+
+    def probe_wdl(self, board: Board) -> int | None:
+        """ Returns 1, 0 or -1 for a win, draw or loss of the side to move, None if the position is not covered """
+        result = self.probe(board)
+        return result[0] if result is not None else None
+
+    def root_move(self, board: Board) -> tuple[Move, int] | None:
+        """ Picks the best move of a covered position
+
+        Args:
+            board (Board): The board state, restored before returning
+
+        Returns:
+            tuple[Move, int] | None: The move and the wdl of the side to move, None if the position is not covered,
+                has no legal moves, or is not won and a move leads to a position the tables do not cover
+                (e.g. an en passant square or a promotion into a missing table), the search decides then
+        """
+        if self.probe(board) is None:
+            return None
+        move_maker = MoveMaker()
+        best = None
+        uncovered = False
+        for code in MoveGenerator.legal_code_list(board, board.tolist()):
+            zeroing = code & 0x4000 or board.mailbox[MOVE_FROM[code]] & 7 == Pieces.PAWN
+            move_maker.make_move(board, code)
+            child = self.probe(board)
+            move_maker.unmake_move(board)
+            if child is None:
+                uncovered = True
+                continue
+            child_wdl, child_dtz = child
+            # better result first, then the fastest win or the slowest loss
+            distance = 0 if zeroing else child_dtz
+            rank = (-child_wdl, -distance if child_wdl == -1 else distance)
+            if best is None or rank > best[0]:
+                best = (rank, code)
+        # a win is the best possible result, anything less could be beaten by a move the tables do not cover
+        if best is None or (uncovered and best[0][0] != 1):
+            return None
+        return Move.from_code(best[1]), best[0][0]
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="generates pyfish tablebase files, the tables a capture or promotion leads to must be listed first")
+    parser.add_argument("signatures", nargs="+", help=f"the piece sets of at most {MAX_PIECES} pieces, e.g. KQvK KRvK KPvK")
+    parser.add_argument("-d", "--directory", default="tablebases", help="the directory of the table files")
+    args = parser.parse_args()
+
+    os.makedirs(args.directory, exist_ok=True)
+    for table_signature in args.signatures:
+        Tablebase.generate(table_signature, args.directory, Tablebases(args.directory))
\ No newline at end of file
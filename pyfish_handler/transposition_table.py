@@ -0,0 +1,228 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+
+# standard
+from array import array
+
+# project
+from .instrumentation import Instrumentation
+
+ENTRY_WORDS = 2 # key, data
+BUCKET_WORDS = 2 * ENTRY_WORDS # depth-preferred entry, always-replace entry
+BUCKET_BYTES = 8 * BUCKET_WORDS
+
+class Bound:
+    """ Assigns names to the 2 bit bound types of a stored score """
+    NONE  = 0b00
+    LOWER = 0b01 # fail high, the score is at least this
+    UPPER = 0b10 # fail low, the score is at most this
+    EXACT = 0b11
+
+class TranspositionTable:
+    """ Fixed-size hash table of search results indexed by Zobrist key
+    reference: https://www.chessprogramming.org/Transposition_Table
+
+    - The whole table is one preallocated array('Q'), memory use is fixed by the size in MB
+        - with shared=True the words live in multiprocessing.shared_memory instead, so that the
+          Lazy SMP helper processes can attach() to the same table
+    - Every bucket holds two entries of two words (key ^ data, data):
+        - the key word is XORed with the data word, an entry torn by two processes writing at
+          once fails the check on probe instead of returning another position's data (lockless hashing)
+          reference: https://www.chessprogramming.org/Shared_Hash_Table#Lockless
+        - slot 0 is depth-preferred, it is only replaced by deeper results or results from a newer search
+        - slot 1 is always replaced
+    - The data word packs:
+        - bits 0-15: the best move (Move encoding)
+        - bits 16-31: the score, offset by 2^15 to stay unsigned
+        - bits 32-39: the depth
+        - bits 40-41: the bound type
+        - bits 48-55: the generation (search counter) that stored the entry
+    - Perft uses the same buckets through store_count/probe_count, where the data word is count << 8 | depth
+    """
+    def __init__(self, size_mb: float = 16, shared: bool = False) -> None:
+        self.shared = shared
+        self.memory = None
+        self.owner = False
+        self.resize(size_mb)
+
+    @classmethod
+    def attach(cls, name: str) -> "TranspositionTable":
+        """ Opens a shared table created by another process
+
+        Args:
+            name (str): The shared memory name of the table (table.memory.name)
+
+        Returns:
+            TranspositionTable: A table that reads and writes the same memory
+        """
+        from multiprocessing import shared_memory # pylint: disable=import-outside-toplevel
+        table = cls.__new__(cls)
+        table.shared = True
+        table.memory = shared_memory.SharedMemory(name)
+        table.owner = False
+        table.table = table.memory.buf.cast('Q')
+        table.mask = len(table.table) // BUCKET_WORDS - 1
+        table.generation = 0
+        return table
+
+    def resize(self, size_mb: float) -> None:
+        """ Reallocates the table, the bucket count is rounded down to a power of two
+
+        Args:
+            size_mb (float): The size of the table in megabytes
+        """
+        buckets = max(1, int(size_mb * (1 << 20)) // BUCKET_BYTES)
+        buckets = 1 << (buckets.bit_length() - 1)
+        self.mask = buckets - 1
+        if self.shared:
+            # only the shared tables of LazySMP need multiprocessing, which would slow every start down
+            from multiprocessing import shared_memory # pylint: disable=import-outside-toplevel
+            self.close()
+            self.memory = shared_memory.SharedMemory(create=True, size=buckets * BUCKET_BYTES)
+            self.owner = True
+            self.table = self.memory.buf.cast('Q')
+            self.clear()
+        else:
+            self.table = array('Q', bytes(buckets * BUCKET_BYTES))
+        self.generation = 0
+
+    def clear(self) -> None:
+        """ Erases every entry """
+        if self.shared:
+            self.memory.buf[:] = bytes(len(self.memory.buf))
+        else:
+            self.table = array('Q', bytes(len(self.table) * 8))
+        self.generation = 0
+
+    def close(self) -> None:
+        """ Releases the shared memory, the creating process also frees it (no-op for private tables) """
+        if self.memory is None:
+            return
+        self.table.release()
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        self.memory = None
+
+    def new_search(self) -> None:
+        """ Advances the generation so that entries of older searches become replaceable """
+        self.generation = (self.generation + 1) & 0xff
+
+    @property
+    def size_mb(self) -> float:
+        return len(self.table) * 8 / (1 << 20)
+
+    @Instrumentation.timed(hits=True)
+    def probe(self, key: int) -> tuple[int, int, int, int] | None:
+        """ Looks up the entry of a position
+
+        Args:
+            key (int): The Zobrist key of the position
+
+        Returns:
+            tuple[int, int, int, int] | None: The move, score, depth and bound, None on a miss
+        """
+        table = self.table
+        index = (key & self.mask) * BUCKET_WORDS
+        data = table[index + 1]
+        if table[index] ^ data != key:
+            data = table[index + 3]
+            if table[index + 2] ^ data != key:
+                return None
+        if data == 0:
+            return None
+        return data & 0xffff, ((data >> 16) & 0xffff) - 0x8000, (data >> 32) & 0xff, (data >> 40) & 0b11
+
+    @Instrumentation.timed
+    def store(self, key: int, move: int, score: int, depth: int, bound: int) -> None:
+        """ Stores a search result
+
+        Args:
+            key (int): The Zobrist key of the position
+            move (int): The best move (0 if there is none)
+            score (int): The score, must fit in 16 signed bits
+            depth (int): The remaining depth the score was searched to
+            bound (int): The bound type (see Bound)
+        """
+        data = (int(move) & 0xffff) | ((score + 0x8000) << 16) | (depth << 32) | (bound << 40) | (self.generation << 48)
+        self.write(key, data, depth)
+
+    def write(self, key: int, data: int, depth: int) -> None:
+        """ Writes a packed entry into its bucket using the replacement scheme
+
+        Args:
+            key (int): The Zobrist key of the position
+            data (int): The packed data word
+            depth (int): The depth of the entry, used for the depth-preferred slot
+        """
+        table = self.table
+        index = (key & self.mask) * BUCKET_WORDS
+        old_data = table[index + 1]
+        if table[index] ^ old_data == key or old_data == 0 or depth >= (old_data >> 32) & 0xff \
+                or (old_data >> 48) & 0xff != self.generation:
+            table[index] = key ^ data
+            table[index + 1] = data
+        else:
+            table[index + 2] = key ^ data
+            table[index + 3] = data
+
+    @Instrumentation.timed(hits=True)
+    def probe_count(self, key: int, depth: int) -> int | None:
+        """ Looks up a perft node count
+
+        Args:
+            key (int): The Zobrist key of the position
+            depth (int): The perft depth
+
+        Returns:
+            int | None: The node count, None on a miss
+        """
+        table = self.table
+        index = (key & self.mask) * BUCKET_WORDS
+        for slot in (index, index + 2):
+            data = table[slot + 1]
+            if table[slot] ^ data == key and data & 0xff == depth:
+                return data >> 8
+        return None
+
+    @Instrumentation.timed
+    def store_count(self, key: int, depth: int, count: int) -> None:
+        """ Stores a perft node count (counts must fit in 56 bits)
+
+        Args:
+            key (int): The Zobrist key of the position
+            depth (int): The perft depth
+            count (int): The number of leaf nodes
+        """
+        table = self.table
+        index = (key & self.mask) * BUCKET_WORDS
+        data = (count << 8) | depth
+        if table[index + 1] & 0xff <= depth:
+            table[index] = key ^ data
+            table[index + 1] = data
+        else:
+            table[index + 2] = key ^ data
+            table[index + 3] = data
+
+    def hashfull(self) -> int:
+        """ Estimates how full the table is in permille by sampling the first 1000 buckets
+
+        Returns:
+            int: The permille of used entries of the current generation
+        """
+        table = self.table
+        samples = min(1000, self.mask + 1)
+        used = 0
+        for bucket in range(samples):
+            for slot in (bucket * BUCKET_WORDS + 1, bucket * BUCKET_WORDS + 3):
+                if table[slot] and (table[slot] >> 48) & 0xff == self.generation:
+                    used += 1
+        return used * 500 // samples
\ No newline at end of file
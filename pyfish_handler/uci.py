@@ -0,0 +1,318 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+# pylint: disable=line-too-long
+
+# standard
+import sys
+import threading
+from typing import TextIO
+
+# project
+from .board import Board
+from .fen_stream import FenStream
+from .lazy_smp import LazySMP
+from .move import Move
+from .move_generator import MoveGenerator
+from .move_maker import MoveMaker
+from .nnue import NNUE
+from .opening_book import PolyglotBook
+from .search import Search, MATE, MATE_BOUND
+from .tablebase import Tablebases
+from .transposition_table import TranspositionTable
+
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w KQkq - 0 1"
+MOVE_OVERHEAD = 0.05 # seconds kept in reserve for the communication with the GUI
+DEFAULT_MOVES_TO_GO = 30
+MAX_HASH_MB = 4096
+MAX_THREADS = 256
+FALLBACK_MOVE_TIME = 1.0 # seconds per move when go gives clocks but not the one of the side to move
+
+class UCI:
+    """ Universal Chess Interface front-end, run with python -m pyfish_handler.uci
+    reference: https://www.chessprogramming.org/UCI
+
+    - Supported commands: uci, isready, ucinewgame, setoption (Hash, Threads, OwnBook, BookFile, TablebasePath, EvalFile), position, go, stop, quit
+    - go accepts depth, movetime, wtime/btime/winc/binc/movestogo, nodes and infinite
+    - The search runs on a background thread so that stop and isready are answered immediately
+    - Threads > 1 switches to a Lazy SMP search with Threads - 1 helper processes and a shared table
+    - With OwnBook set and a Polyglot BookFile loaded, go answers from the book without searching while the position is in it
+    - TablebasePath loads the pyfish tablebase files of a directory (see Tablebase, 3 pieces at most), the search probes them
+    - EvalFile loads an NNUE weights file (see NNUE) that replaces the piece-square evaluation
+    """
+    def __init__(self, output: TextIO = sys.stdout) -> None:
+        self.output = output
+        self.output_lock = threading.Lock()
+        self.hash_mb = 16
+        self.threads = 1
+        self.table = TranspositionTable(self.hash_mb)
+        self.search = Search(self.table)
+        self.search_thread = None
+        self.board = Board(START_FEN)
+        self.own_book = False
+        self.book = None
+        self.tablebases = None
+        self.network = None
+
+    def send(self, line: str) -> None:
+        """ Writes one line to the GUI """
+        with self.output_lock:
+            self.output.write(line + "\n")
+            self.output.flush()
+
+    def loop(self, stream: TextIO = sys.stdin) -> None:
+        """ Reads and handles commands until quit or the end of the stream
+
+        Args:
+            stream (TextIO, optional): The command stream
+        """
+        for line in stream:
+            if not self.handle(line):
+                break
+        self.stop()
+        self.close_search()
+
+    def handle(self, line: str) -> bool:
+        """ Handles one command
+
+        Args:
+            line (str): The command line
+
+        Returns:
+            bool: False if the engine should quit
+        """
+        tokens = line.split()
+        if not tokens:
+            return True
+        command, arguments = tokens[0], tokens[1:]
+
+        if command == "uci":
+            self.send("id name pyfish")
+            self.send("id author RealPhonki")
+            self.send(f"option name Hash type spin default 16 min 1 max {MAX_HASH_MB}")
+            self.send(f"option name Threads type spin default 1 min 1 max {MAX_THREADS}")
+            self.send("option name OwnBook type check default false")
+            self.send("option name BookFile type string default <empty>")
+            self.send("option name TablebasePath type string default <empty>")
+            self.send("option name EvalFile type string default <empty>")
+            self.send("uciok")
+        elif command == "isready":
+            self.send("readyok")
+        elif command == "ucinewgame":
+            self.stop()
+            self.table.clear()
+        elif command == "setoption":
+            self.stop()
+            self.set_option(arguments)
+        elif command == "position":
+            self.stop()
+            self.set_position(arguments)
+        elif command == "go":
+            self.stop()
+            self.go(arguments)
+        elif command == "stop":
+            self.stop()
+        elif command == "quit":
+            return False
+        elif command == "d":
+            self.send(str(self.board))
+        return True
+
+    def set_option(self, arguments: list[str]) -> None:
+        """ Handles setoption name <name> value <value> """
+        if "name" not in arguments or "value" not in arguments:
+            return
+        name = " ".join(arguments[arguments.index("name") + 1:arguments.index("value")]).lower()
+        value = " ".join(arguments[arguments.index("value") + 1:])
+        if name in ("hash", "threads"):
+            try:
+                number = int(value)
+            except ValueError:
+                self.send(f"info string invalid value {value} for {name}")
+                return
+        if name == "hash":
+            self.hash_mb = min(max(1, number), MAX_HASH_MB)
+            if self.threads > 1:
+                self.configure_search()
+            else:
+                self.table.resize(self.hash_mb)
+        elif name == "threads":
+            self.threads = min(max(1, number), MAX_THREADS)
+            self.configure_search()
+        elif name == "ownbook":
+            self.own_book = value.lower() == "true"
+        elif name == "bookfile":
+            if self.book is not None:
+                self.book.close()
+            self.book = None
+            if value and value != "<empty>":
+                try:
+                    self.book = PolyglotBook(value)
+                except (OSError, ValueError) as error:
+                    self.send(f"info string cannot open book {value}: {error}")
+        elif name == "tablebasepath":
+            self.tablebases = None
+            if value and value != "<empty>":
+                try:
+                    self.tablebases = Tablebases(value)
+                    self.send(f"info string {len(self.tablebases)} tablebase files, up to {self.tablebases.max_pieces} pieces")
+                except (OSError, ValueError) as error:
+                    self.send(f"info string cannot load tablebases from {value}: {error}")
+            self.configure_search()
+        elif name == "evalfile":
+            self.network = None
+            if value and value != "<empty>":
+                try:
+                    self.network = NNUE(value)
+                except (OSError, KeyError, ValueError) as error:
+                    self.send(f"info string cannot load network {value}: {error}")
+            self.configure_search()
+
+    def configure_search(self) -> None:
+        """ Rebuilds the table and the search after the Hash, Threads, TablebasePath or EvalFile option changed """
+        self.close_search()
+        self.table = TranspositionTable(self.hash_mb, shared=self.threads > 1)
+        self.search = LazySMP(self.table, self.threads, self.tablebases, self.network) if self.threads > 1 \
+            else Search(self.table, tablebases=self.tablebases, network=self.network)
+
+    def close_search(self) -> None:
+        """ Shuts the helper processes down and frees the shared table """
+        if isinstance(self.search, LazySMP):
+            self.search.close()
+        self.table.close()
+
+    def set_position(self, arguments: list[str]) -> None:
+        """ Handles position [startpos | fen <fen>] [moves <move> ...] """
+        moves_index = arguments.index("moves") if "moves" in arguments else len(arguments)
+        if arguments and arguments[0] == "fen":
+            fen = " ".join(arguments[1:moves_index])
+            try:
+                FenStream.validate(fen)
+            except ValueError as error:
+                self.send(f"info string invalid fen {fen}: {error}")
+                return # the previous position is kept
+            board = Board(fen)
+        else:
+            board = Board(START_FEN)
+
+        move_maker = MoveMaker()
+        for uci_move in arguments[moves_index + 1:]:
+            move = UCI.parse_move(board, uci_move)
+            if move is None:
+                self.send(f"info string illegal move {uci_move}")
+                break
+            move_maker.make_move(board, move)
+        self.board = board
+
+    @staticmethod
+    def parse_move(board: Board, uci_move: str) -> Move | None:
+        """ Finds the legal move matching a move in UCI notation
+
+        Args:
+            board (Board): The board state
+            uci_move (str): The move in UCI notation (e.g. e2e4, e7e8q)
+
+        Returns:
+            Move | None: The encoded move, None if it is not legal
+        """
+        for move in MoveGenerator.legal_moves(board):
+            if move.to_uci() == uci_move:
+                return move
+        return None
+
+    def go(self, arguments: list[str]) -> None:
+        """ Handles go, starts the search on a background thread """
+        if self.own_book and self.book is not None and "infinite" not in arguments:
+            book_move = self.book.choose(self.board)
+            if book_move is not None:
+                self.send(f"bestmove {book_move.to_uci()}")
+                return
+
+        options = {}
+        for index, token in enumerate(arguments[:-1]):
+            if token in ("depth", "movetime", "wtime", "btime", "winc", "binc", "movestogo", "nodes"):
+                try:
+                    options[token] = int(arguments[index + 1])
+                except ValueError:
+                    self.send(f"info string invalid value {arguments[index + 1]} for {token}")
+
+        soft_time, hard_time = UCI.time_limits(options, self.board.turn, "infinite" in arguments)
+        limits = {
+            "max_depth": options.get("depth", 127),
+            "soft_time": soft_time,
+            "hard_time": hard_time,
+            "max_nodes": options.get("nodes"),
+        }
+        # cleared here rather than in the search thread, a stop sent right after go must not be lost
+        self.search.clear_stop()
+        self.search_thread = threading.Thread(target=self.run_search, args=(self.board.deepcopy(), limits), daemon=True)
+        self.search_thread.start()
+
+    @staticmethod
+    def time_limits(options: dict[str, int], turn: bool, infinite: bool) -> tuple[float | None, float | None]:
+        """ Converts the go time controls to soft and hard limits in seconds
+
+        Args:
+            options (dict[str, int]): The numeric go arguments
+            turn (bool): The side to move
+            infinite (bool): True if the search must run until stop
+
+        Returns:
+            tuple[float | None, float | None]: The soft and hard time limits
+        """
+        if infinite:
+            return None, None
+        if "movetime" in options:
+            limit = max(0.01, options["movetime"] / 1000 - MOVE_OVERHEAD)
+            return limit, limit
+        time_left = options.get("wtime" if turn else "btime")
+        if time_left is None:
+            if any(token in options for token in ("wtime", "btime", "winc", "binc", "movestogo")):
+                return FALLBACK_MOVE_TIME, FALLBACK_MOVE_TIME
+            return None, None # depth, nodes or nothing, bounded by those alone
+        increment = options.get("winc" if turn else "binc", 0) / 1000
+        time_left = max(0.01, time_left / 1000 - MOVE_OVERHEAD)
+        budget = time_left / options.get("movestogo", DEFAULT_MOVES_TO_GO) + increment * 0.75
+        return min(budget * 0.6, time_left), min(budget * 2.5, time_left * 0.5)
+
+    def run_search(self, board: Board, limits: dict) -> None:
+        """ Runs the search and reports the best move (background thread), bestmove is sent even if the search fails """
+        best_move = None
+        try:
+            best_move, _ = self.search.search(board, info=self.send_info, clear_stop=False, **limits)
+        except Exception as error: # pylint: disable=broad-except
+            self.send(f"info string search failed: {type(error).__name__}: {error}")
+            # fall back to the best move of the iterations that finished, if it is legal in the searched position
+            code = getattr(self.search, "search_main", self.search).best_move
+            if code in MoveGenerator.legal_code_list(board, board.tolist()):
+                best_move = Move.from_code(code)
+        finally:
+            self.send(f"bestmove {best_move.to_uci() if best_move is not None else '0000'}")
+
+    def send_info(self, depth: int, score: int, nodes: int, seconds: float, pv: list[Move]) -> None:
+        """ Reports a finished iteration """
+        if abs(score) >= MATE_BOUND:
+            moves_to_mate = (MATE - abs(score) + 1) // 2
+            score_text = f"mate {moves_to_mate if score > 0 else -moves_to_mate}"
+        else:
+            score_text = f"cp {score}"
+        nps = int(nodes / max(seconds, 1e-6))
+        self.send(f"info depth {depth} score {score_text} nodes {nodes} nps {nps} time {int(seconds * 1000)} "
+                  f"hashfull {self.table.hashfull()} pv {' '.join(move.to_uci() for move in pv)}")
+
+    def stop(self) -> None:
+        """ Stops a running search and waits for its bestmove """
+        if self.search_thread is not None:
+            self.search.stop()
+            self.search_thread.join()
+            self.search_thread = None
+
+if __name__ == '__main__':
+    UCI().loop()
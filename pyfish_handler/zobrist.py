@@ -0,0 +1,97 @@
+# pylint: disable=trailing-whitespace
+# pylint: disable=missing-module-docstring
+# pylint: disable=invalid-name
+# pylint: disable=no-member
+# pylint: disable=missing-final-newline
+# pylint: disable=attribute-defined-outside-init
+# pylint: disable=consider-using-enumerate
+# pylint: disable=wildcard-import
+# pylint: disable=unused-wildcard-import
+# pylint: disable=import-error
+
+# third-party
+import numpy as np
+
+# project
+from .attack_tables import PAWN_ATTACKS
+from .pieces import Pieces
+from .table_cache import TableCache
+
+KEYS_VERSION = 1 # bump when the keys change, the cached keys of other versions are ignored
+
+def _keys(seed: int = 0x20b2157) -> dict[str, np.ndarray]:
+    """ Draws every key from a seeded generator, numpy.random is only imported when the cache misses """
+    rng = np.random.default_rng(seed)
+    pieces = np.zeros((16, 64), dtype=np.uint64)
+    for index in range(16):
+        if index in Pieces.DECODE:
+            pieces[index] = rng.integers(0, 1 << 64, size=64, dtype=np.uint64)
+    return {
+        "pieces": pieces,
+        "side": rng.integers(0, 1 << 64, size=1, dtype=np.uint64),
+        "castling": rng.integers(0, 1 << 64, size=16, dtype=np.uint64),
+        "en_passant": rng.integers(0, 1 << 64, size=8, dtype=np.uint64),
+    }
+
+# the keys are plain ints so that XOR updates stay cheap, the aggregate bitboard slots hold zero keys
+_keys_cache = TableCache.load("zobrist", KEYS_VERSION, _keys)
+PIECE_KEYS: list[list[int]] = _keys_cache["pieces"].tolist()
+SIDE_KEY: int = int(_keys_cache["side"][0])
+CASTLING_KEYS: list[int] = _keys_cache["castling"].tolist()
+EN_PASSANT_KEYS: list[int] = _keys_cache["en_passant"].tolist()
+del _keys_cache
+
+class Zobrist:
+    """ Computes 64 bit Zobrist keys of board states
+    reference: https://www.chessprogramming.org/Zobrist_Hashing
+    
+    - One key per piece and square, one for black to move, one per castling rights value
+      and one per en passant file
+    - The full computation is only needed when a board is created, MoveMaker keeps the key
+      up to date by XORing the keys of whatever a move changes
+    - Like MoveMaker, an en passant square only counts when a pawn of the side to move can capture on it,
+      so a position has the same key whether it was set up from a FEN or reached by a double push
+    """
+    @staticmethod
+    def capturable(bitboards: list[int], turn: bool, en_passant: int | None) -> int | None:
+        """ Returns the en passant square if a pawn of the side to move attacks it, None otherwise
+
+        Args:
+            bitboards (list[int]): The bitboards (any indexable of 16 bitboards)
+            turn (bool): True for white, False for black
+            en_passant (int | None): The en passant target square
+
+        Returns:
+            int | None: The en passant square, None if there is none or no pawn can capture on it
+        """
+        if en_passant is None:
+            return None
+        pawns = int(bitboards[(Pieces.WHITE if turn else Pieces.BLACK) | Pieces.PAWN])
+        return en_passant if PAWN_ATTACKS[1 if turn else 0][en_passant] & pawns else None
+
+    @staticmethod
+    def hash(bitboards: list[int], turn: bool, castling_rights: int, en_passant: int | None) -> int:
+        """ Computes the key of a board state from scratch
+
+        Args:
+            bitboards (list[int]): The bitboards (any indexable of 16 bitboards)
+            turn (bool): True for white, False for black
+            castling_rights (int): The castling rights
+            en_passant (int | None): The en passant target square
+
+        Returns:
+            int: The 64 bit Zobrist key
+        """
+        key = 0
+        for piece in Pieces.DECODE:
+            bitboard = int(bitboards[piece])
+            keys = PIECE_KEYS[piece]
+            while bitboard:
+                key ^= keys[(bitboard & -bitboard).bit_length() - 1]
+                bitboard &= bitboard - 1
+        if not turn:
+            key ^= SIDE_KEY
+        key ^= CASTLING_KEYS[castling_rights]
+        if Zobrist.capturable(bitboards, turn, en_passant) is not None:
+            key ^= EN_PASSANT_KEYS[en_passant & 7]
+        return key